@@ -0,0 +1,134 @@
+"""
+Benchmark the approximate nearest neighbors search of Geometric SMOTE.
+
+Reports the recall of :class:`~mlresearch.data_augmentation.RandomProjectionNeighbors`
+and :class:`~mlresearch.data_augmentation.ClusterNeighbors` against the exact search,
+along with the speedup of ``GeometricSMOTE.fit_resample`` when they replace the exact
+search. The exact search based on matrix products of
+:class:`~mlresearch.data_augmentation.BruteForceNeighbors` is reported as well. The
+default data set mimics a hyperspectral image, with many correlated bands.
+
+Usage::
+
+    python benchmarks/bench_gsmote_neighbors.py --n-samples 200000 --n-features 200
+"""
+
+# Author: Joao Fonseca <jpmrfonseca@gmail.com>
+# License: BSD 3 clause
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+from sklearn.neighbors import NearestNeighbors
+
+from mlresearch.data_augmentation import (
+    BruteForceNeighbors,
+    ClusterNeighbors,
+    GeometricSMOTE,
+    RandomProjectionNeighbors,
+)
+
+
+def make_data(n_samples, n_features, n_classes, random_state):
+    """Imbalanced data with a low intrinsic dimension."""
+    weights = np.geomspace(1, 10, n_classes)
+    return make_classification(
+        n_samples=n_samples,
+        n_features=n_features,
+        n_informative=10,
+        n_redundant=n_features - 10,
+        n_classes=n_classes,
+        n_clusters_per_class=2,
+        weights=weights / weights.sum(),
+        random_state=random_state,
+    )
+
+
+def recall(X, nn, n_queries, random_state):
+    """Fraction of the exact nearest neighbors found by the approximate search."""
+    queries = X[np.random.RandomState(random_state).choice(X.shape[0], n_queries)]
+    exact = NearestNeighbors(n_neighbors=nn.n_neighbors).fit(X).kneighbors(queries)[1]
+    approximate = nn.fit(X).kneighbors(queries, return_distance=False)
+    return np.mean([np.isin(a, e).mean() for a, e in zip(approximate, exact)])
+
+
+def time_fit_resample(X, y, k_neighbors, random_state):
+    gsmote = GeometricSMOTE(k_neighbors=k_neighbors, random_state=random_state)
+    start = perf_counter()
+    gsmote.fit_resample(X, y)
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n-samples", type=int, default=100000)
+    parser.add_argument("--n-features", type=int, default=200)
+    parser.add_argument("--n-classes", type=int, default=4)
+    parser.add_argument("--k-neighbors", type=int, default=5)
+    parser.add_argument("--n-trees", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--leaf-size", type=int, default=30)
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--n-queries", type=int, default=2000)
+    parser.add_argument("--random-state", type=int, default=0)
+    args = parser.parse_args()
+
+    X, y = make_data(args.n_samples, args.n_features, args.n_classes, args.random_state)
+    exact_time = time_fit_resample(X, y, args.k_neighbors, args.random_state)
+
+    results = [("exact", 1.0, exact_time, 1.0)]
+    for dtype in (np.float64, np.float32):
+        brute_force_time = time_fit_resample(
+            X,
+            y,
+            BruteForceNeighbors(n_neighbors=args.k_neighbors + 1, dtype=dtype),
+            args.random_state,
+        )
+        results.append(
+            (
+                f"brute_force_{dtype.__name__}",
+                1.0,
+                brute_force_time,
+                exact_time / brute_force_time,
+            )
+        )
+    approximate = [
+        (
+            f"n_trees={n_trees}",
+            RandomProjectionNeighbors(
+                n_neighbors=args.k_neighbors + 1,
+                n_trees=n_trees,
+                leaf_size=args.leaf_size,
+                random_state=args.random_state,
+            ),
+        )
+        for n_trees in args.n_trees
+    ] + [
+        (
+            f"n_probe={n_probe}",
+            ClusterNeighbors(
+                n_neighbors=args.k_neighbors + 1,
+                n_probe=n_probe,
+                random_state=args.random_state,
+            ),
+        )
+        for n_probe in args.n_probe
+    ]
+    for name, nn in approximate:
+        approximate_time = time_fit_resample(X, y, nn, args.random_state)
+        results.append(
+            (
+                name,
+                recall(X, nn, args.n_queries, args.random_state),
+                approximate_time,
+                exact_time / approximate_time,
+            )
+        )
+
+    print(
+        pd.DataFrame(
+            results, columns=["search", "recall", "fit_resample (s)", "speedup"]
+        ).to_string(index=False, float_format="{:.3f}".format)
+    )
@@ -5,6 +5,19 @@ techniques.
 """
 
 from ._oversampling_augmentation import OverSamplingAugmentation
-from ._gsmote import GeometricSMOTE
+from ._gsmote import GeometricSMOTE, GeometricSMOTECache, SyntheticPlan
+from ._neighbors import (
+    BruteForceNeighbors,
+    ClusterNeighbors,
+    RandomProjectionNeighbors,
+)
 
-__all__ = ["OverSamplingAugmentation", "GeometricSMOTE"]
+__all__ = [
+    "OverSamplingAugmentation",
+    "GeometricSMOTE",
+    "GeometricSMOTECache",
+    "BruteForceNeighbors",
+    "ClusterNeighbors",
+    "SyntheticPlan",
+    "RandomProjectionNeighbors",
+]
@@ -8,18 +8,34 @@ version of the original Geometric SMOTE implementation.
 # License: BSD 3 clause
 
 import math
+import os
+import threading
+from copy import copy
+from functools import lru_cache
+from time import perf_counter
+from numbers import Integral
 import numpy as np
-from collections import Counter
+from collections import Counter, OrderedDict, namedtuple
 from numpy.linalg import norm
 from scipy import sparse
-from sklearn.utils import check_random_state, check_array
+from scipy.special import chdtri, ndtri
+from joblib import Parallel, cpu_count, delayed, effective_n_jobs, hash as joblib_hash
+from sklearn import get_config
+from sklearn.base import clone
+from sklearn.metrics.pairwise import (
+    euclidean_distances,
+    paired_distances,
+    pairwise_distances,
+)
+from sklearn.utils import check_random_state, check_array, gen_batches, get_chunk_n_rows
+from sklearn.utils.fixes import threadpool_info
 from sklearn.utils.multiclass import check_classification_targets
-from sklearn.utils.validation import _check_sample_weight
+from sklearn.utils.validation import _check_sample_weight, check_is_fitted
 from sklearn.utils.sparsefuncs_fast import (
     csr_mean_variance_axis0,
     csc_mean_variance_axis0,
 )
-from sklearn.preprocessing import OneHotEncoder, label_binarize
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, label_binarize
 from imblearn.over_sampling.base import BaseOverSampler
 from imblearn.utils import (
     check_neighbors_object,
@@ -30,7 +46,47 @@ from imblearn.utils import (
 from imblearn.utils._docstring import _random_state_docstring
 from imblearn.utils._validation import ArraysTransformer
 
+from ._neighbors import (
+    BLOCK_N_ROWS,
+    BruteForceNeighbors,
+    ClusterNeighbors,
+    RandomProjectionNeighbors,
+    _ClassNeighbors,
+    _MixedNeighbors,
+    _toarray,
+)
+
 SELECTION_STRATEGY = ("combined", "majority", "minority")
+CATEGORICAL_ENCODING = ("onehot", "ordinal")
+METRIC = ("euclidean", "l2", "manhattan", "l1", "cityblock", "cosine", "precomputed")
+STREAM_BLOCK_SIZE = 4096
+TREE_MAX_FEATURES = 15
+
+# Costs of the time model of GeometricSMOTE.estimate_cost, in floating point
+# operations of matrix products. They were calibrated against the time of
+# fit_resample with each nearest neighbors search, on data sets of 5,000 to
+# 100,000 samples and 4 to 50 features, where the estimated times are within a
+# factor of two of the measured ones.
+SELECTION_COST = 32  # selection of the nearest candidates, per distance
+PROBE_COST = 128  # indexing and selection of a ClusterNeighbors candidate
+KMEANS_STEP_COST = 2e7  # overhead of a mini-batch k-means step
+TREE_VISIT_COST = 16  # traversal of a tree, per visited sample and feature
+TREE_VISIT_EXPONENT = 2 / 3  # growth of the visited samples per feature
+SAMPLE_COST = 50000  # drawing and selection of an artificial sample
+FEATURE_COST = 800  # generation of an artificial sample, per feature
+
+# Fraction of the queries that does not run concurrently in the threads, i.e.
+# the parts holding the GIL, assumed for the speedup of n_jobs
+SERIAL_FRACTION = 0.2
+
+
+def _float_dtype(dtype):
+    """Returns the floating point dtype used to generate samples from data of a
+    given dtype. It is the smallest floating point dtype, starting from float32,
+    that represents the data exactly."""
+    if dtype.kind in "biuf":
+        return np.result_type(dtype, np.float32)
+    return np.dtype(np.float64)
 
 
 def _make_geometric_sample(
@@ -102,47 +158,962 @@ def _make_geometric_sample(
     return point
 
 
-def _make_categorical_sample(X_new, all_neighbors, categories_size, random_state):
+def _sample_unit_ball(n_points, n_features, random_state):
+    """A support function that returns points uniformly distributed inside
+    the unit hyper-sphere.
+
+    The random numbers of a ``RandomState`` are drawn point by point, in the same
+    order as in :func:`_make_geometric_sample`, so that both functions produce the
+    same points for a given random state. The random numbers of a ``Generator``
+    or of row streams are drawn at once.
+
+    Parameters
+    ----------
+    n_points : int
+        Number of points to generate.
+
+    n_features : int
+        Dimensionality of the hyper-sphere.
+
+    random_state : RandomState, Generator or _RowStreams instance
+        Control the randomization of the algorithm.
+
+    Returns
+    -------
+    points : ndarray, shape (n_points, n_features)
+        Points inside the unit hyper-sphere.
+
+    """
+    if not isinstance(random_state, np.random.RandomState):
+        normal_samples = random_state.standard_normal((n_points, n_features))
+        uniform_samples = random_state.random(n_points)
+    else:
+        normal_samples = np.empty((n_points, n_features))
+        uniform_samples = np.empty(n_points)
+        for ind in range(n_points):
+            normal_samples[ind] = random_state.normal(size=n_features)
+            uniform_samples[ind] = random_state.uniform(size=1)[0]
+    points_on_unit_sphere = normal_samples / norm(normal_samples, axis=1)[:, None]
+    return (uniform_samples ** (1 / n_features))[:, None] * points_on_unit_sphere
+
+
+def _take_random_state(random_state, mask):
+    """Returns the random state used to draw the random numbers of the rows
+    selected by a boolean mask. Row streams are restricted to the selected rows,
+    while other random states are shared by all rows."""
+    if isinstance(random_state, _RowStreams):
+        return random_state.take(mask)
+    return random_state
+
+
+def _truncate_and_deform(
+    unit_points,
+    parallel_unit_vectors,
+    truncation_factor,
+    deformation_factor,
+    dots=None,
+):
+    """A support function that applies the truncation and deformation of the
+    geometric regions to points inside the unit hyper-sphere.
+
+    Parameters
+    ----------
+    unit_points : ndarray, shape (n_samples, n_features)
+        Points inside the unit hyper-sphere.
+
+    parallel_unit_vectors : ndarray, shape (n_samples, n_features)
+        Unit vectors in the direction of the surface points.
+
+    truncation_factor : float
+        The type of truncation. The values should be in the [-1.0, 1.0] range.
+
+    deformation_factor : float
+        The type of geometry. The values should be in the [0.0, 1.0] range.
+
+    dots : ndarray, shape (n_samples,), optional
+        Projections of the points on the parallel unit vectors, when they
+        include coordinates that are not part of ``unit_points``. If not given,
+        they are computed from ``unit_points``.
+
+    Returns
+    -------
+    unit_points : ndarray, shape (n_samples, n_features)
+        Transformed points.
+
+    """
+    projected = dots is None
+    if projected:
+        dots = np.einsum("ij,ij->i", unit_points, parallel_unit_vectors)
+
+    # Truncation
+    if truncation_factor > 0:
+        reflect = dots < truncation_factor - 1
+    elif truncation_factor < 0:
+        reflect = dots > truncation_factor + 1
+    else:
+        reflect = np.zeros(dots.shape, dtype=bool)
+    unit_points = unit_points.copy()
+    unit_points[reflect] -= 2 * dots[reflect, None] * parallel_unit_vectors[reflect]
+    if projected:
+        dots = np.einsum("ij,ij->i", unit_points, parallel_unit_vectors)
+    else:
+        dots = np.where(reflect, -dots, dots)
+
+    # Deformation
+    parallel_points_positions = dots[:, None] * parallel_unit_vectors
+    perpendicular_points_positions = unit_points - parallel_points_positions
+    return (
+        parallel_points_positions
+        + (1 - deformation_factor) * perpendicular_points_positions
+    )
+
+
+def _make_geometric_samples_batch(
+    centers, surface_points, truncation_factor, deformation_factor, random_state
+):
+    """A support function that returns artificial points inside the geometric
+    regions defined by pairs of center and surface points. It is the vectorized
+    version of :func:`_make_geometric_sample`.
+
+    Parameters
+    ----------
+    centers : ndarray, shape (n_samples, n_features)
+        Center points of the geometric regions.
+
+    surface_points : ndarray, shape (n_samples, n_features)
+        Surface points of the geometric regions.
+
+    truncation_factor : float or ndarray, shape (n_geometries,)
+        The type of truncation. The values should be in the [-1.0, 1.0] range.
+
+    deformation_factor : float or ndarray, shape (n_geometries,)
+        The type of geometry. The values should be in the [0.0, 1.0] range.
+
+    random_state : RandomState, Generator or _RowStreams instance
+        Control the randomization of the algorithm.
+
+    Returns
+    -------
+    points : ndarray, shape (n_samples, n_features) or \
+            (n_geometries, n_samples, n_features)
+        Synthetically generated samples. If the factors are arrays, the samples
+        of each geometry are generated from the same random numbers.
+
+    """
+    points = np.array(centers, dtype=_float_dtype(centers.dtype))
+    if np.ndim(truncation_factor) > 0:
+        points = np.repeat(points[None], len(truncation_factor), axis=0)
+
+    # Zero radius case
+    mask = np.any(centers != surface_points, axis=1)
+    if not mask.any():
+        return points
+    centers, surface_points = centers[mask], surface_points[mask]
+    random_state = _take_random_state(random_state, mask)
+
+    # Generate points on the surface of unit hyper-spheres
+    directions = surface_points - centers
+    radii = norm(directions, axis=1)
+    unit_points = _sample_unit_ball(mask.sum(), centers.shape[1], random_state).astype(
+        points.dtype, copy=False
+    )
+
+    # Parallel unit vectors
+    parallel_unit_vectors = directions / radii[:, None]
+
+    # Truncation, deformation and translation
+    if np.ndim(truncation_factor) == 0:
+        points[mask] = centers + radii[:, None] * _truncate_and_deform(
+            unit_points, parallel_unit_vectors, truncation_factor, deformation_factor
+        )
+        return points
+    for geometry_points, geometry_truncation, geometry_deformation in zip(
+        points, truncation_factor, deformation_factor
+    ):
+        geometry_points[mask] = centers + radii[:, None] * _truncate_and_deform(
+            unit_points,
+            parallel_unit_vectors,
+            geometry_truncation,
+            geometry_deformation,
+        )
+
+    return points
+
+
+def _make_mixed_geometric_samples_batch(
+    centers,
+    surface_points,
+    n_continuous,
+    n_encoded,
+    categorical_penalty,
+    truncation_factor,
+    deformation_factor,
+    random_state,
+):
+    """A support function that returns artificial points inside the geometric
+    regions defined by pairs of center and surface points, when categorical
+    features are stored as integer codes.
+
+    The geometric regions are the ones of :func:`_make_geometric_samples_batch`
+    applied to the one-hot encoded data, where each mismatched categorical
+    feature adds ``categorical_penalty`` to the squared distance. The one-hot
+    encoded coordinates are never materialized: a uniformly distributed point
+    only depends on them through its projection on the direction of the surface
+    point and through its norm, which are drawn from a normal and a chi-squared
+    distribution, respectively. Only the continuous features are generated.
+
+    Parameters
+    ----------
+    centers : ndarray, shape (n_samples, n_features)
+        Center points of the geometric regions. The categorical features are
+        placed after the continuous features.
+
+    surface_points : ndarray, shape (n_samples, n_features)
+        Surface points of the geometric regions.
+
+    n_continuous : int
+        Number of continuous features.
+
+    n_encoded : int
+        Number of one-hot encoded features, i.e. the total number of categories.
+
+    categorical_penalty : float
+        Squared distance added for each mismatched categorical feature.
+
+    truncation_factor : float or ndarray, shape (n_geometries,)
+        The type of truncation. The values should be in the [-1.0, 1.0] range.
+
+    deformation_factor : float or ndarray, shape (n_geometries,)
+        The type of geometry. The values should be in the [0.0, 1.0] range.
+
+    random_state : RandomState, Generator or _RowStreams instance
+        Control the randomization of the algorithm.
+
+    Returns
+    -------
+    points : ndarray, shape (n_samples, n_features) or \
+            (n_geometries, n_samples, n_features)
+        Synthetically generated samples. The categorical features are copied
+        from the centers. If the factors are arrays, the samples of each
+        geometry are generated from the same random numbers.
+
+    """
+    points = np.array(centers, dtype=_float_dtype(centers.dtype))
+    if np.ndim(truncation_factor) > 0:
+        points = np.repeat(points[None], len(truncation_factor), axis=0)
+
+    # Zero radius case
+    directions = surface_points[:, :n_continuous] - centers[:, :n_continuous]
+    mismatches = (centers[:, n_continuous:] != surface_points[:, n_continuous:]).sum(
+        axis=1
+    )
+    categorical_radii = np.sqrt(categorical_penalty * mismatches).astype(points.dtype)
+    radii = np.sqrt(norm(directions, axis=1) ** 2 + categorical_radii**2)
+    mask = radii > 0
+    if not mask.any():
+        return points
+    directions, categorical_radii, radii = (
+        directions[mask],
+        categorical_radii[mask],
+        radii[mask],
+    )
+    random_state = _take_random_state(random_state, mask)
+
+    # Generate points on the surface of unit hyper-spheres
+    n_samples, n_features = mask.sum(), n_continuous + n_encoded
+    normal_samples = random_state.normal(size=(n_samples, n_continuous))
+    normal_samples_parallel = random_state.normal(size=n_samples)
+    chisquare_samples = (
+        random_state.chisquare(n_encoded - 1, size=n_samples)
+        if n_encoded > 1
+        else np.zeros(n_samples)
+    )
+    norms = np.sqrt(
+        (normal_samples**2).sum(axis=1)
+        + normal_samples_parallel**2
+        + chisquare_samples
+    )
+    scales = random_state.uniform(size=n_samples) ** (1 / n_features) / norms
+    scales, normal_samples, normal_samples_parallel = (
+        scales.astype(points.dtype),
+        normal_samples.astype(points.dtype),
+        normal_samples_parallel.astype(points.dtype),
+    )
+    unit_points = scales[:, None] * normal_samples
+
+    # Parallel unit vectors
+    parallel_unit_vectors = directions / radii[:, None]
+
+    # Projections, including the one-hot encoded coordinates
+    dots = np.einsum("ij,ij->i", unit_points, parallel_unit_vectors) + (
+        scales * normal_samples_parallel * categorical_radii / radii
+    )
+
+    # Truncation, deformation and translation
+    centers = centers[mask, :n_continuous]
+    if np.ndim(truncation_factor) == 0:
+        points[mask, :n_continuous] = centers + radii[:, None] * _truncate_and_deform(
+            unit_points,
+            parallel_unit_vectors,
+            truncation_factor,
+            deformation_factor,
+            dots,
+        )
+        return points
+    for geometry_points, geometry_truncation, geometry_deformation in zip(
+        points, truncation_factor, deformation_factor
+    ):
+        geometry_points[mask, :n_continuous] = centers + radii[
+            :, None
+        ] * _truncate_and_deform(
+            unit_points,
+            parallel_unit_vectors,
+            geometry_truncation,
+            geometry_deformation,
+            dots,
+        )
+
+    return points
+
+
+def _nbytes(X):
+    """Returns the size in bytes of a dense or sparse array."""
+    if sparse.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+@lru_cache(maxsize=None)
+def _flops_per_second(size=256, n_repeats=4):
+    """Measures the floating point operations per second of matrix products,
+    used to convert the estimated operations to time. It is measured once, with
+    the threads of the BLAS."""
+    a = np.random.RandomState(0).random_sample((size, size))
+    a @ a
+    start = perf_counter()
+    for _ in range(n_repeats):
+        a @ a
+    return 2 * n_repeats * size**3 / max(perf_counter() - start, 1e-9)
+
+
+def _thread_speedup(n_jobs, costs):
+    """Returns the speedup of searching the nearest neighbors of several indexes,
+    with the given operations, in ``n_jobs`` threads. The threads are limited by
+    the number of indexes and by the CPUs left by the threads of the BLAS, the
+    most expensive index is searched by a single thread and the serial fraction
+    of the queries follows Amdahl's law."""
+    if not costs or sum(costs) == 0:
+        return 1.0
+    blas_threads = max(
+        [
+            info["num_threads"]
+            for info in threadpool_info()
+            if info["user_api"] == "blas"
+        ],
+        default=1,
+    )
+    n_threads = min(
+        effective_n_jobs(n_jobs), len(costs), max(cpu_count() // blas_threads, 1)
+    )
+    speedup = 1 / (SERIAL_FRACTION + (1 - SERIAL_FRACTION) / n_threads)
+    return min(speedup, sum(costs) / max(costs))
+
+
+def _search_cost(
+    nn, n_fit, n_queries, n_neighbors, n_features, row_bytes, working_memory
+):
+    """Estimates the floating point operations of fitting a nearest neighbors
+    index on ``n_fit`` samples and querying it, the bytes of the index and the
+    bytes of the temporary arrays of the queries, which are searched in blocks
+    of at most ``working_memory`` bytes."""
+    n_fit = max(n_fit, 1)
+    itemsize = np.dtype(getattr(nn, "dtype", np.float64)).itemsize
+
+    # The distances cost 2 operations per feature, plus the selection of the
+    # nearest candidates
+    if isinstance(nn, ClusterNeighbors):
+        # The mini-batch k-means converges in about two passes over the data,
+        # after the steps of its initializations
+        n_clusters = max(min(nn.n_clusters or int(np.sqrt(n_fit)), n_fit), 1)
+        n_candidates = min(nn.n_probe, n_clusters) * n_fit / n_clusters
+        n_steps = 2 * n_fit / nn.batch_size + 30
+        flops = n_steps * (
+            2 * nn.batch_size * n_clusters * n_features + KMEANS_STEP_COST
+        )
+        flops += n_queries * (n_clusters + n_candidates) * (2 * n_features + PROBE_COST)
+        block_bytes = 8 * n_queries * (n_clusters + 2 * n_fit / n_clusters)
+    elif isinstance(nn, RandomProjectionNeighbors):
+        depth = np.log2(max(n_fit / nn.leaf_size, 1))
+        n_candidates = 2 * nn.n_trees * nn.leaf_size
+        flops = (
+            2
+            * n_features
+            * (nn.n_trees * depth * (n_fit + n_queries) + n_queries * n_candidates)
+        )
+        block_bytes = 8 * n_queries * (nn.n_trees * depth + 6 * n_candidates)
+    elif isinstance(nn, BruteForceNeighbors):
+        flops = n_queries * n_fit * (2 * n_features + SELECTION_COST)
+        block_bytes = (itemsize + 1) * min(n_queries, BLOCK_N_ROWS) * n_fit
+    elif n_features > TREE_MAX_FEATURES:
+        # The brute force search of scikit-learn uses small fixed blocks
+        flops = n_queries * n_fit * (2 * n_features + SELECTION_COST)
+        block_bytes = 8 * min(n_queries, 256) * min(n_fit, 256)
+    else:
+        # The samples visited by the trees grow exponentially with the number of
+        # features, which scikit-learn avoids above TREE_MAX_FEATURES
+        n_visited = min(
+            n_fit,
+            n_neighbors * np.log2(n_fit + 1) * 2 ** (TREE_VISIT_EXPONENT * n_features),
+        )
+        flops = (
+            2
+            * n_features
+            * (n_fit * np.log2(n_fit + 1) + TREE_VISIT_COST * n_queries * n_visited)
+        )
+        block_bytes = 8 * n_queries * n_neighbors
+    block_bytes = min(block_bytes, working_memory) + min(
+        8 * n_queries * (n_features + 2 * n_neighbors), working_memory
+    )
+    return flops, n_fit * (row_bytes * itemsize / 8 + 8), block_bytes
+
+
+def _gather_rows(X, indices):
+    """Returns the rows of X selected by a 2D array of indices as a dense array
+    of shape (*indices.shape, n_features)."""
+    return _toarray(X[indices.ravel()]).reshape(*indices.shape, X.shape[1])
+
+
+def _make_categorical_samples_batch(
+    X_new, neighbors_categorical, categories_size, random_state, permute_ties=False
+):
     """A support function that populates categorical features' values
-    in an artificial point.
+    in artificial points, using the majority vote of their nearest neighbors.
 
     Parameters
     ----------
-    X_new : ndarray, shape (n_features, )
-        Artificial point to populate categorical features.
+    X_new : {ndarray, sparse matrix}, shape (n_samples, n_features)
+        Artificial points to populate categorical features.
 
-    all_neighbors: ndarray, shape (n_features, k_neighbors)
-        Nearest neighbors used for majority voting.
+    neighbors_categorical : ndarray, shape (n_samples, n_neighbors, n_encoded)
+        One-hot encoded categorical features of the nearest neighbors used for
+        majority voting.
 
-    categories_size: list
-        Used to tell apart one-hot encoded features.
+    categories_size : list
+        Used to tell apart one-hot encoded features. The first element is the
+        number of continuous features.
 
-    random_state : int, RandomState instance or None
+    random_state : RandomState instance
         Control the randomization of the algorithm. Used
         for tie breaking when there are two majority values.
 
+    permute_ties : bool, default=False
+        If ``True``, each tie is broken by a permutation of the majority values
+        drawn from ``random_state``, sample by sample, as in previous versions.
+        Otherwise, ties are broken by a single uniform draw
+        per encoded feature, for all samples at once.
+
     Returns
     -------
-    point : ndarray, shape (n_features, )
-            Synthetically generated sample.
+    X_new : {ndarray, sparse matrix}, shape (n_samples, n_features)
+        Synthetically generated samples.
 
     """
-    for start_idx, end_idx in zip(
-        np.cumsum(categories_size)[:-1], np.cumsum(categories_size)[1:]
-    ):
-        col_maxs = all_neighbors[:, start_idx:end_idx].sum(axis=0)
-        # tie breaking argmax
-        is_max = np.isclose(col_maxs, col_maxs.max(axis=0))
-        max_idxs = random_state.permutation(np.argwhere(is_max))
-        col_sels = max_idxs[0]
+    n_continuous, sizes = categories_size[0], categories_size[1:]
+    starts = np.cumsum(categories_size)[:-1] - n_continuous
+    col_sums = neighbors_categorical.sum(axis=1)
+
+    # Majority values of each one-hot encoded block
+    col_maxs = np.repeat(np.maximum.reduceat(col_sums, starts, axis=1), sizes, axis=1)
+    is_max = np.isclose(col_sums, col_maxs)
+
+    # tie breaking argmax
+    if permute_ties:
+        # Rank of each majority value within its block
+        n_max = np.add.reduceat(is_max, starts, axis=1)
+        ranks = np.cumsum(is_max, axis=1)
+        ranks -= np.repeat(ranks[:, starts] - is_max[:, starts], sizes, axis=1) + 1
+        selected_ranks = np.zeros_like(n_max)
+        for row, block in np.argwhere(n_max > 1):
+            selected_ranks[row, block] = random_state.permutation(n_max[row, block])[0]
+        selected = is_max & (ranks == np.repeat(selected_ranks, sizes, axis=1))
+    else:
+        scores = np.where(is_max, random_state.uniform(size=col_sums.shape), -1.0)
+        max_scores = np.repeat(
+            np.maximum.reduceat(scores, starts, axis=1), sizes, axis=1
+        )
+        selected = scores == max_scores
+    if sparse.issparse(X_new):
+        X_new = sparse.hstack(
+            [X_new[:, :n_continuous], sparse.csr_matrix(selected)], format="csr"
+        )
+    else:
+        X_new[:, n_continuous:] = selected
+
+    return X_new
+
+
+def _make_ordinal_samples_batch(
+    X_new, neighbors_categorical, n_continuous, random_state
+):
+    """A support function that populates categorical features' values
+    in artificial points, when categorical features are stored as integer codes.
+
+    Parameters
+    ----------
+    X_new : {ndarray, sparse matrix}, shape (n_samples, n_features)
+        Artificial points to populate categorical features.
+
+    neighbors_categorical : ndarray, shape (n_samples, n_neighbors, n_categorical)
+        Categorical features' codes of the nearest neighbors used for majority
+        voting.
+
+    n_continuous : int
+        Number of continuous features, placed before the categorical features.
+
+    random_state : RandomState instance
+        Control the randomization of the algorithm. Used
+        for tie breaking when there are two majority values.
+
+    Returns
+    -------
+    X_new : {ndarray, sparse matrix}, shape (n_samples, n_features)
+        Synthetically generated samples.
 
-        ys = start_idx + col_sels
-        X_new[start_idx:end_idx] = 0
-        X_new[ys] = 1
+    """
+    # Frequency of each neighbor's value among the neighbors' values
+    counts = (neighbors_categorical[:, :, None] == neighbors_categorical[:, None]).sum(
+        axis=2
+    )
+    is_max = counts == counts.max(axis=1, keepdims=True)
+
+    # tie breaking argmax
+    scores = np.where(is_max, random_state.uniform(size=counts.shape), -1.0)
+    selected = np.take_along_axis(
+        neighbors_categorical, scores.argmax(axis=1)[:, None], axis=1
+    )[:, 0]
+    if sparse.issparse(X_new):
+        X_new = sparse.hstack(
+            [X_new[:, :n_continuous], sparse.csr_matrix(selected)], format="csr"
+        )
+    else:
+        X_new[:, n_continuous:] = selected
 
     return X_new
 
 
+def _alias_table(weights):
+    """A support function that returns the alias table of a discrete
+    distribution, i.e. the acceptance probabilities and the aliases of its
+    outcomes, built with Vose's method.
+
+    The deficit of each outcome with a probability below the mean is covered
+    by the current outcome above the mean, which becomes deficient in turn once
+    its surplus is exhausted. The pairing follows from the cumulative deficits
+    and surpluses, so that the table is built without a loop over the outcomes.
+
+    Parameters
+    ----------
+    weights : ndarray, shape (n_outcomes,)
+        Non-negative weights of the outcomes, with a positive sum.
+
+    Returns
+    -------
+    prob : ndarray, shape (n_outcomes,)
+        Probability of accepting each outcome, instead of its alias.
+
+    alias : ndarray, shape (n_outcomes,)
+        Alias of each outcome.
+
+    """
+    prob = weights.size * weights.astype(np.float64) / weights.sum()
+    alias = np.arange(weights.size)
+    small, large = np.flatnonzero(prob < 1), np.flatnonzero(prob >= 1)
+    if small.size == 0:
+        return np.ones_like(prob), alias
+    deficits = np.cumsum(1 - prob[small])
+    surpluses = np.cumsum(prob[large] - 1)
+
+    # Each small outcome is covered by the large outcome current at its turn
+    current = np.searchsorted(surpluses, np.hstack([0, deficits[:-1]]))
+    alias[small] = large[np.minimum(current, large.size - 1)]
+
+    # Each exhausted large outcome is covered by the next one
+    exhausted = np.searchsorted(deficits, surpluses, side="right")
+    is_exhausted = exhausted < small.size
+    is_exhausted[-1] = False
+    exhausted_large = large[is_exhausted]
+    prob[exhausted_large] = 1 - (
+        deficits[exhausted[is_exhausted]] - surpluses[is_exhausted]
+    )
+    alias[exhausted_large] = large[np.flatnonzero(is_exhausted) + 1]
+    prob[large[~is_exhausted]] = 1.0
+    return prob, alias
+
+
+class _WeightedSampler:
+    """Draws flat indices of an array of shape ``(n_rows, n_cols)``, where the
+    row is drawn with a probability proportional to its weight and the column
+    is drawn uniformly.
+
+    A ``RandomState`` draws the same indices as ``RandomState.choice`` with the
+    equivalent probabilities, from a cumulative distribution computed once. A
+    ``Generator`` draws the rows from an alias table in constant time.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of rows.
+
+    n_cols : int
+        Number of columns.
+
+    weights : ndarray, shape (n_rows,), optional
+        Weights of the rows. If not given, the rows are drawn uniformly.
+
+    """
+
+    def __init__(self, n_rows, n_cols, weights=None):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.weights = weights
+        self._cdf = None
+        self._alias_table = None
+
+    def sample(self, n_samples, random_state):
+        """Draws ``n_samples`` flat indices."""
+        if self.weights is None:
+            return random_state.choice(self.n_rows * self.n_cols, size=n_samples)
+
+        # Alias method
+        if isinstance(random_state, np.random.Generator):
+            if self._alias_table is None:
+                self._alias_table = _alias_table(self.weights)
+            prob, alias = self._alias_table
+            rows = random_state.integers(self.n_rows, size=n_samples)
+            rows = np.where(
+                random_state.random(n_samples) < prob[rows], rows, alias[rows]
+            )
+            cols = random_state.integers(self.n_cols, size=n_samples)
+            return rows * self.n_cols + cols
+
+        # Inverse transform sampling, as in RandomState.choice
+        if self._cdf is None:
+            probabilities = np.repeat(self.weights, self.n_cols) / (
+                self.weights.sum() * self.n_cols
+            )
+            self._cdf = probabilities.astype(np.float64).cumsum()
+            self._cdf /= self._cdf[-1]
+        return self._cdf.searchsorted(
+            random_state.random_sample(n_samples), side="right"
+        )
+
+
+def _mix64(z):
+    """The finalizer of the SplitMix64 generator, which maps each unsigned 64-bit
+    integer to a pseudo-random one."""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class _RowStreams:
+    """Draws random numbers of each row from its own counter-based stream, so
+    that the numbers of a row only depend on its seed and not on the rows drawn
+    along with it. It implements the methods of ``Generator`` used to generate
+    artificial samples, for arrays whose first dimension is the number of rows.
+
+    Parameters
+    ----------
+    seeds : ndarray, shape (n_rows,)
+        Unsigned 64-bit seeds of the rows.
+
+    key : int, default=0
+        Identifies independent streams of the same seeds.
+
+    """
+
+    def __init__(self, seeds, key=0):
+        self.seeds = np.asarray(seeds, dtype=np.uint64)
+        self.key = key
+        self._counter = 0
+        with np.errstate(over="ignore"):
+            self._states = _mix64(
+                self.seeds + np.uint64(key + 1) * np.uint64(0x9E3779B97F4A7C15)
+            )
+
+    def take(self, mask):
+        """Returns the streams of the rows selected by a boolean mask, continuing
+        from the current position of the streams."""
+        streams = _RowStreams(self.seeds[mask], self.key)
+        streams._counter = self._counter
+        return streams
+
+    def random(self, size):
+        """Uniformly distributed numbers in the open interval (0, 1)."""
+        shape = (size,) if isinstance(size, Integral) else tuple(size)
+        width = int(np.prod(shape[1:]))
+        counters = np.arange(
+            self._counter + 1, self._counter + width + 1, dtype=np.uint64
+        )
+        self._counter += width
+        with np.errstate(over="ignore"):
+            z = _mix64(
+                self._states[:, None] + counters[None] * np.uint64(0x9E3779B97F4A7C15)
+            )
+        return (((z >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0**53).reshape(
+            shape
+        )
+
+    def uniform(self, size):
+        return self.random(size)
+
+    def standard_normal(self, size):
+        return ndtri(self.random(size))
+
+    def normal(self, size):
+        return self.standard_normal(size)
+
+    def chisquare(self, df, size):
+        return chdtri(df, self.random(size))
+
+
+def _draw_seeds(random_state, n_seeds):
+    """Draws unsigned 64-bit seeds from a RandomState or Generator instance."""
+    if isinstance(random_state, np.random.Generator):
+        return random_state.integers(2**64, size=n_seeds, dtype=np.uint64)
+    return random_state.randint(2**64, size=n_seeds, dtype=np.uint64)
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "max_bytes", "current_bytes"])
+CostEstimate = namedtuple(
+    "CostEstimate", ["n_samples_new", "n_queries", "peak_bytes", "time"]
+)
+
+
+class GeometricSMOTECache:
+    """Least recently used cache of the encoded data and nearest neighbors of
+    :class:`GeometricSMOTE`.
+
+    Instances of :class:`GeometricSMOTE` sharing a cache reuse the categorical
+    encoding and the nearest neighbors indexes fitted on the same data, as long
+    as the parameters they depend on are the same, i.e. ``categorical_features``,
+    ``categorical_encoding``, ``selection_strategy`` and ``k_neighbors``. The
+    nearest neighbors of the samples of the classes to resample are found before
+    they are stored, and reused as well. The cached entries are not modified
+    once stored: each instance searches any other nearest neighbors on its own
+    copy, so that the instances can resample concurrently. The cache is shared,
+    instead of copied, by :func:`sklearn.base.clone`, which allows the clones of
+    a cross-validation or hyperparameter search to share it. The data are
+    identified by a hash of their content.
+
+    Parameters
+    ----------
+    max_bytes : int, default=1073741824
+        Maximum size of the cache in bytes. The size of each entry is estimated
+        from the size of the encoded data, which the nearest neighbors indexes
+        also store, and of the nearest neighbors found. The least recently used
+        entries are discarded first.
+
+    Examples
+    --------
+    >>> from sklearn.datasets import make_classification
+    >>> from sklearn.base import clone
+    >>> from mlresearch.data_augmentation import GeometricSMOTE, GeometricSMOTECache
+    >>> X, y = make_classification(weights=[0.2, 0.8], random_state=0)
+    >>> gsmote = GeometricSMOTE(cache=GeometricSMOTECache(), random_state=0)
+    >>> X_res, y_res = gsmote.fit_resample(X, y)
+    >>> gsmote = clone(gsmote).set_params(truncation_factor=0.5)
+    >>> X_res, y_res = gsmote.fit_resample(X, y)
+    >>> gsmote.cache.cache_info()
+    CacheInfo(hits=1, misses=1, max_bytes=1073741824, current_bytes=33008)
+    """
+
+    def __init__(self, max_bytes=2**30):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the entry of a key and marks it as the most recently used, or
+        ``None`` if the key is not in the cache."""
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, n_bytes):
+        """Stores an entry of ``n_bytes`` bytes, discarding the least recently
+        used entries if the cache is full. Entries larger than the cache are not
+        stored."""
+        if n_bytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, n_bytes)
+            self._current_bytes += n_bytes
+            while self._current_bytes > self.max_bytes:
+                self._current_bytes -= self._entries.popitem(last=False)[1][1]
+
+    def cache_info(self):
+        """Returns the number of hits and misses, the maximum size and the
+        current size of the cache."""
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self.max_bytes, self._current_bytes
+            )
+
+    def cache_clear(self):
+        """Discards the entries and resets the statistics of the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = self._hits = self._misses = 0
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return "{}(max_bytes={})".format(type(self).__name__, self.max_bytes)
+
+
+class SyntheticPlan:
+    """Compact representation of the artificial samples drawn by
+    :class:`GeometricSMOTE`, which generates them on demand.
+
+    Each artificial sample is determined by the index of its center point, the
+    index of its surface point and the seed of its random numbers. The radius
+    and orientation of its geometric region follow from the center and surface
+    points, and its position within the region from the random numbers, which
+    only depend on its seed. Therefore, any subset of samples can be generated
+    in any order with the same result. The plan is returned by
+    :meth:`GeometricSMOTE.plan`. Its arrays can be stored along with the
+    original data, and the plan rebuilt from them and an estimator fitted on
+    the same data with the same parameters.
+
+    Parameters
+    ----------
+    sampler : GeometricSMOTE
+        The fitted estimator that generates the samples. Its current
+        ``truncation_factor`` and ``deformation_factor`` are used.
+
+    y : ndarray of shape (n_samples_new,)
+        The label of each artificial sample.
+
+    center_indices : ndarray of shape (n_samples_new,)
+        The index of the center point of each artificial sample in the fitted
+        data.
+
+    surface_indices : ndarray of shape (n_samples_new,)
+        The index of the surface point of each artificial sample in the fitted
+        data.
+
+    seeds : ndarray of shape (n_samples_new,)
+        The seed of the random numbers of each artificial sample, as unsigned
+        64-bit integers.
+
+    Examples
+    --------
+    >>> from sklearn.datasets import make_classification
+    >>> from mlresearch.data_augmentation import GeometricSMOTE
+    >>> X, y = make_classification(n_features=200, weights=[0.2, 0.8], random_state=0)
+    >>> plan = GeometricSMOTE(random_state=0).fit(X, y).plan()
+    >>> len(plan)
+    58
+    >>> X_new, y_new = plan[:10]
+    >>> X_new.shape
+    (10, 200)
+    """
+
+    def __init__(self, sampler, y, center_indices, surface_indices, seeds):
+        self.sampler = sampler
+        self.y = y
+        self.center_indices = center_indices
+        self.surface_indices = surface_indices
+        self.seeds = seeds
+
+    def __len__(self):
+        return self.y.size
+
+    def __getitem__(self, rows):
+        return self.materialize(rows)
+
+    @property
+    def nbytes(self):
+        """Size in bytes of the arrays of the plan."""
+        return sum(
+            array.nbytes
+            for array in (self.y, self.center_indices, self.surface_indices, self.seeds)
+        )
+
+    def materialize(self, rows=None):
+        """Generate artificial samples of the plan.
+
+        Parameters
+        ----------
+        rows : slice, int or array-like, default=None
+            The positions of the artificial samples in the plan, as accepted by
+            the indexing of a numpy array. If ``None``, all samples are generated.
+
+        Returns
+        -------
+        X_new : {array-like, sparse matrix} of shape (n_rows, n_features)
+            The artificial samples.
+
+        y_new : array-like of shape (n_rows,)
+            The corresponding label of `X_new`.
+        """
+        rows = np.atleast_1d(
+            np.arange(len(self))[slice(None) if rows is None else rows]
+        )
+        y_new = self.y[rows]
+        X_new = self.sampler._materialize(
+            y_new,
+            self.center_indices[rows],
+            self.surface_indices[rows],
+            self.seeds[rows],
+        )
+        return self.sampler._transform_output(
+            self.sampler._postprocess(X_new, original=False), y_new
+        )
+
+    def iter_batches(self, batch_size=None):
+        """Generate the artificial samples of the plan in batches.
+
+        Parameters
+        ----------
+        batch_size : int, default=None
+            Number of samples of each batch. If ``None``, it is determined by the
+            ``working_memory`` of the estimator.
+
+        Yields
+        ------
+        X_new : {array-like, sparse matrix} of shape (n_rows, n_features)
+            The artificial samples of the batch.
+
+        y_new : array-like of shape (n_rows,)
+            The corresponding label of `X_new`.
+        """
+        if batch_size is None:
+            batch_size = get_chunk_n_rows(
+                row_bytes=8 * 4 * self.sampler.n_features_in_,
+                working_memory=self.sampler.working_memory,
+            )
+        for batch in gen_batches(len(self), batch_size):
+            yield self.materialize(batch)
+
+
 @Substitution(
     sampling_strategy=BaseOverSampler._sampling_strategy_docstring,
     random_state=_random_state_docstring,
@@ -180,10 +1151,79 @@ class GeometricSMOTE(BaseOverSampler):
         If ``int``, number of nearest neighbours to use when synthetic
         samples are constructed for the minority method.  If object, an estimator
         that inherits from :class:`sklearn.neighbors.base.KNeighborsMixin` that
-        will be used to find the k_neighbors.
+        will be used to find the k_neighbors. Pass a
+        :class:`~mlresearch.data_augmentation.BruteForceNeighbors` object to use
+        an exact search based on matrix products, or a
+        :class:`~mlresearch.data_augmentation.RandomProjectionNeighbors` or
+        :class:`~mlresearch.data_augmentation.ClusterNeighbors` object to use an
+        approximate search. Either is then also used to find the nearest
+        neighbor of the remaining classes. Its ``n_neighbors`` includes the
+        selected observation itself.
+
+    metric : str or callable, optional (default='euclidean')
+        The distance metric used to find the nearest neighbors and to select the
+        closest surface point of the combined strategy. Can be one of
+        ``'euclidean'``, ``'l2'``, ``'manhattan'``, ``'l1'``, ``'cityblock'``,
+        ``'cosine'``, a callable returning the distance between two samples, or
+        ``'precomputed'``. In the latter case, the distances between the samples
+        are passed to :meth:`fit` as ``distances``, either as a matrix or as a
+        sparse graph of nearest neighbors, and sliced per class instead of
+        searching the data. The geometric regions are not affected by the metric.
+        Requires an ``int`` ``k_neighbors`` unless it is ``'euclidean'``.
+
+    categorical_encoding : str, optional (default='onehot')
+        The encoding of the categorical features used to compute distances and
+        generate samples, with the following options:
+
+        - ``'onehot'``: categorical features are one-hot encoded, with the
+          non-null entries set to half the median of the standard deviations
+          of the continuous features of the minority class;
+        - ``'ordinal'``: categorical features are kept as integer codes. The
+          nearest neighbors are found with a brute force search over the
+          equivalent distance and the geometric regions are the same as in the
+          one-hot encoded space, without materializing it. Recommended for
+          categorical features with many categories. Requires an ``int``
+          ``k_neighbors``.
+
+    synthetic_only : bool, optional (default=False)
+        If ``True``, :meth:`fit_resample` returns only the generated samples,
+        along with their provenance as a third output: an array of shape
+        ``(n_samples_new, 2)`` with the indices of the center and surface points
+        of each generated sample in the input data.
+
+    random_streams : bool, optional (default=False)
+        If ``True``, the samples of each class are generated in blocks, each one
+        drawing from its own counter-based random stream (``Philox``) seeded from
+        ``random_state``. The blocks are generated in parallel, using ``n_jobs``
+        threads, and the generated samples do not depend on the number of threads
+        or on the chunks of :meth:`iter_resample`. If ``False``, the random numbers
+        are drawn sequentially from ``random_state_``, in the same order as
+        previous versions. The ties of the majority vote of one-hot encoded
+        categorical features are also broken in that order, while the
+        ``'ordinal'`` encoding breaks them with its own draws.
+
+    cache : GeometricSMOTECache, optional (default=None)
+        Cache of the encoded data and nearest neighbors, reused when the same
+        data are resampled by instances that differ only in the generation
+        parameters. If ``None``, no caching is done.
+
+    working_memory : int, optional (default=None)
+        The sought maximum memory in MiB for the temporary arrays of the nearest
+        neighbors search and of the generation of samples, which are processed
+        in blocks of samples. If ``None``, scikit-learn's ``working_memory``
+        configuration is used.
+
+    buffer_size : int, optional (default=None)
+        The maximum number of artificial samples kept by :meth:`partial_fit`. The
+        number of samples of each class in ``sampling_strategy_`` is scaled down
+        proportionally to fit in the buffer. If ``None``, the buffer holds the
+        number of samples of ``sampling_strategy_``.
 
     n_jobs : int, optional (default=1)
-        The number of threads to open if possible.
+        The number of threads to open if possible. The nearest neighbors of the
+        classes to resample are searched in parallel, while the samples are
+        generated one class after the other. The generated samples do not depend
+        on the number of threads.
 
     Attributes
     ----------
@@ -206,6 +1246,15 @@ class GeometricSMOTE(BaseOverSampler):
         np.random. If `random_state` is an int, it is a RandomState instance seeded with
         seed. If `random_state` is already a RandomState instance, it is the same
         object.
+    plan_ : SyntheticPlan
+        The plan of the artificial samples in the buffer kept by
+        :meth:`partial_fit`. Only present after calling :meth:`partial_fit`.
+    X_buffer_ : {{ndarray, sparse matrix}} of shape (n_samples_buffer, n_features)
+        The artificial samples in the buffer kept by :meth:`partial_fit`. Only
+        present after calling :meth:`partial_fit`.
+    y_buffer_ : ndarray of shape (n_samples_buffer,)
+        The labels of the artificial samples in the buffer. Only present after
+        calling :meth:`partial_fit`.
 
     Notes
     -----
@@ -214,6 +1263,12 @@ class GeometricSMOTE(BaseOverSampler):
     Supports multi-class resampling. A one-vs.-rest scheme is used as
     originally proposed in [2]_.
 
+    Floating point data are processed in their own precision, while other
+    numerical data are processed in the smallest floating point precision that
+    represents them exactly (e.g. ``float32`` for ``int16`` data). The samples
+    generated from ``float32`` data match the ones generated from the same data
+    in ``float64`` up to a relative tolerance of about ``1e-5``.
+
     References
     ----------
 
@@ -251,7 +1306,14 @@ class GeometricSMOTE(BaseOverSampler):
         deformation_factor=0.0,
         selection_strategy="combined",
         k_neighbors=5,
+        metric="euclidean",
         categorical_features=None,
+        categorical_encoding="onehot",
+        synthetic_only=False,
+        random_streams=False,
+        cache=None,
+        working_memory=None,
+        buffer_size=None,
         n_jobs=1,
     ):
         super(GeometricSMOTE, self).__init__(sampling_strategy=sampling_strategy)
@@ -260,7 +1322,14 @@ class GeometricSMOTE(BaseOverSampler):
         self.deformation_factor = deformation_factor
         self.selection_strategy = selection_strategy
         self.k_neighbors = k_neighbors
+        self.metric = metric
         self.categorical_features = categorical_features
+        self.categorical_encoding = categorical_encoding
+        self.synthetic_only = synthetic_only
+        self.random_streams = random_streams
+        self.cache = cache
+        self.working_memory = working_memory
+        self.buffer_size = buffer_size
         self.n_jobs = n_jobs
 
     def _validate_estimator(self):
@@ -279,25 +1348,84 @@ class GeometricSMOTE(BaseOverSampler):
                 error_msg.format(SELECTION_STRATEGY, self.selection_strategy)
             )
 
-        # Create nearest neighbors object for positive class
-        if self.selection_strategy in ("minority", "combined"):
-            self.nns_pos_ = check_neighbors_object(
-                "nns_positive", self.k_neighbors, additional_neighbor=1
-            )
-            self.nns_pos_.set_params(n_jobs=self.n_jobs)
+        self._validate_metric()
+
+        # Mixed distance over categorical features encoded as integer codes
+        if self._ordinal:
+            if not isinstance(self.k_neighbors, Integral):
+                raise ValueError(
+                    "When categorical_encoding='ordinal', k_neighbors must be an "
+                    "int. Got {} instead.".format(self.k_neighbors)
+                )
+            nn_params = dict(
+                n_continuous=self.continuous_features_.size,
+                categorical_penalty=self.median_std_**2 / 2,
+            )
+
+        # Create nearest neighbors object for positive class
+        if self.selection_strategy in ("minority", "combined"):
+            self.nns_pos_ = (
+                _MixedNeighbors(n_neighbors=self.k_neighbors + 1, **nn_params)
+                if self._ordinal
+                else check_neighbors_object(
+                    "nns_positive", self.k_neighbors, additional_neighbor=1
+                )
+            )
+            self.nns_pos_.set_params(n_jobs=self.n_jobs)
+            if self.metric != "euclidean":
+                self.nns_pos_.set_params(metric=self.metric)
 
         # Create nearest neighbors object for negative class
         if self.selection_strategy in ("majority", "combined"):
-            self.nn_neg_ = check_neighbors_object("nn_negative", nn_object=1)
+            if self._ordinal:
+                self.nn_neg_ = _MixedNeighbors(n_neighbors=1, **nn_params)
+            elif isinstance(
+                self.k_neighbors,
+                (BruteForceNeighbors, ClusterNeighbors, RandomProjectionNeighbors),
+            ):
+                self.nn_neg_ = clone(self.k_neighbors).set_params(n_neighbors=1)
+            else:
+                self.nn_neg_ = check_neighbors_object("nn_negative", nn_object=1)
             self.nn_neg_.set_params(n_jobs=self.n_jobs)
+            if self.metric != "euclidean":
+                self.nn_neg_.set_params(metric=self.metric)
+
+    def _validate_metric(self):
+        """Checks that the metric is supported along with the remaining
+        parameters."""
+        if not (callable(self.metric) or self.metric in METRIC):
+            raise ValueError(
+                "Unknown metric for Geometric SMOTE algorithm. Choices are {} or a "
+                "callable. Got {} instead.".format(METRIC, self.metric)
+            )
+        if self.metric != "euclidean":
+            if not isinstance(self.k_neighbors, Integral):
+                raise ValueError(
+                    "When metric is not 'euclidean', k_neighbors must be an int. "
+                    "Got {} instead.".format(self.k_neighbors)
+                )
+            if self._ordinal:
+                raise ValueError(
+                    "categorical_encoding='ordinal' requires metric='euclidean'."
+                )
 
     def _validate_categorical(self):
         """Create the necessary attributes for Geometric SMOTE
         with categorical features"""
 
+        self._ordinal = False
         if self.categorical_features is None:
             return self
 
+        if self.categorical_encoding not in CATEGORICAL_ENCODING:
+            raise ValueError(
+                "Unknown categorical_encoding for Geometric SMOTE algorithm. "
+                "Choices are {}. Got {} instead.".format(
+                    CATEGORICAL_ENCODING, self.categorical_encoding
+                )
+            )
+        self._ordinal = self.categorical_encoding == "ordinal"
+
         categorical_features = np.asarray(self.categorical_features)
         if categorical_features.dtype.name == "bool":
             self.categorical_features_ = np.flatnonzero(categorical_features)
@@ -324,19 +1452,25 @@ class GeometricSMOTE(BaseOverSampler):
             )
         return self
 
-    def _check_X_y(self, X, y):
+    def _check_X_y(self, X, y, reset=True):
         """Overwrite the checking to let pass some string for categorical
         features.
         """
         y, binarize_y = check_target_type(y, indicate_one_vs_all=True)
         X, y = self._validate_data(
-            X, y, reset=True, dtype=None, accept_sparse=["csr", "csc"]
+            X, y, reset=reset, dtype=None, accept_sparse=["csr", "csc"]
         )
 
         return X, y, binarize_y
 
     def _make_geometric_samples(
-        self, X, y, pos_class_label, n_samples, sample_weight=None
+        self,
+        X,
+        y,
+        pos_class_label,
+        n_samples,
+        random_state=None,
+        out=None,
     ):
         """A support function that returns an artificials samples inside
         the geometric region defined by nearest neighbors.
@@ -344,163 +1478,410 @@ class GeometricSMOTE(BaseOverSampler):
         Parameters
         ----------
         X : array-like, shape (n_samples, n_features)
-            Matrix containing the data which have to be sampled.
+            Matrix containing the data which have to be sampled, as returned by
+            :meth:`_with_nonnull_categorical`.
         y : array-like, shape (n_samples, )
             Corresponding label for each sample in X.
         pos_class_label : str or int
             The minority class (positive class) target value.
         n_samples : int
             The number of samples to generate.
-        sample_weight : 1-D array-like, optional
-            The probabilities associated with each entry in a.
-            If not given, the sample assumes a uniform distribution over all
-            entries.
+        random_state : RandomState or Generator instance, optional
+            Control the randomization of the algorithm. If not given, the
+            ``random_state_`` attribute is used.
+        out : ndarray, shape (n_samples, n_features_in_), optional
+            Dense array, in the format of the input data, in which the samples
+            are written. The samples are converted one chunk at a time, unless
+            they are written in place. The categorical features are left to
+            :meth:`_make_categorical_samples_chunked`.
 
         Returns
         -------
         X_new : ndarray, shape (n_samples_new, n_features)
-            Synthetically generated samples.
+            Synthetically generated samples. It is ``out`` when it is given.
         y_new : ndarray, shape (n_samples_new, )
             Target values for synthetic samples.
+        neighbors_indices : ndarray, shape (n_samples_new, n_neighbors) or None
+            Indices of the nearest neighbors of the center of each synthetic
+            sample. It is ``None`` when no samples are generated.
+        provenance : ndarray, shape (n_samples_new, 2)
+            Indices of the center and surface points of each synthetic sample.
 
         """
 
         # Return zero new samples
         if n_samples == 0:
+            if out is not None:
+                X_new = out
+            elif self._issparse:
+                X_new = sparse.csr_matrix((0, X.shape[1]), dtype=X.dtype)
+            else:
+                X_new = np.array([], dtype=X.dtype).reshape(0, X.shape[1])
             return (
-                np.array([], dtype=X.dtype).reshape(0, X.shape[1]),
+                X_new,
                 np.array([], dtype=y.dtype),
-                np.array([], dtype=X.dtype),
+                None,
+                np.empty((0, 2), dtype=np.intp),
             )
 
-        # Select positive class samples
-        X_pos = X[y == pos_class_label]
-        if sample_weight is not None:
-            sample_weight_pos = (
-                sample_weight[y == pos_class_label]
-                if sample_weight[y == pos_class_label].sum() != 0
-                else None
+        if random_state is None:
+            random_state = self.random_state_
+        center_indices, surface_candidates, neighbors_indices = self._select_samples(
+            y, pos_class_label, n_samples, random_state
+        )
+
+        # Generate new samples
+        if out is None or (
+            self.categorical_features is None and out.dtype == X.dtype == self._X_dtype
+        ):
+            X_new, surface_indices = self._make_geometric_samples_chunked(
+                X, center_indices, surface_candidates, random_state, out=out
+            )
+        else:
+            X_new, surface_indices = out, surface_candidates[0].copy()
+            n_continuous = self.continuous_features_.size
+            chunk_n_rows = get_chunk_n_rows(
+                row_bytes=8 * X.shape[1] * (len(surface_candidates) + 4),
+                max_n_rows=n_samples,
+                working_memory=self.working_memory,
             )
+            for chunk in gen_batches(n_samples, chunk_n_rows):
+                X_chunk, surface_indices[chunk] = self._make_geometric_samples_chunked(
+                    X,
+                    center_indices[chunk],
+                    [indices[chunk] for indices in surface_candidates],
+                    random_state,
+                )
+                if self.categorical_features is None:
+                    out[chunk] = self._postprocess(X_chunk, original=False)
+                else:
+                    out[chunk, self.continuous_features_] = X_chunk[
+                        :, :n_continuous
+                    ].astype(self._X_dtype)
+
+        # Create new samples for target variable
+        y_new = np.array([pos_class_label] * n_samples)
+
+        provenance = np.column_stack([center_indices, surface_indices])
+        return X_new, y_new, neighbors_indices, provenance
+
+    def _select_samples(self, y, pos_class_label, n_samples, random_state):
+        """Selects the center and surface points of the artificial samples of a
+        class. Returns the indices of the centers, the indices of the candidate
+        surface points and the indices of the nearest neighbors of the centers."""
+
+        # Select positive class samples
+        pos_indices = self._class_neighbors.class_indices_[pos_class_label]
+        self._check_selection_strategy(y, pos_class_label)
+
+        # The centers are drawn first, so that only their neighbors are queried
+        if self.selection_strategy_ in ("minority", "combined"):
+            n_neighbors = self._class_neighbors.n_neighbors_pos
         else:
-            sample_weight_pos = None
+            n_neighbors = 1
+        samples_indices = self._weighted_sampler(pos_class_label, n_neighbors).sample(
+            n_samples, random_state
+        )
+        rows = np.floor_divide(samples_indices, n_neighbors)
+        cols = np.mod(samples_indices, n_neighbors)
+        points_pos, points_neg, neighbors_indices = self._center_neighbors(
+            pos_class_label, rows
+        )
 
-        # Force minority strategy if no negative class samples are present
+        # Minority strategy
+        rows_range = np.arange(rows.size)
+        if self.selection_strategy_ == "minority":
+            surface_candidates = [points_pos[rows_range, cols]]
+
+        # Majority strategy
+        elif self.selection_strategy_ == "majority":
+            surface_candidates = [points_neg[rows_range, cols]]
+
+        # Combined strategy
+        else:
+            surface_candidates = [points_pos[rows_range, cols], points_neg[:, 0]]
+
+        return pos_indices[rows], surface_candidates, neighbors_indices
+
+    def _check_selection_strategy(self, y, pos_class_label):
+        """Forces the minority strategy if no negative class samples are
+        present."""
         self.selection_strategy_ = (
-            "minority" if X.shape[0] == X_pos.shape[0] else self.selection_strategy
+            "minority"
+            if y.size == self._class_neighbors.class_indices_[pos_class_label].size
+            else self.selection_strategy
         )
 
+    def _center_neighbors(self, pos_class_label, rows):
+        """Returns the nearest neighbors of the centers of a class, given as rows
+        of the class, within the same class, of the remaining classes and both,
+        according to the selection strategy."""
+        points_pos = points_neg = None
+
         # Minority or combined strategy
         if self.selection_strategy_ in ("minority", "combined"):
-            self.nns_pos_.fit(X_pos)
-            points_pos = self.nns_pos_.kneighbors(X_pos)[1][:, 1:]
-            weight_pos = (
-                np.repeat(sample_weight_pos, self.k_neighbors)
-                / (sample_weight_pos.sum() * self.k_neighbors)
-                if sample_weight_pos is not None
-                else None
-            )
-            samples_indices = self.random_state_.choice(
-                range(0, len(points_pos.flatten())), size=n_samples, p=weight_pos
-            )
-            rows = np.floor_divide(samples_indices, points_pos.shape[1])
-            cols = np.mod(samples_indices, points_pos.shape[1])
+            points_pos = self._class_neighbors.kneighbors_pos(pos_class_label, rows)
 
         # Majority or combined strategy
         if self.selection_strategy_ in ("majority", "combined"):
-            X_neg = X[y != pos_class_label]
-            self.nn_neg_.fit(X_neg)
-            points_neg = self.nn_neg_.kneighbors(X_pos)[1]
-            weight_neg = (
-                sample_weight_pos / sample_weight_pos.sum()
-                if sample_weight_pos is not None
+            points_neg = self._class_neighbors.kneighbors_neg(pos_class_label, rows)
+
+        if self.selection_strategy_ == "minority":
+            neighbors_indices = points_pos
+        elif self.selection_strategy_ == "majority":
+            neighbors_indices = points_neg
+        else:
+            neighbors_indices = np.hstack([points_pos, points_neg])
+        return points_pos, points_neg, neighbors_indices
+
+    def _weighted_sampler(self, pos_class_label, n_neighbors):
+        """Returns the sampler of the centers of a class and their nearest
+        neighbors, weighted by the sample weights of the centers. The samplers
+        are cached, so that they are built once per class."""
+        key = (pos_class_label, n_neighbors)
+        if key not in self._weighted_samplers:
+            pos_indices = self._class_neighbors.class_indices_[pos_class_label]
+            weights = (
+                self._sample_weight[pos_indices]
+                if self._sample_weight is not None
                 else None
             )
-            if self.selection_strategy_ == "majority":
-                samples_indices = self.random_state_.choice(
-                    range(0, len(points_neg.flatten())), size=n_samples, p=weight_neg
-                )
-                rows = np.floor_divide(samples_indices, points_neg.shape[1])
-                cols = np.mod(samples_indices, points_neg.shape[1])
+            if weights is not None and weights.sum() == 0:
+                weights = None
+            self._weighted_samplers[key] = _WeightedSampler(
+                pos_indices.size, n_neighbors, weights
+            )
+        return self._weighted_samplers[key]
+
+    def _with_nonnull_categorical(self, X):
+        """Returns the data used to generate the artificial samples."""
 
         # In the case that the median std was equal to zeros, we have to
         # create non-null entry based on the encoded of OHE
-        if self.categorical_features is not None:
+        if self.categorical_features is not None and not self._ordinal:
             if math.isclose(self.median_std_, 0):
-                X[:, self.continuous_features_.size :] = self._X_categorical_encoded
-                # Select positive class samples
-                X_pos = X[y == pos_class_label]
-                if self.selection_strategy_ in ("majority", "combined"):
-                    X_neg = X[y != pos_class_label]
-
-        # Generate new samples
-        X_new = np.zeros((n_samples, X.shape[1]))
-        all_neighbors_ = []
-        for ind, (row, col) in enumerate(zip(rows, cols)):
-            # Define center point
-            center = X_pos[row]
-
-            # Minority strategy
-            if self.selection_strategy_ == "minority":
-                surface_point = X_pos[points_pos[row, col]]
-                all_neighbors = (
-                    (X_pos[points_pos[row]])
-                    if self.categorical_features is not None
-                    else None
-                )
+                n_continuous = self.continuous_features_.size
+                if self._issparse:
+                    X = sparse.hstack(
+                        [X[:, :n_continuous], self._X_categorical_encoded],
+                        format="csr",
+                    )
+                else:
+                    X = X.copy()
+                    X[:, n_continuous:] = self._X_categorical_encoded
+        return X
+
+    def _make_geometric_samples_chunked(
+        self,
+        X,
+        center_indices,
+        surface_candidates,
+        random_state,
+        out=None,
+        factors=None,
+    ):
+        """Generates the artificial samples in chunks of bounded memory. Sparse
+        data are only densified one chunk at a time and the generated chunks are
+        stacked as a CSR matrix. Dense samples are written in ``out`` when it is
+        given. Returns the samples and the indices of their surface points.
+
+        If ``factors`` is given, i.e. arrays of truncation and deformation
+        factors, the samples of each geometry are generated from the same random
+        numbers and returned in a list."""
+        truncation_factor, deformation_factor = (
+            (self.truncation_factor, self.deformation_factor)
+            if factors is None
+            else factors
+        )
+        n_geometries = np.size(truncation_factor)
+        n_samples, n_features = center_indices.size, X.shape[1]
+        chunk_n_rows = get_chunk_n_rows(
+            row_bytes=8 * n_features * (len(surface_candidates) + 2 + n_geometries),
+            max_n_rows=n_samples,
+            working_memory=self.working_memory,
+        )
+        if self._issparse:
+            X_new = [[] for _ in range(n_geometries)]
+        elif factors is not None:
+            X_new = np.empty((n_geometries, n_samples, n_features), X.dtype)
+        else:
+            X_new = np.empty((n_samples, n_features), X.dtype) if out is None else out
+        surface_indices = surface_candidates[0].copy()
+        for chunk in gen_batches(n_samples, chunk_n_rows):
+            centers = _toarray(X[center_indices[chunk]])
+            surface_points = [
+                _toarray(X[indices[chunk]]) for indices in surface_candidates
+            ]
 
-            # Majority strategy
-            elif self.selection_strategy_ == "majority":
-                surface_point = X_neg[points_neg[row, col]]
-                all_neighbors = (
-                    (X_neg[points_neg[row]])
-                    if self.categorical_features is not None
-                    else None
-                )
+            surface_points, surface_indices[chunk] = self._select_surface_points(
+                centers,
+                surface_points,
+                [indices[chunk] for indices in surface_candidates],
+                center_indices[chunk],
+            )
 
-            # Combined strategy
-            else:
-                surface_point_pos = X_pos[points_pos[row, col]]
-                surface_point_neg = X_neg[points_neg[row, 0]]
-                radius_pos = norm(center - surface_point_pos)
-                radius_neg = norm(center - surface_point_neg)
-                surface_point = (
-                    surface_point_neg if radius_pos > radius_neg else surface_point_pos
+            X_chunk = (
+                _make_mixed_geometric_samples_batch(
+                    centers,
+                    surface_points,
+                    self.continuous_features_.size,
+                    sum(cat.size for cat in self.ordinal_encoder_.categories_),
+                    self.median_std_**2 / 2,
+                    truncation_factor,
+                    deformation_factor,
+                    random_state,
                 )
-                all_neighbors = (
-                    np.vstack([X_pos[points_pos[row]], X_neg[points_neg[row]]])
-                    if self.categorical_features is not None
-                    else None
+                if self._ordinal
+                else _make_geometric_samples_batch(
+                    centers,
+                    surface_points,
+                    truncation_factor,
+                    deformation_factor,
+                    random_state,
                 )
-
-            if self.categorical_features is not None:
-                all_neighbors_.append(all_neighbors)
-
-            # Append new sample - no categorical features
-            X_new[ind] = _make_geometric_sample(
-                center,
-                surface_point,
-                self.truncation_factor,
-                self.deformation_factor,
-                self.random_state_,
             )
+            if self._issparse:
+                X_chunk = X_chunk if factors is not None else [X_chunk]
+                for X_geometry, X_geometry_chunk in zip(X_new, X_chunk):
+                    X_geometry.append(sparse.csr_matrix(X_geometry_chunk))
+            elif factors is not None:
+                X_new[:, chunk] = X_chunk
+            else:
+                X_new[chunk] = X_chunk
 
-        # Create new samples for target variable
-        y_new = np.array([pos_class_label] * len(samples_indices))
+        if self._issparse:
+            X_new = [sparse.vstack(X_geometry, format="csr") for X_geometry in X_new]
+            X_new = X_new if factors is not None else X_new[0]
+        elif factors is not None:
+            X_new = list(X_new)
+        return X_new, surface_indices
+
+    def _select_surface_points(
+        self, centers, surface_points, surface_candidates, center_indices
+    ):
+        """Returns the surface points of a chunk of centers and their indices,
+        given the candidate surface points and their indices. The combined
+        strategy selects the closest candidate."""
+        if len(surface_points) == 1:
+            return surface_points[0], surface_candidates[0]
+        surface_points_pos, surface_points_neg = surface_points
+        if self.metric == "precomputed":
+            distances = self._class_neighbors.distances_
+            distances_pos, distances_neg = (
+                np.asarray(distances[center_indices, indices]).ravel()
+                for indices in surface_candidates
+            )
+        else:
+            distances_pos = self._distances(centers, surface_points_pos)
+            distances_neg = self._distances(centers, surface_points_neg)
+        closer_neg = distances_pos > distances_neg
+        return (
+            np.where(closer_neg[:, None], surface_points_neg, surface_points_pos),
+            np.where(closer_neg, surface_candidates[1], surface_candidates[0]),
+        )
 
-        return X_new, y_new, all_neighbors_
+    def _distances(self, X1, X2):
+        """Row-wise distances between two sets of encoded samples."""
+        if not self._ordinal:
+            if self.metric != "euclidean":
+                return paired_distances(X1, X2, metric=self.metric)
+            return norm(X1 - X2, axis=1)
+        n_continuous = self.continuous_features_.size
+        squared_distances = norm(X1[:, :n_continuous] - X2[:, :n_continuous], axis=1)
+        squared_distances = squared_distances**2 + self.median_std_**2 / 2 * (
+            X1[:, n_continuous:] != X2[:, n_continuous:]
+        ).sum(axis=1)
+        return np.sqrt(squared_distances)
+
+    def _pairwise_distances(self, X1, X2):
+        """Distances between each pair of encoded samples of two sets."""
+        if not self._ordinal:
+            return pairwise_distances(X1, X2, metric=self.metric)
+        X1, X2 = _toarray(X1), _toarray(X2)
+        n_continuous = self.continuous_features_.size
+        squared_distances = euclidean_distances(
+            X1[:, :n_continuous], X2[:, :n_continuous], squared=True
+        )
+        squared_distances += (
+            self.median_std_**2
+            / 2
+            * (X1[:, None, n_continuous:] != X2[None, :, n_continuous:]).sum(axis=2)
+        )
+        return np.sqrt(squared_distances)
 
-    def _make_categorical_samples(self, X_new, y_new, categories_size, all_neighbors_):
-        for ind, all_neighbors in enumerate(all_neighbors_):
-            # Append new sample - continuous features
-            X_new[ind] = _make_categorical_sample(
-                X_new[ind], all_neighbors, categories_size, self.random_state_
+    def _make_categorical_samples(
+        self, X_new, y_new, categories_size, neighbors_categorical, random_state=None
+    ):
+        if X_new.shape[0] == 0:
+            return X_new, y_new
+        if random_state is None:
+            random_state = self.random_state_
+        if self._ordinal:
+            X_new = _make_ordinal_samples_batch(
+                X_new,
+                neighbors_categorical,
+                self.continuous_features_.size,
+                random_state,
+            )
+        else:
+            # Sequential draws break the ties in the order of previous versions
+            X_new = _make_categorical_samples_batch(
+                X_new,
+                neighbors_categorical,
+                categories_size,
+                random_state,
+                permute_ties=isinstance(random_state, np.random.RandomState),
             )
         return X_new, y_new
 
+    def _make_categorical_samples_chunked(
+        self, X, X_new, y_new, neighbors_indices, random_state, decode=False
+    ):
+        """Populates the categorical features of the artificial samples of a class
+        with the majority vote of the nearest neighbors of their centers. The
+        encoded features of the neighbors are gathered in chunks of bounded
+        memory, drawing the random numbers in the same order as a single chunk.
+
+        If ``decode`` is ``True``, ``X_new`` is a dense array in the format of
+        the input data, whose categorical features are decoded chunk by chunk.
+        """
+        X_categorical = X[:, self.continuous_features_.size :]
+        n_samples, n_neighbors = neighbors_indices.shape
+        chunk_n_rows = get_chunk_n_rows(
+            row_bytes=8 * (2 * X.shape[1] + n_neighbors * X_categorical.shape[1]),
+            max_n_rows=n_samples,
+            working_memory=self.working_memory,
+        )
+        X_chunks = []
+        for chunk in gen_batches(n_samples, chunk_n_rows):
+            if decode:
+                X_chunk = np.zeros((chunk.stop - chunk.start, X.shape[1]), X.dtype)
+            else:
+                X_chunk = X_new[chunk]
+            X_chunk, _ = self._make_categorical_samples(
+                X_chunk,
+                y_new[chunk],
+                self._categories_size,
+                _gather_rows(X_categorical, neighbors_indices[chunk]),
+                random_state,
+            )
+            if decode:
+                X_new[chunk, self.categorical_features_] = self._decode_categorical(
+                    X_chunk, original=False
+                )[:, self.categorical_features_]
+            elif self._issparse:
+                X_chunks.append(X_chunk)
+
+        # Dense chunks are views of the samples, populated in place
+        if X_chunks:
+            X_new = sparse.vstack(X_chunks, format="csr")
+        return X_new
+
     def _encode_categorical(self, X, y):
         """
         One-Hot encodes categorical features and replaces the 1 entries with the median
-        of the standard deviations divided by 2.
+        of the standard deviations divided by 2. When using the ordinal encoding,
+        categorical features are replaced by integer codes.
         """
         # compute the median of the standard deviation of the minority class
         target_stats = Counter(y)
@@ -509,6 +1890,7 @@ class GeometricSMOTE(BaseOverSampler):
         # Separate categorical features from continuous features
         X_continuous = X[:, self.continuous_features_]
         X_continuous = check_array(X_continuous, accept_sparse=["csr", "csc"])
+        X_continuous = X_continuous.astype(_float_dtype(X_continuous.dtype), copy=False)
         X_categorical = X[:, self.categorical_features_].copy()
         X_minority = X_continuous[np.flatnonzero(y == class_minority)]
 
@@ -521,12 +1903,16 @@ class GeometricSMOTE(BaseOverSampler):
             var = X_minority.var(axis=0)
         self.median_std_ = np.median(np.sqrt(var))
 
-        if X_continuous.dtype.name != "object":
-            dtype_ohe = X_continuous.dtype
-        else:
-            dtype_ohe = np.float64
+        # the input of the OrdinalEncoder needs to be dense
+        if self._ordinal:
+            self.ordinal_encoder_ = OrdinalEncoder(dtype=X_continuous.dtype)
+            X_codes = self.ordinal_encoder_.fit_transform(_toarray(X_categorical))
+            if self._issparse:
+                return sparse.hstack([X_continuous, X_codes], format="csr")
+            return np.hstack([X_continuous, X_codes])
+
         self.ohe_ = OneHotEncoder(
-            sparse_output=True, handle_unknown="ignore", dtype=dtype_ohe
+            sparse_output=True, handle_unknown="ignore", dtype=X_continuous.dtype
         )
 
         # the input of the OneHotEncoder needs to be dense
@@ -543,105 +1929,1162 @@ class GeometricSMOTE(BaseOverSampler):
         # entries will be also nullified. In this case, we store the original
         # categorical encoding which will be later used for inversing the OHE
         if math.isclose(self.median_std_, 0):
-            self._X_categorical_encoded = X_ohe.toarray()
+            self._X_categorical_encoded = (
+                X_ohe.tocsr(copy=True) if self._issparse else X_ohe.toarray()
+            )
 
         X_ohe.data = np.ones_like(X_ohe.data, dtype=X_ohe.dtype) * self.median_std_ / 2
 
         if self._issparse:
-            X_encoded = np.hstack([X_continuous.toarray(), X_ohe.toarray()])
+            X_encoded = sparse.hstack([X_continuous, X_ohe], format="csr")
         else:
             X_encoded = np.hstack([X_continuous, X_ohe.toarray()])
 
         return X_encoded
 
-    def _decode_categorical(self, X_resampled):
-        """Reverses the encoding of the categorical features to match
-        the dataset's original structure."""
-
+    def _transform_categorical(self, X):
+        """Encodes the categorical features of new samples with the fitted
+        encoders, as in :meth:`_encode_categorical`."""
+        dtype = self._class_neighbors.X_.dtype
+        X_continuous = check_array(
+            X[:, self.continuous_features_], accept_sparse=["csr", "csc"]
+        ).astype(dtype, copy=False)
+        X_categorical = _toarray(X[:, self.categorical_features_])
+        if self._ordinal:
+            X_codes = self.ordinal_encoder_.transform(X_categorical).astype(dtype)
+            if self._issparse:
+                return sparse.hstack([X_continuous, X_codes], format="csr")
+            return np.hstack([X_continuous, X_codes])
+
+        X_ohe = self.ohe_.transform(X_categorical).astype(dtype)
         if math.isclose(self.median_std_, 0):
-            X_resampled[
-                : self._X_categorical_encoded.shape[0], self.continuous_features_.size :
-            ] = self._X_categorical_encoded
-
-        X_resampled = sparse.csr_matrix(X_resampled)
+            self._X_categorical_encoded = (
+                sparse.vstack([self._X_categorical_encoded, X_ohe], format="csr")
+                if self._issparse
+                else np.vstack([self._X_categorical_encoded, X_ohe.toarray()])
+            )
+        X_ohe.data = np.ones_like(X_ohe.data, dtype=X_ohe.dtype) * self.median_std_ / 2
+        if self._issparse:
+            return sparse.hstack([X_continuous, X_ohe], format="csr")
+        return np.hstack([X_continuous, X_ohe.toarray()])
 
-        X_res_cat = X_resampled[:, self.continuous_features_.size :]
-        X_res_cat.data = np.ones_like(X_res_cat.data)
-        X_res_cat_dec = self.ohe_.inverse_transform(X_res_cat)
+    def _decode_categorical(self, X_resampled, original=True):
+        """Reverses the encoding of the categorical features to match
+        the dataset's original structure. ``original`` indicates whether the
+        first rows are the original samples."""
+
+        n_continuous = self.continuous_features_.size
+        n_original = (
+            self._X_categorical_encoded.shape[0]
+            if not self._ordinal and math.isclose(self.median_std_, 0) and original
+            else 0
+        )
+        if X_resampled.shape[0] == 0:
+            X_res_cat_dec = np.empty(
+                (0, self.categorical_features_.size), dtype=X_resampled.dtype
+            )
+        elif self._ordinal:
+            X_res_cat_dec = self.ordinal_encoder_.inverse_transform(
+                _toarray(X_resampled[:, n_continuous:])
+            )
+        elif self._issparse:
+            X_res_cat = X_resampled[:, n_continuous:]
+            if n_original:
+                X_res_cat = sparse.vstack(
+                    [self._X_categorical_encoded, X_res_cat[n_original:]],
+                    format="csr",
+                )
+            X_res_cat.eliminate_zeros()
+            X_res_cat.data = np.ones_like(X_res_cat.data)
+            X_res_cat_dec = self.ohe_.inverse_transform(X_res_cat)
+        else:
+            X_res_cat = X_resampled[:, n_continuous:] != 0
+            if n_original:
+                X_res_cat[:n_original] = self._X_categorical_encoded != 0
+            X_res_cat_dec = self.ohe_.inverse_transform(
+                X_res_cat.astype(X_resampled.dtype)
+            )
 
+        # The encoded columns are the continuous features followed by the
+        # categorical ones, i.e. the inverse of the original column order
+        columns = np.hstack((self.continuous_features_, self.categorical_features_))
         if self._issparse:
             X_resampled = sparse.hstack(
-                (X_resampled[:, : self.continuous_features_.size], X_res_cat_dec),
-                format="csr",
+                (X_resampled[:, :n_continuous], X_res_cat_dec), format="csr"
+            )
+            X_resampled.indices = columns[X_resampled.indices].astype(
+                X_resampled.indices.dtype
             )
+            X_resampled.has_sorted_indices = False
         else:
-            X_resampled = np.hstack(
+            X_decoded = np.empty(
+                (X_resampled.shape[0], columns.size),
+                dtype=np.result_type(X_resampled.dtype, X_res_cat_dec.dtype),
+            )
+            X_decoded[:, self.continuous_features_] = X_resampled[:, :n_continuous]
+            X_decoded[:, self.categorical_features_] = X_res_cat_dec
+            X_resampled = X_decoded
+
+        return X_resampled
+
+    def _fit(self, X, y, sample_weight=None, distances=None):
+        """Encodes the categorical features and fits the nearest neighbors
+        indexes of each class. The encoded data are stored with the indexes."""
+        self._issparse = sparse.issparse(X)
+        self._X_dtype, self._X_format = X.dtype, getattr(X, "format", None)
+        self._sample_weight = sample_weight
+        self._weighted_samplers = {}
+        if self._issparse:
+            X = X.tocsr()
+
+        # The buffer of partial_fit refers to the previous data
+        for name in ("plan_", "X_buffer_", "y_buffer_"):
+            self.__dict__.pop(name, None)
+
+        # Validate categorical features
+        self._validate_categorical()
+
+        # Reuse the encoded data and nearest neighbors indexes
+        if self.cache is not None:
+            key = joblib_hash(
                 (
-                    X_resampled[:, : self.continuous_features_.size].toarray(),
-                    X_res_cat_dec,
+                    X,
+                    y,
+                    self.categorical_features,
+                    self.categorical_encoding,
+                    self.selection_strategy,
+                    self.k_neighbors,
+                    self.metric,
+                    distances,
+                )
+            )
+            state = self.cache.get(key)
+            if state is not None:
+                for name, value in state.items():
+                    setattr(self, name, value)
+
+                # The cached state is shared, hence it is queried on a copy
+                self._class_neighbors = self._class_neighbors.copy()
+                self._class_neighbors.working_memory = self.working_memory
+                self._validate_estimator()
+                return self
+
+        # Preprocess categorical data
+        self._categories_size = None
+        if self.categorical_features is not None:
+            X = self._encode_categorical(X, y)
+            if not self._ordinal:
+                self._categories_size = [self.continuous_features_.size] + [
+                    cat.size for cat in self.ohe_.categories_
+                ]
+        else:
+            X = X.astype(_float_dtype(X.dtype), copy=False)
+
+        # Validate estimator's parameters
+        self._validate_estimator()
+
+        # Create the nearest neighbors index of each class
+        self._class_neighbors = _ClassNeighbors(
+            nn_pos=(
+                self.nns_pos_
+                if self.selection_strategy in ("minority", "combined")
+                else None
+            ),
+            nn_neg=(
+                self.nn_neg_
+                if self.selection_strategy in ("majority", "combined")
+                else None
+            ),
+            working_memory=self.working_memory,
+        ).fit(X, y, distances=distances)
+
+        if self.cache is not None:
+            # The nearest neighbors of the classes to resample are found before
+            # the state is shared, which is not modified afterwards, so that the
+            # instances reusing it do not search them again
+            self._class_neighbors.query(
+                [
+                    label
+                    for label, n_samples in self.sampling_strategy_.items()
+                    if n_samples
+                ],
+                n_jobs=self.n_jobs,
+            )
+            state = {
+                name: getattr(self, name)
+                for name in (
+                    "median_std_",
+                    "ohe_",
+                    "ordinal_encoder_",
+                    "_X_categorical_encoded",
+                    "_categories_size",
+                    "_class_neighbors",
+                )
+                if hasattr(self, name)
+            }
+            n_bytes = 2 * _nbytes(X) + sum(
+                neighbors.nbytes
+                for cache in (
+                    self._class_neighbors.neighbors_pos_,
+                    self._class_neighbors.neighbors_neg_,
                 )
+                for neighbors in cache.values()
             )
+            if distances is not None:
+                n_bytes += _nbytes(self._class_neighbors.distances_)
+            self.cache.put(key, state, n_bytes)
+            self._class_neighbors = self._class_neighbors.copy()
+        return self
+
+    def _query(self, n_samples_per_class):
+        """Fits the nearest neighbors indexes of the classes to resample. The
+        nearest neighbors of the classes with at least as many samples to
+        generate as samples are found in parallel. For the remaining classes,
+        only the neighbors of the drawn centers are found, when they are drawn.
+        """
+        labels = [
+            label for label, n_samples in n_samples_per_class.items() if n_samples
+        ]
+        self._class_neighbors.fit_indexes(labels)
+        self._class_neighbors.query(
+            [
+                label
+                for label in labels
+                if n_samples_per_class[label]
+                >= self._class_neighbors.class_indices_[label].size
+            ],
+            n_jobs=self.n_jobs,
+        )
 
-        indices_reordered = np.argsort(
-            np.hstack((self.continuous_features_, self.categorical_features_))
+    def _blocks(self, n_samples_per_class, random_state):
+        """Splits the artificial samples in blocks generated from a single random
+        state. Returns tuples with the class label, the offset of the block in the
+        artificial samples, its number of samples and its random state.
+
+        Without random streams, each class is a single block drawn from
+        ``random_state``. Otherwise, each block of at most ``STREAM_BLOCK_SIZE``
+        samples has its own stream, keyed by the class and the block positions."""
+        blocks, start = [], 0
+        if self.random_streams:
+            entropy = random_state.randint(np.iinfo(np.int32).max, size=4)
+            classes = np.unique(self._class_neighbors.y_).tolist()
+        for class_label, n_samples in n_samples_per_class.items():
+            if not self.random_streams:
+                blocks.append((class_label, start, n_samples, random_state))
+            elif n_samples > 0:
+                class_ind = classes.index(class_label)
+                for block_ind, batch in enumerate(
+                    gen_batches(n_samples, STREAM_BLOCK_SIZE)
+                ):
+                    seed = np.random.SeedSequence(
+                        entropy, spawn_key=(class_ind, block_ind)
+                    )
+                    blocks.append(
+                        (
+                            class_label,
+                            start + batch.start,
+                            batch.stop - batch.start,
+                            np.random.Generator(np.random.Philox(seed)),
+                        )
+                    )
+            start += n_samples
+        return blocks
+
+    def _generate_block(self, X, y, class_label, n_samples, random_state, out=None):
+        """Generates a block of artificial samples of a class. They are returned
+        in the encoded space, unless they are written in ``out``, a dense array
+        in the format of the input data. Returns the samples, their labels and
+        their provenance."""
+
+        # Apply gsmote mechanism
+        X_new, y_new, neighbors_indices, provenance = self._make_geometric_samples(
+            X,
+            y,
+            class_label,
+            n_samples,
+            random_state=random_state,
+            out=out,
         )
 
-        if sparse.issparse(X_resampled):
-            col_indices = X_resampled.indices.copy()
-            for idx, col_idx in enumerate(indices_reordered):
-                mask = X_resampled.indices == col_idx
-                col_indices[mask] = idx
-            X_resampled.indices = col_indices
+        # Apply smotenc mechanism
+        if self.categorical_features is not None and n_samples:
+            X_new = self._make_categorical_samples_chunked(
+                X,
+                X_new,
+                y_new,
+                neighbors_indices,
+                random_state,
+                decode=out is not None,
+            )
+        return X_new, y_new, provenance
+
+    def _generate(self, n_samples_per_class, random_state, original=True, out=None):
+        """Generates the artificial samples of each class from the fitted data.
+        If ``original`` is ``True``, they are preceded by the original samples.
+        Otherwise, they may be written in a preallocated dense array ``out``."""
+        X, y = self._class_neighbors.X_, self._class_neighbors.y_
+        self._query(n_samples_per_class)
+        X_generation = self._with_nonnull_categorical(X)
+
+        # Allocate the output, starting with a copy of the original data
+        n_original = X.shape[0] if original else 0
+        n_resampled = n_original + sum(n_samples_per_class.values())
+        y_resampled = np.empty(n_resampled, dtype=y.dtype)
+        y_resampled[:n_original] = y[:n_original]
+        provenance = np.empty((n_resampled - n_original, 2), dtype=np.intp)
+        # Dense samples are written in the format of the input data, so that
+        # they are only decoded or converted one chunk at a time
+        if out is not None:
+            X_resampled = out
+        elif self._issparse:
+            X_resampled = None
         else:
-            X_resampled = X_resampled[:, indices_reordered]
+            X_resampled = np.empty(
+                (n_resampled, self.n_features_in_), dtype=self._X_dtype
+            )
+            X_resampled[:n_original] = (
+                X[:n_original]
+                if self.categorical_features is None
+                else self._postprocess(X[:n_original], original=True)
+            )
+
+        def fill(class_label, start, n_samples, random_state):
+            new_rows = slice(start, start + n_samples)
+            rows = slice(n_original + start, n_original + start + n_samples)
+            X_new, y_resampled[rows], provenance[new_rows] = self._generate_block(
+                X_generation,
+                y,
+                class_label,
+                n_samples,
+                random_state,
+                out=None if X_resampled is None else X_resampled[rows],
+            )
+            return X_new
+
+        # Resample. Without random streams, all the classes draw from the same
+        # random state, so that they are generated sequentially in class order
+        X_new = Parallel(
+            n_jobs=self.n_jobs if self.random_streams else 1, prefer="threads"
+        )(
+            delayed(fill)(*block)
+            for block in self._blocks(n_samples_per_class, random_state)
+        )
 
+        if self._issparse:
+            X_resampled = sparse.vstack([X[:n_original]] + X_new, format="csr")
+            X_resampled = self._postprocess(X_resampled, original=original)
+        return X_resampled, y_resampled, provenance
+
+    def _postprocess(self, X_resampled, original=True):
+        """Reverses the encoding of the categorical features and restores the
+        type and format of the input data."""
+        if self.categorical_features is not None:
+            X_resampled = self._decode_categorical(X_resampled, original=original)
+        X_resampled = X_resampled.astype(self._X_dtype)
+        if self._issparse:
+            X_resampled = X_resampled.asformat(self._X_format)
         return X_resampled
 
-    def _fit_resample(self, X, y, sample_weight=None):
-        # Save basic data
-        self._issparse = sparse.issparse(X)
-        X_dtype = X.dtype
+    def _fit_resample(self, X, y, sample_weight=None, distances=None):
+        self._fit(X, y, sample_weight, distances)
+        X_resampled, y_resampled, provenance = self._generate(
+            self.sampling_strategy_,
+            self.random_state_,
+            original=not self.synthetic_only,
+        )
+        if self.synthetic_only:
+            return X_resampled, y_resampled, provenance
+        return X_resampled, y_resampled
 
-        # Validate estimator's parameters
-        self._validate_categorical()._validate_estimator()
+    def _check_fit_resample_input(self, X, y, sample_weight, distances=None):
+        """Validates the input of the resampling methods and the sampling
+        strategy. Stores how to restore the type of the input."""
+        check_classification_targets(y)
+        self._arrays_transformer = ArraysTransformer(X, y)
+        X, y, self._binarize_y = self._check_X_y(X, y)
 
-        # Preprocess categorical data
+        if sample_weight is not None:
+            sample_weight = _check_sample_weight(sample_weight, X, dtype=X.dtype)
+
+        if self.metric == "precomputed":
+            if distances is None:
+                raise ValueError("distances are required when metric='precomputed'.")
+            distances = check_array(distances, accept_sparse="csr")
+            if distances.shape != (X.shape[0], X.shape[0]):
+                raise ValueError(
+                    "distances should be of shape {}, got {}.".format(
+                        (X.shape[0], X.shape[0]), distances.shape
+                    )
+                )
+        elif distances is not None:
+            raise ValueError("distances are only used when metric='precomputed'.")
+
+        self.sampling_strategy_ = check_sampling_strategy(
+            self.sampling_strategy, y, self._sampling_type
+        )
+        return X, y, sample_weight, distances
+
+    def _transform_output(self, X_resampled, y_resampled, transform_X=True):
+        """Restores the type of the input data and target."""
+        if self._binarize_y:
+            y_resampled = label_binarize(
+                y_resampled, classes=np.unique(self._class_neighbors.y_)
+            )
+        if not transform_X:
+            return X_resampled, y_resampled
+        return self._arrays_transformer.transform(X_resampled, y_resampled)
+
+    def _check_out(self, out, n_samples):
+        """Validates the array, or creates the ``.npy`` file, in which the
+        artificial samples are written."""
+        if self._issparse:
+            raise ValueError("out is only supported for dense data.")
+        shape = (n_samples, self.n_features_in_)
+        if isinstance(out, (str, os.PathLike)):
+            return np.lib.format.open_memmap(
+                out, mode="w+", dtype=self._X_dtype, shape=shape
+            )
+        if not isinstance(out, np.ndarray) or out.shape != shape:
+            raise ValueError(
+                "out should be an array of shape {}, got {}.".format(
+                    shape, getattr(out, "shape", type(out).__name__)
+                )
+            )
+        return out
+
+    def fit(self, X, y, sample_weight=None, distances=None):
+        """Fit the nearest neighbors of each class, to draw samples with
+        :meth:`sample`.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Matrix containing the data which have to be sampled.
+
+        y : array-like of shape (n_samples,)
+            Corresponding label for each sample in X.
+
+        sample_weight : array-like of shape (n_samples,), default=None
+            Individual weights for each sample. Assigns probabilities for selecting a
+            sample as a center point.
+
+        distances : {array-like, sparse matrix} of shape (n_samples, n_samples), \
+                default=None
+            Precomputed distances between the samples. Required when
+            ``metric='precomputed'``. A sparse matrix is a graph whose stored
+            entries are the only candidate neighbors, as returned by
+            :func:`~sklearn.neighbors.kneighbors_graph` with ``mode='distance'``.
+            It must hold, for each sample, ``k_neighbors`` neighbors of the same
+            class and one of another class, according to the selection strategy.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        X, y, sample_weight, distances = self._check_fit_resample_input(
+            X, y, sample_weight, distances
+        )
+        return self._fit(X, y, sample_weight, distances)
+
+    def partial_fit(self, X, y, sample_weight=None):
+        """Append samples to the fitted data and update the buffer of artificial
+        samples.
+
+        The first call fits the estimator as :meth:`fit`. The following calls
+        append the samples to the fitted data: the encoding of the categorical
+        features is reused and only the nearest neighbors changed by the new
+        samples are searched again. The buffer holds the artificial samples of
+        ``sampling_strategy_``, scaled down to ``buffer_size``. The artificial
+        samples whose center point had its nearest neighbors changed are
+        replaced, along with the oldest ones when a class exceeds its number of
+        samples, and only the missing artificial samples are generated.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Matrix containing the new samples.
+
+        y : array-like of shape (n_samples,)
+            Corresponding label for each sample in X.
+
+        sample_weight : array-like of shape (n_samples,), default=None
+            Individual weights for each sample. Assigns probabilities for selecting a
+            sample as a center point.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        if self.metric == "precomputed":
+            raise ValueError("partial_fit does not support metric='precomputed'.")
+        if not hasattr(self, "_class_neighbors"):
+            self.fit(X, y, sample_weight)
+        else:
+            check_classification_targets(y)
+            X, y, _ = self._check_X_y(X, y, reset=False)
+            if sample_weight is not None:
+                sample_weight = _check_sample_weight(sample_weight, X, dtype=X.dtype)
+            self._partial_fit(X, y, sample_weight)
+        self._update_buffer()
+        return self
+
+    def _partial_fit(self, X, y, sample_weight=None):
+        """Encodes the new samples and appends them to the fitted data."""
+        X = sparse.csr_matrix(X) if self._issparse else _toarray(X)
         if self.categorical_features is not None:
-            X = self._encode_categorical(X, y)
-            categories_size = [self.continuous_features_.size] + [
-                cat.size for cat in self.ohe_.categories_
+            X = self._transform_categorical(X)
+        else:
+            X = X.astype(self._class_neighbors.X_.dtype, copy=False)
+
+        n_fit = self._class_neighbors.X_.shape[0]
+        if sample_weight is not None or self._sample_weight is not None:
+            self._sample_weight = np.hstack(
+                [
+                    np.ones(n_fit)
+                    if self._sample_weight is None
+                    else self._sample_weight,
+                    np.ones(len(y)) if sample_weight is None else sample_weight,
+                ]
+            )
+        self._weighted_samplers = {}
+
+        # The fitted data may be shared with a cache, so it is not modified
+        self._class_neighbors = copy(self._class_neighbors).partial_fit(
+            X,
+            y,
+            distances=self._distances,
+            pairwise_distances=self._pairwise_distances,
+        )
+        self.sampling_strategy_ = check_sampling_strategy(
+            self.sampling_strategy, self._class_neighbors.y_, self._sampling_type
+        )
+        return self
+
+    def _update_buffer(self):
+        """Keeps the artificial samples of the buffer whose center point has the
+        same nearest neighbors, up to the number of samples of each class, and
+        generates the missing ones."""
+        targets = self.sampling_strategy_
+        n_targets = sum(targets.values())
+        if self.buffer_size is not None and n_targets > self.buffer_size:
+            targets = {
+                label: n_samples * self.buffer_size // n_targets
+                for label, n_samples in targets.items()
+            }
+
+        plan = getattr(self, "plan_", None)
+        keep = np.zeros(0 if plan is None else len(plan), dtype=bool)
+        for label in np.unique(plan.y) if plan is not None else []:
+            if label not in targets:
+                continue
+            rows = np.flatnonzero(plan.y == label)
+            self._check_selection_strategy(self._class_neighbors.y_, label)
+            rows = rows[
+                self._class_neighbors.is_cached(
+                    label,
+                    np.searchsorted(
+                        self._class_neighbors.class_indices_[label],
+                        plan.center_indices[rows],
+                    ),
+                    pos=self.selection_strategy_ in ("minority", "combined"),
+                    neg=self.selection_strategy_ in ("majority", "combined"),
+                )
             ]
+            # The newest artificial samples are kept
+            keep[rows[max(rows.size - targets[label], 0) :]] = True
+
+        n_kept = Counter(plan.y[keep]) if plan is not None else Counter()
+        new_plan = self.plan(
+            {label: n_samples - n_kept[label] for label, n_samples in targets.items()}
+        )
+        X_new = self._postprocess(
+            self._materialize(
+                new_plan.y,
+                new_plan.center_indices,
+                new_plan.surface_indices,
+                new_plan.seeds,
+            ),
+            original=False,
+        )
+        if plan is None:
+            self.plan_, self.X_buffer_, self.y_buffer_ = new_plan, X_new, new_plan.y
+            return self
+
+        stack = sparse.vstack if self._issparse else np.vstack
+        self.X_buffer_ = stack([self.X_buffer_[keep], X_new])
+        if self._issparse:
+            self.X_buffer_ = self.X_buffer_.asformat(self._X_format)
+        self.y_buffer_ = np.hstack([self.y_buffer_[keep], new_plan.y])
+        self.plan_ = SyntheticPlan(
+            self,
+            self.y_buffer_,
+            np.hstack([plan.center_indices[keep], new_plan.center_indices]),
+            np.hstack([plan.surface_indices[keep], new_plan.surface_indices]),
+            np.hstack([plan.seeds[keep], new_plan.seeds]),
+        )
+        return self
+
+    def sample(self, n_samples_per_class=None, random_state=None, out=None):
+        """Draw artificial samples from the fitted data.
+
+        The data, the encoding of the categorical features and the nearest
+        neighbors are reused across calls, so that drawing more samples only
+        requires generating them.
+
+        Parameters
+        ----------
+        n_samples_per_class : int or dict, default=None
+            Number of samples to generate. If ``int``, the number of samples of
+            each class in ``sampling_strategy_``. If ``dict``, the keys are the
+            class labels and the values are the number of samples of the class. If
+            ``None``, ``sampling_strategy_`` is used.
+
+        random_state : int, RandomState instance or None, default=None
+            Control the randomization of the algorithm. If ``None``, the random
+            numbers are drawn from ``random_state_``, so that successive calls
+            return different samples.
+
+        out : ndarray, str or path-like, default=None
+            Dense array of shape (n_samples_new, n_features), e.g. a ``np.memmap``,
+            in which the artificial samples are written. If a path, a ``.npy``
+            file is created and memory-mapped, with the dtype of the input data.
+            Allows generating more samples than fit in memory.
+
+        Returns
+        -------
+        X_new : {array-like, sparse matrix} of shape (n_samples_new, n_features)
+            The artificial samples. If ``out`` is given, it is returned as is.
+
+        y_new : array-like of shape (n_samples_new,)
+            The corresponding label of `X_new`.
+        """
+        n_samples_per_class, random_state = self._check_sample_params(
+            n_samples_per_class, random_state
+        )
+        if out is not None:
+            out = self._check_out(out, sum(n_samples_per_class.values()))
+        X_new, y_new, _ = self._generate(
+            n_samples_per_class, random_state, original=False, out=out
+        )
+        return self._transform_output(X_new, y_new, transform_X=out is None)
+
+    def sample_grid(self, factors, n_samples_per_class=None, random_state=None):
+        """Draw artificial samples of several geometries from the fitted data.
+
+        The nearest neighbors are searched once, and the center points, the
+        surface points and the random numbers of the geometric regions are drawn
+        once for all geometries. Only the truncation and deformation of the
+        geometric regions differ between them.
+
+        Parameters
+        ----------
+        factors : array-like of shape (n_geometries, 2)
+            Pairs of ``truncation_factor`` and ``deformation_factor`` values,
+            which replace the ones of the estimator.
+
+        n_samples_per_class : int or dict, default=None
+            Number of samples to generate, as in :meth:`sample`.
 
-        # Copy data
-        X_resampled, y_resampled = X.copy(), y.copy()
+        random_state : int, RandomState instance or None, default=None
+            Control the randomization of the algorithm, as in :meth:`sample`.
 
-        # Resample
-        for class_label, n_samples in self.sampling_strategy_.items():
-            # Apply gsmote mechanism
-            X_new, y_new, all_neighbors_ = self._make_geometric_samples(
-                X, y, class_label, n_samples, sample_weight=sample_weight
+        Returns
+        -------
+        samples : list of tuples
+            The artificial samples ``(X_new, y_new)`` of each geometry. They are
+            equal to the ones returned by :meth:`sample` for the same
+            ``random_state``, after setting the corresponding factors.
+        """
+        n_samples_per_class, random_state = self._check_sample_params(
+            n_samples_per_class, random_state
+        )
+        factors = np.asarray(factors, dtype=np.float64)
+        if factors.ndim != 2 or factors.shape[1] != 2:
+            raise ValueError(
+                "factors should be a sequence of (truncation_factor, "
+                "deformation_factor) pairs. Got an array of shape {} instead.".format(
+                    factors.shape
+                )
+            )
+        X, y = self._class_neighbors.X_, self._class_neighbors.y_
+        self._query(n_samples_per_class)
+        X_generation = self._with_nonnull_categorical(X)
+
+        X_new, y_new = [[X_generation[:0]] for _ in factors], [y[:0]]
+        for class_label, _, n_samples, block_random_state in self._blocks(
+            n_samples_per_class, random_state
+        ):
+            if n_samples == 0:
+                continue
+            centers, surface_candidates, neighbors_indices = self._select_samples(
+                y, class_label, n_samples, block_random_state
             )
+            X_block, _ = self._make_geometric_samples_chunked(
+                X_generation,
+                centers,
+                surface_candidates,
+                block_random_state,
+                factors=factors.T,
+            )
+            y_block = np.array([class_label] * n_samples)
 
-            # Apply smotenc mechanism
+            # The categorical features do not depend on the geometry
             if self.categorical_features is not None:
-                X_new, y_new = self._make_categorical_samples(
-                    X_new, y_new, categories_size, all_neighbors_
+                n_continuous = self.continuous_features_.size
+                X_block[0], y_block = self._make_categorical_samples(
+                    X_block[0],
+                    y_block,
+                    self._categories_size,
+                    _gather_rows(X_generation[:, n_continuous:], neighbors_indices),
+                    block_random_state,
                 )
+                for ind, X_geometry in enumerate(X_block[1:], start=1):
+                    if self._issparse:
+                        X_block[ind] = sparse.hstack(
+                            [
+                                X_geometry[:, :n_continuous],
+                                X_block[0][:, n_continuous:],
+                            ],
+                            format="csr",
+                        )
+                    else:
+                        X_geometry[:, n_continuous:] = X_block[0][:, n_continuous:]
+
+            for X_geometry, X_geometry_block in zip(X_new, X_block):
+                X_geometry.append(X_geometry_block)
+            y_new.append(y_block)
+
+        stack = sparse.vstack if self._issparse else np.vstack
+        y_new = np.hstack(y_new)
+        return [
+            self._transform_output(
+                self._postprocess(stack(X_geometry), original=False), y_new
+            )
+            for X_geometry in X_new
+        ]
+
+    def plan(self, n_samples_per_class=None, random_state=None):
+        """Draw a compact plan of artificial samples from the fitted data.
 
-            # Append new data
-            X_resampled, y_resampled = (
-                np.vstack((X_resampled, X_new)),
-                np.hstack((y_resampled, y_new)),
+        Each artificial sample is determined by the index of its center point,
+        the index of its surface point and the seed of its random numbers, so
+        that it can be generated on demand. The plan stores these values instead
+        of the generated rows.
+
+        Parameters
+        ----------
+        n_samples_per_class : int or dict, default=None
+            Number of samples to generate, as in :meth:`sample`.
+
+        random_state : int, RandomState instance or None, default=None
+            Control the randomization of the algorithm, as in :meth:`sample`.
+
+        Returns
+        -------
+        plan : SyntheticPlan
+            The plan of the artificial samples. They follow the same distribution
+            as the ones returned by :meth:`sample`, but are drawn from different
+            random numbers.
+        """
+        n_samples_per_class, random_state = self._check_sample_params(
+            n_samples_per_class, random_state
+        )
+        X, y = self._class_neighbors.X_, self._class_neighbors.y_
+        self._query(n_samples_per_class)
+        X_generation = self._with_nonnull_categorical(X)
+
+        y_new = [y[:0]]
+        center_indices = [np.empty(0, dtype=np.intp)]
+        surface_indices = [np.empty(0, dtype=np.intp)]
+        seeds = [np.empty(0, dtype=np.uint64)]
+        for class_label, _, n_samples, block_random_state in self._blocks(
+            n_samples_per_class, random_state
+        ):
+            if n_samples == 0:
+                continue
+            centers, surface_candidates, _ = self._select_samples(
+                y, class_label, n_samples, block_random_state
             )
+            chunk_n_rows = get_chunk_n_rows(
+                row_bytes=8 * X.shape[1] * (len(surface_candidates) + 1),
+                max_n_rows=n_samples,
+                working_memory=self.working_memory,
+            )
+            surfaces = surface_candidates[0].copy()
+            for chunk in gen_batches(n_samples, chunk_n_rows):
+                _, surfaces[chunk] = self._select_surface_points(
+                    _toarray(X_generation[centers[chunk]]),
+                    [_toarray(X_generation[ind[chunk]]) for ind in surface_candidates],
+                    [ind[chunk] for ind in surface_candidates],
+                    centers[chunk],
+                )
+            y_new.append(np.full(n_samples, class_label, dtype=y.dtype))
+            center_indices.append(centers)
+            surface_indices.append(surfaces)
+            seeds.append(_draw_seeds(block_random_state, n_samples))
+
+        # The indices are stored with the smallest unsigned integer type
+        index_dtype = np.min_scalar_type(X.shape[0])
+        return SyntheticPlan(
+            self,
+            np.hstack(y_new),
+            np.hstack(center_indices).astype(index_dtype),
+            np.hstack(surface_indices).astype(index_dtype),
+            np.hstack(seeds),
+        )
 
-        # reverse the encoding of the categorical features
-        if self.categorical_features is not None:
-            X_resampled = self._decode_categorical(X_resampled).astype(X_dtype)
-        else:
-            X_resampled = X_resampled.astype(X_dtype)
-        return X_resampled, y_resampled
+    def _materialize(self, y_new, center_indices, surface_indices, seeds):
+        """Generates the artificial samples of a plan in the encoded space. The
+        random numbers of each sample are drawn from the streams of its seed, so
+        that it does not depend on the samples generated along with it."""
+        X, y = self._class_neighbors.X_, self._class_neighbors.y_
+        X_generation = self._with_nonnull_categorical(X)
+        if seeds.size == 0:
+            return self._make_geometric_samples(X_generation, y, None, 0)[0]
+        centers = _toarray(X_generation[center_indices])
+        surface_points = _toarray(X_generation[surface_indices])
+        X_new = (
+            _make_mixed_geometric_samples_batch(
+                centers,
+                surface_points,
+                self.continuous_features_.size,
+                sum(cat.size for cat in self.ordinal_encoder_.categories_),
+                self.median_std_**2 / 2,
+                self.truncation_factor,
+                self.deformation_factor,
+                _RowStreams(seeds, key=0),
+            )
+            if self._ordinal
+            else _make_geometric_samples_batch(
+                centers,
+                surface_points,
+                self.truncation_factor,
+                self.deformation_factor,
+                _RowStreams(seeds, key=0),
+            )
+        )
+        if self._issparse:
+            X_new = sparse.csr_matrix(X_new)
+        if self.categorical_features is None:
+            return X_new
+
+        # The categorical features are voted by the nearest neighbors of the
+        # centers, whose number depends on the class
+        X_categorical = X_generation[:, self.continuous_features_.size :]
+        X_new_classes, rows_classes = [], []
+        for class_label in np.unique(y_new):
+            rows = np.flatnonzero(y_new == class_label)
+            self._check_selection_strategy(y, class_label)
+            *_, neighbors_indices = self._center_neighbors(
+                class_label,
+                np.searchsorted(
+                    self._class_neighbors.class_indices_[class_label],
+                    center_indices[rows],
+                ),
+            )
+            X_new_class, _ = self._make_categorical_samples(
+                X_new[rows],
+                y_new[rows],
+                self._categories_size,
+                _gather_rows(X_categorical, neighbors_indices),
+                _RowStreams(seeds[rows], key=1),
+            )
+            X_new_classes.append(X_new_class)
+            rows_classes.append(rows)
+        stack = sparse.vstack if self._issparse else np.vstack
+        return stack(X_new_classes)[np.argsort(np.hstack(rows_classes))]
+
+    def _cost_inputs(self, X, y):
+        """Validates the input of :meth:`estimate_cost` and :meth:`autotune`
+        without fitting, and returns the quantities the cost depends on."""
+        check_classification_targets(y)
+        y, _ = check_target_type(y, indicate_one_vs_all=True)
+        X = check_array(X, accept_sparse=["csr", "csc"], dtype=None)
+        sampling_strategy = check_sampling_strategy(
+            self.sampling_strategy, y, self._sampling_type
+        )
+        n_samples, n_features = X.shape
+        itemsize = _float_dtype(X.dtype).itemsize
+
+        # The one-hot encoding adds a column per category
+        n_encoded = n_features
+        if self.categorical_features is not None and (
+            self.categorical_encoding == "onehot"
+        ):
+            categorical_features = np.asarray(self.categorical_features)
+            if categorical_features.dtype.name == "bool":
+                categorical_features = np.flatnonzero(categorical_features)
+            n_encoded += sum(
+                len(set(_toarray(X[:, [col]]).ravel())) - 1
+                for col in categorical_features
+            )
+        row_bytes = n_encoded * itemsize
+        if sparse.issparse(X):
+            density = X.nnz / max(n_samples * n_features, 1)
+            row_bytes = density * n_encoded * (itemsize + 4)
+        copied = (
+            self.categorical_features is not None
+            or X.dtype.kind != "f"
+            or getattr(X, "format", None) == "csc"
+        )
+        return dict(
+            n_samples=n_samples,
+            n_encoded=n_encoded,
+            input_bytes=_nbytes(X),
+            row_bytes=row_bytes,
+            encoded_bytes=n_samples * row_bytes if copied else 0,
+            class_counts=Counter(y),
+            sampling_strategy=sampling_strategy,
+        )
+
+    def _estimate_cost(self, inputs, k_neighbors, working_memory, n_jobs):
+        """Estimates the cost of resampling with the given neighbors search,
+        working memory in MiB and number of threads."""
+        n_samples, n_encoded = inputs["n_samples"], inputs["n_encoded"]
+        n_neighbors = (
+            k_neighbors
+            if isinstance(k_neighbors, Integral)
+            else k_neighbors.n_neighbors - 1
+        )
+        nn = k_neighbors
+        if self.categorical_encoding == "ordinal" and (
+            self.categorical_features is not None
+        ):
+            nn = BruteForceNeighbors()
+        pos = self.selection_strategy in ("minority", "combined")
+        neg = self.selection_strategy in ("majority", "combined")
+
+        # Only the distinct centers drawn from each class are queried, unless the
+        # class has at most as many samples as the samples to generate
+        n_centers = {}
+        for label, n_samples_new in inputs["sampling_strategy"].items():
+            n_class = inputs["class_counts"][label]
+            if n_samples_new >= n_class:
+                n_centers[label] = n_class
+            elif n_samples_new > 0:
+                n_centers[label] = n_class * (1 - (1 - 1 / n_class) ** n_samples_new)
+        working_memory = 2**20 * (
+            get_config()["working_memory"] if working_memory is None else working_memory
+        )
+        costs = []
+        if pos:
+            costs += [
+                _search_cost(
+                    nn,
+                    inputs["class_counts"][label],
+                    n_class_centers,
+                    n_neighbors + 1,
+                    n_encoded,
+                    inputs["row_bytes"],
+                    working_memory,
+                )
+                for label, n_class_centers in n_centers.items()
+            ]
+        if neg and n_centers:
+            costs.append(
+                _search_cost(
+                    nn,
+                    n_samples,
+                    sum(n_centers.values()),
+                    16,
+                    n_encoded,
+                    inputs["row_bytes"],
+                    working_memory,
+                )
+            )
+        n_samples_new = sum(inputs["sampling_strategy"].values())
+        n_queries = int(round(sum(n_centers.values()) * (pos + neg)))
+
+        # The threads query the classes concurrently, while the samples of each
+        # class are generated in chunks of about ten arrays of their size
+        n_threads = max(min(effective_n_jobs(n_jobs), len(costs)), 1)
+        query_bytes = n_threads * max([cost[2] for cost in costs], default=0)
+        generation_bytes = min(
+            10 * max(inputs["sampling_strategy"].values(), default=0) * n_encoded * 8,
+            working_memory,
+        )
+        output_bytes = n_samples_new * 2 * inputs["row_bytes"]
+        if not self.synthetic_only:
+            output_bytes += (n_samples + n_samples_new) * inputs["row_bytes"]
+        peak_bytes = (
+            inputs["input_bytes"]
+            + inputs["encoded_bytes"]
+            + sum(cost[1] for cost in costs)
+            + n_queries * (n_neighbors + 1) * 8
+            + max(query_bytes, generation_bytes)
+            + output_bytes
+        )
+
+        # The samples are only generated in the threads with random streams
+        search_flops = [cost[0] for cost in costs]
+        flops = sum(search_flops) / _thread_speedup(n_jobs, search_flops)
+        generation_flops = n_samples_new * (SAMPLE_COST + FEATURE_COST * n_encoded)
+        if self.random_streams:
+            n_blocks = sum(
+                -(-n_samples // STREAM_BLOCK_SIZE)
+                for n_samples in inputs["sampling_strategy"].values()
+            )
+            generation_flops /= _thread_speedup(
+                n_jobs, [generation_flops / max(n_blocks, 1)] * n_blocks
+            )
+        flops += generation_flops
+        return CostEstimate(
+            n_samples_new, n_queries, int(peak_bytes), flops / _flops_per_second()
+        )
+
+    def estimate_cost(self, X, y):
+        """Estimate the cost of :meth:`fit_resample` without running it.
+
+        The cost is predicted from the shape and type of the data, the number of
+        samples to generate of ``sampling_strategy``, the selection strategy and
+        the nearest neighbors search. Only the distinct center points are
+        queried, so that the number of queries is the expected number of
+        distinct samples drawn from each class.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Matrix containing the data which have to be sampled.
+
+        y : array-like of shape (n_samples,)
+            Corresponding label for each sample in X.
+
+        Returns
+        -------
+        cost : CostEstimate
+            Named tuple with the number of artificial samples ``n_samples_new``,
+            the expected number of nearest neighbors queries ``n_queries``, the
+            predicted peak memory in bytes ``peak_bytes``, including the input
+            data, and the estimated time in seconds ``time``. The time is
+            derived from the floating point operations of the search and the
+            speed of matrix products on the machine, and is only indicative.
+        """
+        return self._estimate_cost(
+            self._cost_inputs(X, y), self.k_neighbors, self.working_memory, self.n_jobs
+        )
+
+    def autotune(self, X, y, max_memory=None, max_jobs=None, approximate=False):
+        """Set the working memory, the nearest neighbors search and the number of
+        threads from the estimated cost of :meth:`fit_resample`.
+
+        Among the candidate searches and numbers of threads, the fastest one
+        whose estimated peak memory is below ``max_memory`` is selected, with the
+        fewest threads among equally fast ones. The speedup of the threads is
+        limited by the CPUs left by the threads of the BLAS, the number of
+        classes and the serial parts of the resampling. The working memory is
+        reduced when the default one does not fit.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Matrix containing the data which have to be sampled.
+
+        y : array-like of shape (n_samples,)
+            Corresponding label for each sample in X.
+
+        max_memory : int, default=None
+            The maximum memory in bytes. If ``None``, the memory is not limited.
 
-    def fit_resample(self, X, y, sample_weight=None):
+        max_jobs : int, default=None
+            The maximum number of threads. If ``None``, the number of CPUs is
+            used.
+
+        approximate : bool, default=False
+            Whether :class:`~mlresearch.data_augmentation.ClusterNeighbors` and
+            :class:`~mlresearch.data_augmentation.RandomProjectionNeighbors` are
+            candidate searches. Only applies when ``k_neighbors`` is an ``int``
+            and the euclidean distance is used with the one-hot encoding.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself, with the selected parameters.
+        """
+        inputs = self._cost_inputs(X, y)
+        max_jobs = cpu_count() if max_jobs is None else effective_n_jobs(max_jobs)
+        candidates = [self.k_neighbors]
+        if (
+            approximate
+            and isinstance(self.k_neighbors, Integral)
+            and self.metric == "euclidean"
+            and not (
+                self.categorical_features is not None
+                and self.categorical_encoding == "ordinal"
+            )
+        ):
+            candidates += [
+                ClusterNeighbors(
+                    n_neighbors=self.k_neighbors + 1, random_state=self.random_state
+                ),
+                RandomProjectionNeighbors(
+                    n_neighbors=self.k_neighbors + 1, random_state=self.random_state
+                ),
+            ]
+
+        # The fewest threads are kept among equally fast configurations
+        selected, min_peak_bytes = None, np.inf
+        for k_neighbors in candidates:
+            for n_jobs in range(1, max_jobs + 1):
+                working_memory = self.working_memory
+                cost = self._estimate_cost(inputs, k_neighbors, working_memory, n_jobs)
+                if max_memory is not None and cost.peak_bytes > max_memory:
+                    # Reduce the memory of each thread to the remaining memory
+                    fixed_bytes = self._estimate_cost(
+                        inputs, k_neighbors, 0, n_jobs
+                    ).peak_bytes
+                    min_peak_bytes = min(min_peak_bytes, fixed_bytes)
+                    working_memory = int(
+                        (max_memory - fixed_bytes) // (n_jobs * 2**20)
+                    )
+                    if working_memory < 1:
+                        continue
+                    cost = self._estimate_cost(
+                        inputs, k_neighbors, working_memory, n_jobs
+                    )
+                    if cost.peak_bytes > max_memory:
+                        continue
+                if selected is None or cost.time < selected[0].time:
+                    selected = (cost, k_neighbors, working_memory, n_jobs)
+        if selected is None:
+            raise ValueError(
+                "The resampling needs at least {} bytes, above max_memory={}.".format(
+                    int(min_peak_bytes), max_memory
+                )
+            )
+        _, k_neighbors, working_memory, n_jobs = selected
+        return self.set_params(
+            k_neighbors=k_neighbors, working_memory=working_memory, n_jobs=n_jobs
+        )
+
+    def _check_sample_params(self, n_samples_per_class, random_state):
+        """Validates the number of samples per class and the random state used to
+        draw artificial samples from the fitted data."""
+        check_is_fitted(self, "sampling_strategy_")
+        if n_samples_per_class is None:
+            n_samples_per_class = self.sampling_strategy_
+        elif isinstance(n_samples_per_class, Integral):
+            n_samples_per_class = {
+                label: n_samples_per_class for label in self.sampling_strategy_
+            }
+        unknown_labels = set(n_samples_per_class).difference(
+            self._class_neighbors.class_indices_
+        )
+        if unknown_labels:
+            raise ValueError(
+                "n_samples_per_class contains unknown class labels: {}.".format(
+                    sorted(unknown_labels)
+                )
+            )
+        random_state = (
+            self.random_state_
+            if random_state is None
+            else check_random_state(random_state)
+        )
+        return n_samples_per_class, random_state
+
+    def fit_resample(self, X, y, sample_weight=None, distances=None):
         """Resample the dataset.
 
         Parameters
@@ -656,6 +3099,15 @@ class GeometricSMOTE(BaseOverSampler):
             Individual weights for each sample. Assigns probabilities for selecting a
             sample as a center point.
 
+        distances : {array-like, sparse matrix} of shape (n_samples, n_samples), \
+                default=None
+            Precomputed distances between the samples. Required when
+            ``metric='precomputed'``. A sparse matrix is a graph whose stored
+            entries are the only candidate neighbors, as returned by
+            :func:`~sklearn.neighbors.kneighbors_graph` with ``mode='distance'``.
+            It must hold, for each sample, ``k_neighbors`` neighbors of the same
+            class and one of another class, according to the selection strategy.
+
         Returns
         -------
         X_resampled : {array-like, sparse matrix} of shape \
@@ -664,21 +3116,116 @@ class GeometricSMOTE(BaseOverSampler):
 
         y_resampled : array-like of shape (n_samples_new,)
             The corresponding label of `X_resampled`.
+
+        provenance : ndarray of shape (n_samples_new, 2)
+            The indices of the center and surface points of each generated sample
+            in `X`. Only returned when ``synthetic_only=True``, in which case
+            `X_resampled` and `y_resampled` contain only the generated samples.
         """
-        check_classification_targets(y)
-        arrays_transformer = ArraysTransformer(X, y)
-        X, y, binarize_y = self._check_X_y(X, y)
+        X, y, sample_weight, distances = self._check_fit_resample_input(
+            X, y, sample_weight, distances
+        )
+        output = self._fit_resample(X, y, sample_weight, distances)
+        X_, y_ = self._transform_output(output[0], output[1])
+        return (X_, y_) if len(output) == 2 else (X_, y_, output[2])
 
-        if sample_weight is not None:
-            sample_weight = _check_sample_weight(sample_weight, X, dtype=X.dtype)
+    def iter_resample(self, X, y, chunk_size=None, sample_weight=None, distances=None):
+        """Generate artificial samples in chunks of bounded size.
 
-        self.sampling_strategy_ = check_sampling_strategy(
-            self.sampling_strategy, y, self._sampling_type
+        The nearest neighbors are searched once, before the first chunk is
+        generated. Only the artificial samples are returned, so that they can be
+        consumed without holding the whole resampled dataset in memory.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Matrix containing the data which have to be sampled.
+
+        y : array-like of shape (n_samples,)
+            Corresponding label for each sample in X.
+
+        chunk_size : int, default=None
+            Maximum number of artificial samples in each chunk. If ``None``, it is
+            set so that each chunk fits in ``working_memory``.
+
+        sample_weight : array-like of shape (n_samples,), default=None
+            Individual weights for each sample. Assigns probabilities for selecting a
+            sample as a center point.
+
+        distances : {array-like, sparse matrix} of shape (n_samples, n_samples), \
+                default=None
+            Precomputed distances between the samples. Required when
+            ``metric='precomputed'``. A sparse matrix is a graph whose stored
+            entries are the only candidate neighbors, as returned by
+            :func:`~sklearn.neighbors.kneighbors_graph` with ``mode='distance'``.
+            It must hold, for each sample, ``k_neighbors`` neighbors of the same
+            class and one of another class, according to the selection strategy.
+
+        Yields
+        ------
+        X_chunk : {array-like, sparse matrix} of shape (n_samples_chunk, n_features)
+            Artificial samples of a single class.
+
+        y_chunk : array-like of shape (n_samples_chunk,)
+            The corresponding label of `X_chunk`.
+
+        Notes
+        -----
+        Without categorical features, the concatenation of the chunks is equal to
+        the artificial samples returned by :meth:`fit_resample` for the same
+        ``random_state``. With categorical features, the ties of the majority vote
+        are broken with different random numbers, unless ``random_streams=True``.
+        In that case, the chunks are also bounded by the size of the blocks drawn
+        from the same random stream.
+        """
+        X, y, sample_weight, distances = self._check_fit_resample_input(
+            X, y, sample_weight, distances
         )
+        self._fit(X, y, sample_weight, distances)
+        self._query(self.sampling_strategy_)
+        X, y = self._class_neighbors.X_, self._class_neighbors.y_
+        X_generation = self._with_nonnull_categorical(X)
+        if chunk_size is None:
+            chunk_size = get_chunk_n_rows(
+                row_bytes=8 * X.shape[1], working_memory=self.working_memory
+            )
 
-        output = self._fit_resample(X, y, sample_weight)
+        for class_label, _, n_samples, random_state in self._blocks(
+            self.sampling_strategy_, self.random_state_
+        ):
+            if n_samples == 0:
+                continue
 
-        y_ = label_binarize(output[1], np.unique(y)) if binarize_y else output[1]
+            # Each block has its own random stream, hence it is generated at once
+            if self.random_streams:
+                X_new, y_new, _ = self._generate_block(
+                    X_generation, y, class_label, n_samples, random_state
+                )
+                X_new = self._postprocess(X_new, original=False)
+                for chunk in gen_batches(n_samples, chunk_size):
+                    yield self._transform_output(X_new[chunk], y_new[chunk])
+                continue
 
-        X_, y_ = arrays_transformer.transform(output[0], y_)
-        return (X_, y_) if len(output) == 2 else (X_, y_, output[2])
+            centers, surface_candidates, neighbors_indices = self._select_samples(
+                y, class_label, n_samples, random_state
+            )
+            for chunk in gen_batches(n_samples, chunk_size):
+                X_new, _ = self._make_geometric_samples_chunked(
+                    X_generation,
+                    centers[chunk],
+                    [indices[chunk] for indices in surface_candidates],
+                    random_state,
+                )
+                y_new = np.array([class_label] * X_new.shape[0])
+                if self.categorical_features is not None:
+                    X_new, y_new = self._make_categorical_samples(
+                        X_new,
+                        y_new,
+                        self._categories_size,
+                        _gather_rows(
+                            X_generation[:, self.continuous_features_.size :],
+                            neighbors_indices[chunk],
+                        ),
+                    )
+                X_new = self._postprocess(X_new, original=False)
+                yield self._transform_output(X_new, y_new)
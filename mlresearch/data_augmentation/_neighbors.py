@@ -0,0 +1,1284 @@
+"""
+Nearest neighbors search utilities used by the oversampling algorithms.
+"""
+
+# Author: Joao Fonseca <jpmrfonseca@gmail.com>
+# License: BSD 3 clause
+
+from copy import copy
+
+import numpy as np
+from numpy.linalg import norm
+from joblib import Parallel, delayed
+from scipy import sparse
+from scipy.linalg import get_blas_funcs
+from sklearn import config_context
+from sklearn.base import BaseEstimator, clone
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.neighbors import sort_graph_by_row_values
+from sklearn.utils import check_array, check_random_state, gen_batches, get_chunk_n_rows
+from sklearn.utils.extmath import row_norms, safe_sparse_dot
+
+BLOCK_N_ROWS = 256
+
+
+def _toarray(X):
+    """Converts sparse matrices to dense arrays."""
+    return X.toarray() if sparse.issparse(X) else X
+
+
+def _smallest(distances, n_neighbors, block_size=64):
+    """Find the smallest distances of each row in ascending order, ties being
+    broken by the column index.
+
+    The ``n_neighbors``-th smallest minimum of blocks of columns bounds the
+    ``n_neighbors``-th smallest distance of each row, so that only the few
+    distances below the bound are sorted instead of partitioning whole rows.
+    """
+    n_rows, n_cols = distances.shape
+    block_size = max(min(block_size, n_cols // n_neighbors), 1)
+    minima = np.minimum.reduceat(distances, np.arange(0, n_cols, block_size), axis=1)
+    bounds = np.partition(minima, n_neighbors - 1, axis=1)[:, n_neighbors - 1]
+    rows, cols = np.nonzero(distances <= bounds[:, None])
+    candidates = distances[rows, cols]
+    order = np.lexsort((candidates, rows))
+    starts = np.searchsorted(rows, np.arange(n_rows))
+    order = order[(starts[:, None] + np.arange(n_neighbors)).ravel()]
+    return (
+        candidates[order].reshape(n_rows, n_neighbors),
+        cols[order].reshape(n_rows, n_neighbors),
+    )
+
+
+class BruteForceNeighbors(BaseEstimator):
+    """Exact nearest neighbors search using blocked matrix products.
+
+    The squared euclidean distances between the queries and the training data
+    are computed as :math:`\\|a\\|^2 + \\|b\\|^2 - 2 a \\cdot b`, so that the
+    bulk of the search is a matrix product carried out by the BLAS. The queries
+    are processed in blocks whose distance matrices fit in scikit-learn's
+    ``working_memory``, and the nearest neighbors of each block are selected
+    with a partial sort.
+
+    It can be passed as the ``k_neighbors`` parameter of
+    :class:`~mlresearch.data_augmentation.GeometricSMOTE` to replace the
+    tree-based exact search, which is slower for dense data with a moderate
+    or large number of features.
+
+    Parameters
+    ----------
+    n_neighbors : int, default=5
+        Number of neighbors to use by default for :meth:`kneighbors` queries.
+
+    dtype : {np.float64, np.float32}, default=np.float64
+        The floating point type of the matrix products. ``np.float32`` halves
+        the memory of the distance matrices and speeds up the search, at the
+        cost of a lower precision of the distances, which may change the order
+        of neighbors at nearly equal distances.
+
+    n_jobs : int, default=None
+        Kept for compatibility with scikit-learn's neighbors estimators. The
+        distance computations are multi-threaded through the BLAS.
+
+    Attributes
+    ----------
+    n_samples_fit_ : int
+        Number of samples in the fitted data.
+
+    n_features_in_ : int
+        Number of features seen during :meth:`fit`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mlresearch.data_augmentation import BruteForceNeighbors
+    >>> X = np.random.RandomState(0).randn(1000, 20)
+    >>> nn = BruteForceNeighbors(n_neighbors=3).fit(X)
+    >>> nn.kneighbors(X[:2], return_distance=False)[:, 0]
+    array([0, 1])
+    """
+
+    def __init__(self, n_neighbors=5, dtype=np.float64, n_jobs=None):
+        self.n_neighbors = n_neighbors
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+
+    def _split(self, X):
+        """Returns the arrays used to compute the distances of the samples,
+        whose rows are sliced together."""
+        X = check_array(X, accept_sparse="csr", dtype=[np.float64, np.float32])
+        X = X.astype(self.dtype, copy=False)
+        return X, row_norms(X, squared=True)
+
+    def fit(self, X, y=None):
+        """Fit the nearest neighbors estimator from the training dataset.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Training data.
+
+        y : Ignored
+            Not used, present for API consistency by convention.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        self._fit_split = self._split(X)
+        self.n_samples_fit_, self.n_features_in_ = X.shape
+        return self
+
+    def _squared_distances(self, X, sq_norms, *args):
+        """Squared distances between a block of queries and the training data,
+        minus the squared norms of the queries. They do not change the order of
+        the neighbors of each query and are added to the nearest ones only."""
+        fit_X, fit_sq_norms = self._fit_split[:2]
+        if sparse.issparse(X) or sparse.issparse(fit_X):
+            distances = safe_sparse_dot(X, fit_X.T, dense_output=True).astype(
+                self.dtype, copy=False
+            )
+            distances *= -2
+        else:
+            # The transposed product of C-ordered arrays avoids copies to and
+            # from the Fortran order expected by the BLAS
+            X = np.ascontiguousarray(X, dtype=self.dtype)
+            fit_X = np.ascontiguousarray(fit_X, dtype=self.dtype)
+            gemm = get_blas_funcs("gemm", (fit_X, X))
+            distances = gemm(-2.0, fit_X.T, X.T, trans_a=True).T
+        distances += fit_sq_norms[None, :]
+        return distances
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        """Find the K-neighbors of a point.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_queries, n_features)
+            The query points.
+
+        n_neighbors : int, default=None
+            Number of neighbors required for each sample. The default is the
+            value passed to the constructor.
+
+        return_distance : bool, default=True
+            Whether or not to return the distances.
+
+        Returns
+        -------
+        neigh_dist : ndarray of shape (n_queries, n_neighbors)
+            Distances to the nearest neighbors. Only present if
+            ``return_distance=True``.
+
+        neigh_ind : ndarray of shape (n_queries, n_neighbors)
+            Indices of the nearest neighbors in the training data.
+        """
+        n_neighbors = self.n_neighbors if n_neighbors is None else n_neighbors
+        if n_neighbors > self.n_samples_fit_:
+            raise ValueError(
+                "Expected n_neighbors <= n_samples_fit, but n_neighbors = {}, "
+                "n_samples_fit = {}".format(n_neighbors, self.n_samples_fit_)
+            )
+        split = self._split(X)
+        n_queries = X.shape[0]
+        neigh_dist = np.empty((n_queries, n_neighbors))
+        neigh_ind = np.empty((n_queries, n_neighbors), dtype=np.intp)
+
+        # The distances and the selection of a block fit in working_memory, and
+        # small blocks are kept in the cache of the CPU between both steps
+        chunk_n_rows = get_chunk_n_rows(
+            row_bytes=(np.dtype(self.dtype).itemsize + 1) * self.n_samples_fit_,
+            max_n_rows=min(n_queries, BLOCK_N_ROWS),
+        )
+        for chunk in gen_batches(n_queries, chunk_n_rows):
+            arrays = [array[chunk] for array in split]
+            distances, neigh_ind[chunk] = _smallest(
+                self._squared_distances(*arrays), n_neighbors
+            )
+            distances += arrays[1][:, None]
+            neigh_dist[chunk] = np.sqrt(np.maximum(distances, 0))
+
+        return (neigh_dist, neigh_ind) if return_distance else neigh_ind
+
+
+class _MixedNeighbors(BruteForceNeighbors):
+    """Brute force nearest neighbors search over mixed data types.
+
+    The last columns of the data are expected to contain categorical features
+    as integer codes. The squared distance between two samples is the squared
+    euclidean distance between their continuous features plus
+    ``categorical_penalty`` for each categorical feature in which they differ.
+    It is equal to the distance between the samples when the categorical features
+    are one-hot encoded with entries of ``sqrt(categorical_penalty / 2)``.
+
+    Parameters
+    ----------
+    n_neighbors : int, default=5
+        Number of neighbors to use by default for :meth:`kneighbors` queries.
+
+    n_continuous : int, default=None
+        Number of continuous features, placed before the categorical features.
+        If ``None``, all features are continuous.
+
+    categorical_penalty : float, default=0.0
+        Squared distance added for each mismatched categorical feature.
+
+    dtype : {np.float64, np.float32}, default=np.float64
+        The floating point type of the distance computations.
+
+    n_jobs : int, default=None
+        Kept for compatibility with scikit-learn's neighbors estimators. The
+        distance computations are multi-threaded through the BLAS.
+    """
+
+    def __init__(
+        self,
+        n_neighbors=5,
+        n_continuous=None,
+        categorical_penalty=0.0,
+        dtype=np.float64,
+        n_jobs=None,
+    ):
+        super().__init__(n_neighbors=n_neighbors, dtype=dtype, n_jobs=n_jobs)
+        self.n_continuous = n_continuous
+        self.categorical_penalty = categorical_penalty
+
+    def _split(self, X):
+        n_continuous = X.shape[1] if self.n_continuous is None else self.n_continuous
+        X_continuous = X[:, :n_continuous].astype(self.dtype, copy=False)
+        codes = _toarray(X[:, n_continuous:])
+        return X_continuous, row_norms(X_continuous, squared=True), codes
+
+    def _squared_distances(self, X_continuous, sq_norms, codes):
+        distances = super()._squared_distances(X_continuous, sq_norms)
+        fit_codes = self._fit_split[2]
+        for col in range(codes.shape[1]):
+            distances += self.categorical_penalty * (
+                codes[:, col, None] != fit_codes[None, :, col]
+            )
+        return distances
+
+
+class _ClassNeighbors:
+    """Nearest neighbors search filtered by class.
+
+    The index structures are fitted the first time they are queried and shared
+    across queries, so that they are built once regardless of the number of
+    classes being resampled. The results of the queries are cached per sample,
+    so that only the samples that were not queried before are searched, and
+    :meth:`query` computes them for all the samples of several classes in
+    parallel. Samples appended with :meth:`partial_fit` only discard the cached
+    results they may change:
+
+    - The data are partitioned by class and an index is fitted on each
+      partition. The nearest neighbors within the same class are searched in
+      the partition of the class.
+    - An index is fitted on the whole data. The nearest neighbor of the
+      remaining classes is the closest sample of another class among the
+      ``n_neighbors_neg`` nearest neighbors found in this index. For the
+      samples whose nearest neighbors all belong to their own class, it is
+      found by merging the results of the partitions of the remaining classes.
+
+    When the distances between the samples are precomputed, the estimators are
+    fitted on the distances between the samples of each partition, and the
+    nearest neighbor of the remaining classes is the closest sample of another
+    class in the rows of the distances. When they are a sparse graph, the
+    nearest neighbors within the same class are also the closest samples of the
+    class in the rows of the graph, which must contain enough of them.
+
+    Parameters
+    ----------
+    nn_pos : estimator object, default=None
+        Unfitted estimator used to find the nearest neighbors within the same
+        class. Its ``n_neighbors`` includes the queried sample itself.
+
+    nn_neg : estimator object, default=None
+        Unfitted estimator used to find the nearest neighbor of the remaining
+        classes. If it is equivalent to ``nn_pos``, the partitions fitted for
+        ``nn_pos`` are reused.
+
+    n_neighbors_neg : int, default=16
+        Number of nearest neighbors searched in the index of the whole data to
+        find the nearest neighbor of the remaining classes.
+
+    working_memory : int, default=None
+        The sought maximum memory in MiB for the temporary arrays of the
+        queries, which are searched in blocks of samples. It is also set as
+        scikit-learn's ``working_memory`` during the queries, which bounds the
+        distance matrices computed by the estimators. If ``None``, scikit-learn's
+        configuration is used.
+    """
+
+    def __init__(
+        self, nn_pos=None, nn_neg=None, n_neighbors_neg=16, working_memory=None
+    ):
+        self.nn_pos = nn_pos
+        self.nn_neg = nn_neg
+        self.n_neighbors_neg = n_neighbors_neg
+        self.working_memory = working_memory
+
+    def fit(self, X, y, distances=None):
+        """Partition the data by class.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Training data.
+
+        y : array-like of shape (n_samples,)
+            Class labels.
+
+        distances : {array-like, sparse matrix} of shape (n_samples, n_samples), \
+                default=None
+            Precomputed distances between the samples, searched instead of the
+            training data by estimators with ``metric='precomputed'``. A sparse
+            matrix is a graph whose stored entries are the only candidate
+            neighbors, as in :func:`~sklearn.neighbors.kneighbors_graph`.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        self.X_, self.y_ = X, y
+        if sparse.issparse(distances):
+            # Each sample is its own nearest neighbor, as in the dense case
+            distances = sparse.csr_matrix(distances, dtype=np.float64, copy=True)
+            distances.setdiag(0)
+        self.distances_ = distances
+        self.class_indices_ = {label: np.flatnonzero(y == label) for label in set(y)}
+        self.estimators_pos_, self.estimators_neg_ = {}, {}
+        self.neighbors_pos_, self.neighbors_neg_ = {}, {}
+        self.estimator_neg_ = None
+        self._nn_neg_partition = self.nn_neg
+        if (
+            self.nn_pos is not None
+            and self.nn_neg is not None
+            and clone(self.nn_pos).set_params(n_neighbors=1).get_params()
+            == self.nn_neg.get_params()
+        ):
+            self.estimators_neg_ = self.estimators_pos_
+            self._nn_neg_partition = self.nn_pos
+        return self
+
+    def partial_fit(self, X, y, distances=None, pairwise_distances=None):
+        """Append samples to the data.
+
+        The indexes of the classes that receive samples are fitted again when
+        they are queried. The cached nearest neighbors of a sample are discarded
+        when a new sample is at most as far as the farthest of them, so that only
+        the neighborhoods changed by the new samples are searched again. The
+        arrays of the previous data are not modified, but replaced.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            New samples.
+
+        y : array-like of shape (n_samples,)
+            Class labels of the new samples.
+
+        distances : callable, default=None
+            Function returning the row-wise distances between two arrays of
+            samples of the same shape. If ``None``, the euclidean distance is used.
+
+        pairwise_distances : callable, default=None
+            Function returning the distances between each sample of an array and
+            each sample of another, consistent with ``distances``. If ``None``,
+            the euclidean distance is used.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        if distances is None:
+
+            def distances(X1, X2):
+                return norm(X1 - X2, axis=1)
+
+        if pairwise_distances is None:
+            pairwise_distances = euclidean_distances
+
+        n_fit = self.X_.shape[0]
+        self.X_ = (
+            sparse.vstack([self.X_, X], format="csr")
+            if sparse.issparse(self.X_)
+            else np.vstack([self.X_, X])
+        )
+        self.y_ = np.hstack([self.y_, y])
+        new_indices = {label: n_fit + np.flatnonzero(y == label) for label in set(y)}
+
+        # Discard the cached nearest neighbors that the new samples may change
+        shared = self.estimators_neg_ is self.estimators_pos_
+        self.neighbors_pos_ = {
+            label: self._discard(
+                neighbors.copy(),
+                label,
+                new_indices.get(label),
+                distances,
+                pairwise_distances,
+            )
+            for label, neighbors in self.neighbors_pos_.items()
+        }
+        self.neighbors_neg_ = {
+            label: self._discard(
+                neighbors.copy(),
+                label,
+                np.hstack(
+                    [np.empty(0, dtype=np.intp)]
+                    + [ind for other, ind in new_indices.items() if other != label]
+                ),
+                distances,
+                pairwise_distances,
+            )
+            for label, neighbors in self.neighbors_neg_.items()
+        }
+
+        # Append the new samples to their classes
+        self.class_indices_ = dict(self.class_indices_)
+        self.estimators_pos_ = {
+            label: estimator
+            for label, estimator in self.estimators_pos_.items()
+            if label not in new_indices
+        }
+        self.estimators_neg_ = (
+            self.estimators_pos_
+            if shared
+            else {
+                label: estimator
+                for label, estimator in self.estimators_neg_.items()
+                if label not in new_indices
+            }
+        )
+        for label, indices in new_indices.items():
+            self.class_indices_[label] = np.hstack(
+                [self.class_indices_.get(label, np.empty(0, dtype=np.intp)), indices]
+            )
+            for cache in (self.neighbors_pos_, self.neighbors_neg_):
+                if label in cache:
+                    cache[label] = np.vstack(
+                        [
+                            cache[label],
+                            np.full((indices.size, cache[label].shape[1]), -1, np.intp),
+                        ]
+                    )
+        self.estimator_neg_ = None
+        return self
+
+    def copy(self):
+        """Returns a copy sharing the data, the fitted indexes and the cached
+        results, with its own results and indexes computed from then on, so that
+        the copies can be queried independently, e.g. concurrently. The shared
+        results are made read-only, and copied by the first query that
+        completes them.
+
+        Returns
+        -------
+        class_neighbors : _ClassNeighbors
+            The copy of the instance.
+        """
+        for cache in (self.neighbors_pos_, self.neighbors_neg_):
+            for neighbors in cache.values():
+                neighbors.setflags(write=False)
+        class_neighbors = copy(self)
+        class_neighbors.neighbors_pos_ = dict(self.neighbors_pos_)
+        class_neighbors.neighbors_neg_ = dict(self.neighbors_neg_)
+        class_neighbors.estimators_pos_ = dict(self.estimators_pos_)
+        class_neighbors.estimators_neg_ = (
+            class_neighbors.estimators_pos_
+            if self.estimators_neg_ is self.estimators_pos_
+            else dict(self.estimators_neg_)
+        )
+        return class_neighbors
+
+    def _discard(self, neighbors, label, new_indices, distances, pairwise_distances):
+        """Marks as missing the cached nearest neighbors of the samples of a
+        class that are farther than one of the new samples. The distances to the
+        new samples are computed in blocks of cached samples that fit in
+        ``working_memory``."""
+        if new_indices is None or new_indices.size == 0:
+            return neighbors
+        indices = self.class_indices_[label]
+        cached = np.flatnonzero(neighbors[:, 0] >= 0)
+        X_new = self.X_[new_indices]
+        chunk_n_rows = get_chunk_n_rows(
+            row_bytes=8 * (4 + new_indices.size) * self.X_.shape[1],
+            max_n_rows=cached.size,
+            working_memory=self.working_memory,
+        )
+        for chunk in gen_batches(cached.size, chunk_n_rows):
+            rows = cached[chunk]
+            X_rows = self.X_[indices[rows]]
+            radii = distances(_toarray(X_rows), _toarray(self.X_[neighbors[rows, -1]]))
+            # The distances computed from dot products are slightly inexact, hence
+            # the new samples at the radius, up to a tolerance, discard them too
+            changed = (
+                pairwise_distances(X_rows, X_new) <= radii[:, None] * (1 + 1e-6)
+            ).any(axis=1)
+            neighbors[rows[changed]] = -1
+        return neighbors
+
+    def is_cached(self, label, rows, pos=True, neg=True):
+        """Whether the nearest neighbors of samples of a class are cached.
+
+        Parameters
+        ----------
+        label : str or int
+            The class label.
+
+        rows : ndarray of shape (n_queries,)
+            Positions of the samples among the samples of the class.
+
+        pos : bool, default=True
+            Whether the nearest neighbors within the same class are required.
+
+        neg : bool, default=True
+            Whether the nearest neighbor of the remaining classes is required.
+
+        Returns
+        -------
+        cached : ndarray of shape (n_queries,)
+            Whether all the required nearest neighbors of each sample are cached.
+        """
+        cached = np.ones(rows.size, dtype=bool)
+        for required, cache in ((pos, self.neighbors_pos_), (neg, self.neighbors_neg_)):
+            if required:
+                cached &= cache[label][rows, 0] >= 0 if label in cache else False
+        return cached
+
+    @property
+    def n_neighbors_pos(self):
+        """Number of nearest neighbors within the same class returned by
+        :meth:`kneighbors_pos`."""
+        return self.nn_pos.get_params()["n_neighbors"] - 1
+
+    def fit_indexes(self, labels):
+        """Fit the indexes used to query the samples of several classes, so that
+        they are not fitted concurrently by the queries.
+
+        Parameters
+        ----------
+        labels : list
+            The class labels.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        # The nearest neighbors are taken from the rows of a graph of distances
+        if self.nn_pos is not None and not sparse.issparse(self.distances_):
+            for label in labels:
+                self._partition_estimator(label, self.estimators_pos_, self.nn_pos)
+        if (
+            self.nn_neg is not None
+            and len(self.class_indices_) > 1
+            and self.distances_ is None
+        ):
+            self._global_estimator()
+            for label in self.class_indices_:
+                self._partition_estimator(
+                    label, self.estimators_neg_, self._nn_neg_partition
+                )
+        return self
+
+    def query(self, labels, n_jobs=None):
+        """Find the nearest neighbors of the samples of several classes using a
+        pool of threads. The results are cached and returned by
+        :meth:`kneighbors_pos` and :meth:`kneighbors_neg`.
+
+        Parameters
+        ----------
+        labels : list
+            The class labels.
+
+        n_jobs : int, default=None
+            The number of threads to use.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        self.fit_indexes(labels)
+        queries = []
+        if self.nn_pos is not None:
+            queries += [(self.kneighbors_pos, label) for label in labels]
+        if self.nn_neg is not None and len(self.class_indices_) > 1:
+            queries += [(self.kneighbors_neg, label) for label in labels]
+
+        Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(kneighbors)(label) for kneighbors, label in queries
+        )
+        return self
+
+    def _cached(self, cache, label, n_class_samples, n_neighbors, rows, kneighbors):
+        """Returns the cached results of the rows of a class, after computing
+        the missing ones in blocks that fit in ``working_memory``. The missing
+        results are marked with negative indices."""
+        if label not in cache:
+            cache[label] = np.full((n_class_samples, n_neighbors), -1, dtype=np.intp)
+        neighbors = cache[label]
+        queried = rows if rows is not None else slice(None)
+        missing = np.flatnonzero(neighbors[queried, 0] < 0)
+        if missing.size:
+            if not neighbors.flags.writeable:
+                neighbors = cache[label] = neighbors.copy()
+            missing = np.unique(rows[missing]) if rows is not None else missing
+            chunk_n_rows = get_chunk_n_rows(
+                row_bytes=8 * (self._data().shape[1] + 2 * self.n_neighbors_neg),
+                max_n_rows=missing.size,
+                working_memory=self.working_memory,
+            )
+            with config_context(working_memory=self.working_memory):
+                for chunk in gen_batches(missing.size, chunk_n_rows):
+                    neighbors[missing[chunk]] = kneighbors(missing[chunk])
+        return neighbors[queried]
+
+    def _data(self, rows=None, columns=None):
+        """Returns the rows of the training data, or their distances to the
+        samples of the columns when the distances are precomputed."""
+        if self.distances_ is None:
+            return self.X_ if rows is None else self.X_[rows]
+        distances = self.distances_ if rows is None else self.distances_[rows]
+        if columns is None:
+            return distances
+        distances = distances[:, columns]
+        if sparse.issparse(distances):
+            distances = sort_graph_by_row_values(
+                distances, copy=False, warn_when_not_sorted=False
+            )
+        return distances
+
+    def _partition_estimator(self, label, estimators, nn):
+        if label not in estimators:
+            indices = self.class_indices_[label]
+            estimators[label] = clone(nn).fit(self._data(indices, indices))
+        return estimators[label]
+
+    def _global_estimator(self):
+        if self.estimator_neg_ is None:
+            self.estimator_neg_ = clone(self.nn_neg).fit(self._data())
+        return self.estimator_neg_
+
+    def kneighbors_pos(self, label, rows=None):
+        """Find the nearest neighbors of the samples of a class within the same
+        class, excluding the samples themselves.
+
+        Parameters
+        ----------
+        label : str or int
+            The class label.
+
+        rows : ndarray of shape (n_queries,), default=None
+            Positions of the queried samples among the samples of the class. If
+            ``None``, all the samples of the class are queried.
+
+        Returns
+        -------
+        neigh_ind : ndarray of shape (n_queries, n_neighbors - 1)
+            Indices of the nearest neighbors in the training data.
+        """
+        indices = self.class_indices_[label]
+
+        def kneighbors(rows):
+            if sparse.issparse(self.distances_):
+                return self._precomputed_kneighbors_pos(label, rows)
+            neigh_ind = self._partition_estimator(
+                label, self.estimators_pos_, self.nn_pos
+            ).kneighbors(self._data(indices[rows], indices), return_distance=False)
+            return indices[neigh_ind[:, 1:]]
+
+        return self._cached(
+            self.neighbors_pos_,
+            label,
+            indices.size,
+            self.n_neighbors_pos,
+            rows,
+            kneighbors,
+        )
+
+    def kneighbors_neg(self, label, rows=None):
+        """Find the nearest neighbor of the samples of a class among the samples
+        of the remaining classes.
+
+        Parameters
+        ----------
+        label : str or int
+            The class label.
+
+        rows : ndarray of shape (n_queries,), default=None
+            Positions of the queried samples among the samples of the class. If
+            ``None``, all the samples of the class are queried.
+
+        Returns
+        -------
+        neigh_ind : ndarray of shape (n_queries, 1)
+            Indices of the nearest neighbors in the training data.
+        """
+        return self._cached(
+            self.neighbors_neg_,
+            label,
+            self.class_indices_[label].size,
+            1,
+            rows,
+            lambda rows: self._kneighbors_neg(label, rows)[:, None],
+        )
+
+    def _kneighbors_neg(self, label, rows):
+        if self.distances_ is not None:
+            return self._precomputed_kneighbors_neg(label, rows)
+        X_query = self.X_[self.class_indices_[label][rows]]
+
+        # Search the index of the whole data
+        ind = self._global_estimator().kneighbors(
+            X_query,
+            n_neighbors=min(self.n_neighbors_neg, self.X_.shape[0]),
+            return_distance=False,
+        )
+        is_neg = self.y_[ind] != label
+        found = is_neg.any(axis=1)
+        neigh_ind = ind[np.arange(ind.shape[0]), is_neg.argmax(axis=1)]
+        remaining = np.flatnonzero(~found)
+        if remaining.size == 0:
+            return neigh_ind
+
+        # Merge the results of the partitions of the remaining classes
+        neigh_dist = np.full(remaining.size, np.inf)
+        for other_label, indices in self.class_indices_.items():
+            if other_label == label:
+                continue
+            dist, ind = self._partition_estimator(
+                other_label, self.estimators_neg_, self._nn_neg_partition
+            ).kneighbors(X_query[remaining], n_neighbors=1)
+            closer = dist[:, 0] < neigh_dist
+            neigh_dist[closer] = dist[closer, 0]
+            neigh_ind[remaining[closer]] = indices[ind[closer, 0]]
+        return neigh_ind
+
+    def _precomputed_distances(self, rows, columns=None):
+        """Returns the precomputed distances of the rows to the samples of the
+        columns as a dense array, where the entries missing from a graph are
+        infinite."""
+        distances = self.distances_[rows]
+        if columns is not None:
+            distances = distances[:, columns]
+        if not sparse.issparse(distances):
+            return np.array(distances, dtype=np.float64)
+
+        # The entries missing from the graph are not candidate neighbors
+        distances = distances.tocoo()
+        dense_distances = np.full(distances.shape, np.inf)
+        dense_distances[distances.row, distances.col] = distances.data
+        return dense_distances
+
+    def _precomputed_kneighbors_pos(self, label, rows):
+        indices = self.class_indices_[label]
+        n_neighbors = self.n_neighbors_pos + 1
+        distances = self._precomputed_distances(indices[rows], indices)
+        if n_neighbors <= indices.size:
+            neigh_ind = np.argpartition(distances, n_neighbors - 1, axis=1)[
+                :, :n_neighbors
+            ]
+            neigh_dist = np.take_along_axis(distances, neigh_ind, axis=1)
+            order = np.argsort(neigh_dist, axis=1)
+            neigh_ind = np.take_along_axis(neigh_ind, order, axis=1)
+        if n_neighbors > indices.size or np.isinf(neigh_dist).any():
+            raise ValueError(
+                "The precomputed distances do not contain {} samples of class {}, "
+                "including the sample itself, in the rows of some samples of this "
+                "class. Recompute the graph with more neighbors.".format(
+                    n_neighbors, label
+                )
+            )
+        return indices[neigh_ind[:, 1:]]
+
+    def _precomputed_kneighbors_neg(self, label, rows):
+        distances = self._precomputed_distances(self.class_indices_[label][rows])
+        distances[:, self.class_indices_[label]] = np.inf
+        neigh_ind = distances.argmin(axis=1)
+        if np.isinf(distances[np.arange(neigh_ind.size), neigh_ind]).any():
+            raise ValueError(
+                "The precomputed distances do not contain a sample of another "
+                "class for some samples of class {}.".format(label)
+            )
+        return neigh_ind
+
+
+class RandomProjectionNeighbors(BaseEstimator):
+    """Approximate nearest neighbors search using a random projection forest.
+
+    Each tree recursively splits the training data at the median of a random
+    projection, until the leaves contain at least ``leaf_size`` samples. The
+    projection is shared by all the nodes of the same depth, so that the whole
+    data are projected with a single matrix product per tree. The candidate
+    neighbors of a query are the training samples in the leaves it falls into,
+    whose exact distances are computed to select the nearest ones.
+
+    It can be passed as the ``k_neighbors`` parameter of
+    :class:`~mlresearch.data_augmentation.GeometricSMOTE` to replace the exact
+    nearest neighbors search when the number of samples and features is large.
+
+    Parameters
+    ----------
+    n_neighbors : int, default=5
+        Number of neighbors to use by default for :meth:`kneighbors` queries.
+
+    n_trees : int, default=10
+        Number of trees in the forest. More trees increase the recall of the
+        search at the cost of a slower search.
+
+    leaf_size : int, default=30
+        Minimum number of samples in each leaf. Larger leaves increase the
+        recall of the search at the cost of a slower search.
+
+    random_state : int, RandomState instance or None, default=None
+        Control the randomization of the projections.
+
+    n_jobs : int, default=None
+        Kept for compatibility with scikit-learn's neighbors estimators. The
+        projections are multi-threaded through the BLAS.
+
+    Attributes
+    ----------
+    n_samples_fit_ : int
+        Number of samples in the fitted data.
+
+    n_features_in_ : int
+        Number of features seen during :meth:`fit`.
+
+    Notes
+    -----
+    When fewer than ``n_neighbors`` distinct candidates are found for a query,
+    its nearest neighbors are searched exhaustively.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mlresearch.data_augmentation import RandomProjectionNeighbors
+    >>> X = np.random.RandomState(0).randn(1000, 20)
+    >>> nn = RandomProjectionNeighbors(n_neighbors=3, random_state=0).fit(X)
+    >>> nn.kneighbors(X[:2], return_distance=False).shape
+    (2, 3)
+    """
+
+    def __init__(
+        self, n_neighbors=5, n_trees=10, leaf_size=30, random_state=None, n_jobs=None
+    ):
+        self.n_neighbors = n_neighbors
+        self.n_trees = n_trees
+        self.leaf_size = leaf_size
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def _build_tree(self, X_projected):
+        """Split the data level by level. Nodes are indexed as a binary heap."""
+        n_samples, depth = X_projected.shape
+        thresholds = np.empty(2**depth - 1)
+        nodes = np.zeros(n_samples, dtype=np.intp)
+        for level in range(depth):
+            first = 2**level - 1
+            values = X_projected[:, level]
+
+            # Rank of each sample within its node, sorting by node and value
+            scaled = values - values.min()
+            scaled /= 2 * scaled.max() if scaled.max() > 0 else 1
+            order = np.argsort(nodes + scaled)
+            counts = np.bincount(nodes - first, minlength=2**level)
+            starts = np.cumsum(counts) - counts
+            ranks = np.empty(n_samples, dtype=np.intp)
+            ranks[order] = np.arange(n_samples) - np.repeat(starts, counts)
+
+            # Split each node at the median
+            n_left = counts // 2
+            sorted_values = values[order]
+            thresholds[first : first + 2**level] = (
+                sorted_values[starts + n_left - 1] + sorted_values[starts + n_left]
+            ) / 2
+            nodes = 2 * nodes + 1 + (ranks >= n_left[nodes - first])
+
+        # Leaves are padded with their first sample
+        leaves = nodes - (2**depth - 1)
+        order = np.argsort(leaves, kind="stable")
+        counts = np.bincount(leaves, minlength=2**depth)
+        members = np.repeat(order[np.cumsum(counts) - counts][:, None], counts.max(), 1)
+        columns = np.arange(n_samples) - np.repeat(np.cumsum(counts) - counts, counts)
+        members[leaves[order], columns] = order
+        return thresholds, members
+
+    def fit(self, X, y=None):
+        """Fit the nearest neighbors estimator from the training dataset.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Training data.
+
+        y : Ignored
+            Not used, present for API consistency by convention.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        X = check_array(X, accept_sparse="csr", dtype=[np.float64, np.float32])
+        random_state = check_random_state(self.random_state)
+        self.n_samples_fit_, self.n_features_in_ = X.shape
+        depth = int(np.log2(max(self.n_samples_fit_ // self.leaf_size, 1)))
+
+        # The exhaustive search of the queries with too few candidates shares
+        # the training data and their norms
+        self._exhaustive = BruteForceNeighbors(dtype=X.dtype).fit(X)
+        self._fit_X, self._fit_sq_norms = self._exhaustive._fit_split
+        self._projections = random_state.normal(size=(X.shape[1], self.n_trees * depth))
+        X_projected = safe_sparse_dot(X, self._projections).reshape(
+            X.shape[0], self.n_trees, depth
+        )
+        self._trees = [self._build_tree(X_projected[:, i]) for i in range(self.n_trees)]
+        return self
+
+    def _leaf_distances(self, X, X_projected, sq_norms, tree):
+        """Compute the squared distances between each query and the training
+        samples in the leaf it falls into."""
+        thresholds, members = tree
+        nodes = np.zeros(X.shape[0], dtype=np.intp)
+        for level in range(X_projected.shape[1]):
+            nodes = 2 * nodes + 1 + (X_projected[:, level] > thresholds[nodes])
+        leaves = nodes - thresholds.size
+
+        # Queries falling into the same leaf are processed together
+        distances = np.empty((X.shape[0], members.shape[1]))
+        order = np.argsort(leaves, kind="stable")
+        splits = np.flatnonzero(np.diff(leaves[order])) + 1
+        for queries in np.split(order, splits):
+            leaf_members = members[leaves[queries[0]]]
+            distances[queries] = safe_sparse_dot(
+                X[queries], self._fit_X[leaf_members].T, dense_output=True
+            )
+        distances *= -2
+        distances += sq_norms[:, None]
+        distances += self._fit_sq_norms[members[leaves]]
+        return np.maximum(distances, 0, out=distances), members[leaves]
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        """Find the approximate K-neighbors of a point.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_queries, n_features)
+            The query points.
+
+        n_neighbors : int, default=None
+            Number of neighbors required for each sample. The default is the
+            value passed to the constructor.
+
+        return_distance : bool, default=True
+            Whether or not to return the distances.
+
+        Returns
+        -------
+        neigh_dist : ndarray of shape (n_queries, n_neighbors)
+            Distances to the nearest neighbors. Only present if
+            ``return_distance=True``.
+
+        neigh_ind : ndarray of shape (n_queries, n_neighbors)
+            Indices of the nearest neighbors in the training data.
+        """
+        n_neighbors = self.n_neighbors if n_neighbors is None else n_neighbors
+        if n_neighbors > self.n_samples_fit_:
+            raise ValueError(
+                "Expected n_neighbors <= n_samples_fit, but n_neighbors = {}, "
+                "n_samples_fit = {}".format(n_neighbors, self.n_samples_fit_)
+            )
+        X = check_array(X, accept_sparse="csr", dtype=[np.float64, np.float32])
+        neigh_dist = np.empty((X.shape[0], n_neighbors))
+        neigh_ind = np.empty((X.shape[0], n_neighbors), dtype=np.intp)
+
+        # The queries are processed in blocks that fit in working_memory
+        n_candidates = n_neighbors + self._trees[0][1].shape[1]
+        chunk_n_rows = get_chunk_n_rows(
+            row_bytes=8 * (self._projections.shape[1] + 6 * n_candidates),
+            max_n_rows=X.shape[0],
+        )
+        for chunk in gen_batches(X.shape[0], chunk_n_rows):
+            neigh_dist[chunk], neigh_ind[chunk] = self._kneighbors(
+                X[chunk], n_neighbors
+            )
+
+        # Exhaustive search for the queries with too few candidates
+        missing = np.flatnonzero(np.isinf(neigh_dist[:, -1]))
+        if missing.size:
+            neigh_dist[missing], neigh_ind[missing] = self._exhaustive.kneighbors(
+                X[missing], n_neighbors
+            )
+
+        return (neigh_dist, neigh_ind) if return_distance else neigh_ind
+
+    def _kneighbors(self, X, n_neighbors):
+        """Find the candidate neighbors of a block of queries in all the trees.
+        The distances of the missing neighbors are infinite."""
+        sq_norms = row_norms(X, squared=True)
+        neigh_dist = np.full((X.shape[0], n_neighbors), np.inf)
+        neigh_ind = np.full((X.shape[0], n_neighbors), -1, dtype=np.intp)
+        rows = np.arange(X.shape[0])[:, None]
+        X_projected = safe_sparse_dot(X, self._projections).reshape(
+            X.shape[0], len(self._trees), self._projections.shape[1] // len(self._trees)
+        )
+
+        # Merge the candidates of each tree with the nearest neighbors found so far
+        for i, tree in enumerate(self._trees):
+            distances, indices = self._leaf_distances(
+                X, X_projected[:, i], sq_norms, tree
+            )
+            distances = np.hstack([neigh_dist, distances])
+            indices = np.hstack([neigh_ind, indices])
+            order = np.argsort(indices, axis=1, kind="stable")
+            duplicated = np.zeros(indices.shape, dtype=bool)
+            duplicated[rows, order[:, 1:]] = (
+                indices[rows, order[:, 1:]] == indices[rows, order[:, :-1]]
+            )
+            distances[duplicated] = np.inf
+            if distances.shape[1] > n_neighbors:
+                order = np.argpartition(distances, n_neighbors - 1, axis=1)
+                distances = distances[rows, order[:, :n_neighbors]]
+                indices = indices[rows, order[:, :n_neighbors]]
+            neigh_dist, neigh_ind = distances, indices
+        order = np.argsort(neigh_dist, axis=1, kind="stable")
+        return np.sqrt(neigh_dist[rows, order]), neigh_ind[rows, order]
+
+
+class ClusterNeighbors(BaseEstimator):
+    """Approximate nearest neighbors search restricted to clusters of the data.
+
+    The training data are partitioned with a mini-batch k-means and an exact
+    index is fitted on each cluster. The candidate neighbors of a query are the
+    training samples of the ``n_probe`` clusters with the nearest centroids, so
+    that the distances of each query are only computed to a few clusters. The
+    queries are processed in blocks, each searching the clusters it probes one
+    at a time, so that the memory of each block does not grow with the number
+    of training samples.
+
+    It can be passed as the ``k_neighbors`` parameter of
+    :class:`~mlresearch.data_augmentation.GeometricSMOTE` to replace the exact
+    nearest neighbors search when the number of samples is very large. The
+    samples of each class are then clustered separately.
+
+    Parameters
+    ----------
+    n_neighbors : int, default=5
+        Number of neighbors to use by default for :meth:`kneighbors` queries.
+
+    n_clusters : int, default=None
+        Number of clusters. If ``None``, it is set to the square root of the
+        number of training samples.
+
+    n_probe : int, default=4
+        Number of clusters with the nearest centroids searched for each query.
+        More clusters increase the recall of the search at the cost of a slower
+        search.
+
+    batch_size : int, default=1024
+        Size of the mini-batches of the k-means.
+
+    random_state : int, RandomState instance or None, default=None
+        Control the randomization of the k-means.
+
+    n_jobs : int, default=None
+        The number of threads used to search the blocks of queries.
+
+    Attributes
+    ----------
+    kmeans_ : MiniBatchKMeans
+        The fitted k-means partitioning the training data.
+
+    n_samples_fit_ : int
+        Number of samples in the fitted data.
+
+    n_features_in_ : int
+        Number of features seen during :meth:`fit`.
+
+    Notes
+    -----
+    When fewer than ``n_neighbors`` candidates are found for a query, its
+    nearest neighbors are searched exhaustively.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mlresearch.data_augmentation import ClusterNeighbors
+    >>> X = np.random.RandomState(0).randn(1000, 20)
+    >>> nn = ClusterNeighbors(n_neighbors=3, random_state=0).fit(X)
+    >>> nn.kneighbors(X[:2], return_distance=False)[:, 0]
+    array([0, 1])
+    """
+
+    def __init__(
+        self,
+        n_neighbors=5,
+        n_clusters=None,
+        n_probe=4,
+        batch_size=1024,
+        random_state=None,
+        n_jobs=None,
+    ):
+        self.n_neighbors = n_neighbors
+        self.n_clusters = n_clusters
+        self.n_probe = n_probe
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y=None):
+        """Fit the nearest neighbors estimator from the training dataset.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features)
+            Training data.
+
+        y : Ignored
+            Not used, present for API consistency by convention.
+
+        Returns
+        -------
+        self : object
+            Return the instance itself.
+        """
+        X = check_array(X, accept_sparse="csr", dtype=[np.float64, np.float32])
+        self.n_samples_fit_, self.n_features_in_ = X.shape
+        n_clusters = (
+            int(np.sqrt(self.n_samples_fit_))
+            if self.n_clusters is None
+            else self.n_clusters
+        )
+        self.kmeans_ = MiniBatchKMeans(
+            n_clusters=min(max(n_clusters, 1), self.n_samples_fit_),
+            batch_size=self.batch_size,
+            n_init=3,
+            random_state=self.random_state,
+        ).fit(X)
+
+        # The samples of each cluster are indexed separately
+        labels = self.kmeans_.labels_
+        counts = np.bincount(labels, minlength=self.kmeans_.cluster_centers_.shape[0])
+        self._members = np.split(
+            np.argsort(labels, kind="stable"), np.cumsum(counts)[:-1]
+        )
+        self._estimators = [
+            BruteForceNeighbors(dtype=X.dtype).fit(X[members]) if members.size else None
+            for members in self._members
+        ]
+
+        # The exhaustive search is only fitted when a query needs it
+        self._fit_X, self._exhaustive = X, None
+        return self
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        """Find the approximate K-neighbors of a point.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_queries, n_features)
+            The query points.
+
+        n_neighbors : int, default=None
+            Number of neighbors required for each sample. The default is the
+            value passed to the constructor.
+
+        return_distance : bool, default=True
+            Whether or not to return the distances.
+
+        Returns
+        -------
+        neigh_dist : ndarray of shape (n_queries, n_neighbors)
+            Distances to the nearest neighbors. Only present if
+            ``return_distance=True``.
+
+        neigh_ind : ndarray of shape (n_queries, n_neighbors)
+            Indices of the nearest neighbors in the training data.
+        """
+        n_neighbors = self.n_neighbors if n_neighbors is None else n_neighbors
+        if n_neighbors > self.n_samples_fit_:
+            raise ValueError(
+                "Expected n_neighbors <= n_samples_fit, but n_neighbors = {}, "
+                "n_samples_fit = {}".format(n_neighbors, self.n_samples_fit_)
+            )
+        X = check_array(X, accept_sparse="csr", dtype=[np.float64, np.float32])
+        n_queries = X.shape[0]
+        neigh_dist = np.empty((n_queries, n_neighbors))
+        neigh_ind = np.empty((n_queries, n_neighbors), dtype=np.intp)
+
+        # Each block holds the distances to the centroids and to the largest
+        # cluster, so that its memory does not depend on the number of samples
+        chunk_n_rows = get_chunk_n_rows(
+            row_bytes=8
+            * (
+                len(self._members)
+                + max(members.size for members in self._members)
+                + 4 * n_neighbors
+            ),
+            max_n_rows=n_queries,
+        )
+
+        def kneighbors(chunk):
+            neigh_dist[chunk], neigh_ind[chunk] = self._kneighbors(
+                X[chunk], n_neighbors
+            )
+
+        Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(kneighbors)(chunk) for chunk in gen_batches(n_queries, chunk_n_rows)
+        )
+
+        # Exhaustive search for the queries with too few candidates
+        missing = np.flatnonzero(np.isinf(neigh_dist[:, -1]))
+        if missing.size:
+            if self._exhaustive is None:
+                self._exhaustive = BruteForceNeighbors(dtype=self._fit_X.dtype).fit(
+                    self._fit_X
+                )
+            neigh_dist[missing], neigh_ind[missing] = self._exhaustive.kneighbors(
+                X[missing], n_neighbors
+            )
+
+        return (neigh_dist, neigh_ind) if return_distance else neigh_ind
+
+    def _kneighbors(self, X, n_neighbors):
+        """Find the candidate neighbors of a block of queries in the clusters
+        they probe. The distances of the missing neighbors are infinite."""
+        sq_norms = row_norms(X, squared=True)
+        neigh_dist = np.full((X.shape[0], n_neighbors), np.inf)
+        neigh_ind = np.full((X.shape[0], n_neighbors), -1, dtype=np.intp)
+
+        # The queries probing the same cluster are processed together
+        centroid_distances = euclidean_distances(
+            X, self.kmeans_.cluster_centers_, squared=True
+        )
+        n_probe = min(self.n_probe, centroid_distances.shape[1])
+        probes = np.argpartition(centroid_distances, n_probe - 1, axis=1)[:, :n_probe]
+        order = np.argsort(probes.ravel(), kind="stable")
+        clusters = probes.ravel()[order]
+        splits = np.flatnonzero(np.diff(clusters)) + 1
+        for cluster, queries in zip(
+            clusters[np.r_[0, splits]], np.split(order, splits)
+        ):
+            estimator, members = self._estimators[cluster], self._members[cluster]
+            if estimator is None:
+                continue
+            queries = queries // n_probe
+            distances, indices = _smallest(
+                estimator._squared_distances(X[queries], sq_norms[queries]),
+                min(n_neighbors, members.size),
+            )
+            distances += sq_norms[queries, None]
+
+            # Merge the candidates with the nearest neighbors found so far
+            distances = np.hstack([neigh_dist[queries], distances])
+            indices = np.hstack([neigh_ind[queries], members[indices]])
+            nearest = np.argsort(distances, axis=1, kind="stable")[:, :n_neighbors]
+            neigh_dist[queries] = np.take_along_axis(distances, nearest, axis=1)
+            neigh_ind[queries] = np.take_along_axis(indices, nearest, axis=1)
+        return np.sqrt(np.maximum(neigh_dist, 0)), neigh_ind
@@ -10,13 +10,26 @@ from sklearn.neighbors import NearestNeighbors
 from imblearn.over_sampling.base import BaseOverSampler
 from imblearn.over_sampling import RandomOverSampler
 from ._gsmote import GeometricSMOTE
+from ._neighbors import (
+    BruteForceNeighbors,
+    ClusterNeighbors,
+    RandomProjectionNeighbors,
+)
 
 AUGMENTATION_STRATEGIES = ["oversampling", "constant", "proportional"]
 
 
 def _modify_nn(n_neighbors, n_samples):
     """Modify nearest neighbors object or integer."""
-    if isinstance(n_neighbors, NearestNeighbors):
+    if isinstance(
+        n_neighbors,
+        (
+            NearestNeighbors,
+            BruteForceNeighbors,
+            ClusterNeighbors,
+            RandomProjectionNeighbors,
+        ),
+    ):
         n_neighbors = (
             clone(n_neighbors).set_params(n_neighbors=n_samples - 1)
             if n_neighbors.n_neighbors >= n_samples
@@ -2,17 +2,41 @@
 Test the geometric_smote module.
 """
 
+import pickle
 from collections import Counter
 
 import pytest
 import numpy as np
+from joblib import Parallel, delayed
 from numpy.linalg import norm
+from sklearn import get_config
+from sklearn.base import clone
 from sklearn.utils import check_random_state
 from sklearn.utils._testing import assert_allclose, assert_array_equal
 from sklearn.datasets import make_classification
+from sklearn.metrics import pairwise_distances
+from sklearn.neighbors import NearestNeighbors, kneighbors_graph
 from scipy import sparse
 
-from .._gsmote import _make_geometric_sample, GeometricSMOTE, SELECTION_STRATEGY
+from .. import _gsmote as gsmote_module
+from .._neighbors import (
+    BruteForceNeighbors,
+    ClusterNeighbors,
+    RandomProjectionNeighbors,
+    _toarray,
+)
+from .._gsmote import (
+    _make_geometric_sample,
+    _make_geometric_samples_batch,
+    _make_categorical_samples_batch,
+    _alias_table,
+    _WeightedSampler,
+    _RowStreams,
+    GeometricSMOTE,
+    GeometricSMOTECache,
+    SyntheticPlan,
+    SELECTION_STRATEGY,
+)
 
 RND_SEED = 0
 RANDOM_STATE = check_random_state(RND_SEED)
@@ -163,6 +187,107 @@ def test_make_geometric_sample_line_segment(center, surface_point, truncation_fa
     np.testing.assert_allclose(np.abs(dot_product) / norms_product, 1.0)
 
 
+@pytest.mark.parametrize(
+    "truncation_factor, deformation_factor",
+    [
+        (truncation_factor, deformation_factor)
+        for truncation_factor in TRUNCATION_FACTORS
+        for deformation_factor in DEFORMATION_FACTORS
+    ],
+)
+def test_make_geometric_samples_batch(truncation_factor, deformation_factor):
+    """Test the vectorized generation matches the point by point generation."""
+    rng = np.random.RandomState(RND_SEED)
+    centers = rng.random_sample((20, 5))
+    surface_points = rng.random_sample((20, 5))
+    surface_points[::4] = centers[::4]
+    points = _make_geometric_samples_batch(
+        centers,
+        surface_points,
+        truncation_factor,
+        deformation_factor,
+        np.random.RandomState(RND_SEED),
+    )
+    random_state = np.random.RandomState(RND_SEED)
+    expected_points = [
+        _make_geometric_sample(
+            center, surface_point, truncation_factor, deformation_factor, random_state
+        )
+        for center, surface_point in zip(centers, surface_points)
+    ]
+    assert_allclose(points, np.array(expected_points))
+
+
+@pytest.mark.parametrize("permute_ties", [False, True])
+def test_make_categorical_samples_batch(permute_ties):
+    """Test the majority voting of categorical features."""
+    # Two continuous features, a categorical feature with 3 categories and a
+    # categorical feature with 2 categories
+    categories_size = [2, 3, 2]
+    neighbors_categorical = np.array(
+        [
+            [[1, 0, 0, 0, 1], [1, 0, 0, 1, 0], [0, 1, 0, 0, 1]],
+            [[0, 0, 1, 1, 0], [0, 1, 0, 0, 1], [0, 0, 1, 1, 0]],
+        ]
+        * 100,
+        dtype=float,
+    )
+    X_new = np.zeros((200, 7))
+    X_new = _make_categorical_samples_batch(
+        X_new,
+        neighbors_categorical,
+        categories_size,
+        check_random_state(RND_SEED),
+        permute_ties,
+    )
+    assert_array_equal(X_new[:, :2], 0)
+    assert_array_equal(X_new[:, 2:5].sum(axis=1), 1)
+    assert_array_equal(X_new[:, 5:].sum(axis=1), 1)
+    assert_array_equal(X_new[::2, 2:], np.tile([1, 0, 0, 0, 1], (100, 1)))
+    assert_array_equal(X_new[1::2, 2:], np.tile([0, 0, 1, 1, 0], (100, 1)))
+
+    # Ties are broken randomly
+    neighbors_categorical = np.tile([[[1, 0, 0, 1, 0], [0, 1, 0, 0, 1]]], (200, 1, 1))
+    X_new = _make_categorical_samples_batch(
+        np.zeros((200, 7)),
+        neighbors_categorical,
+        categories_size,
+        check_random_state(RND_SEED),
+        permute_ties,
+    )
+    assert_array_equal(X_new[:, 4], 0)
+    assert 0 < X_new[:, 2].sum() < 200
+    assert 0 < X_new[:, 5].sum() < 200
+
+
+def test_make_categorical_samples_batch_permute_ties():
+    """Test that permuted ties are broken as the sample by sample vote."""
+    categories_size = [1, 3, 4, 2]
+    rng = np.random.RandomState(RND_SEED)
+    neighbors_categorical = np.concatenate(
+        [np.eye(size)[rng.randint(size, size=(50, 4))] for size in categories_size[1:]],
+        axis=2,
+    )
+    X_new = _make_categorical_samples_batch(
+        np.zeros((50, 10)),
+        neighbors_categorical,
+        categories_size,
+        check_random_state(RND_SEED),
+        permute_ties=True,
+    )
+
+    # Vote of a single sample, with a permutation of the majority values
+    random_state = check_random_state(RND_SEED)
+    expected = np.zeros((50, 10))
+    bounds = np.cumsum(categories_size)
+    for X_sample, neighbors in zip(expected, neighbors_categorical):
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            col_sums = neighbors[:, start - 1 : end - 1].sum(axis=0)
+            is_max = np.isclose(col_sums, col_sums.max())
+            X_sample[start + random_state.permutation(np.argwhere(is_max))[0]] = 1
+    assert_array_equal(X_new, expected)
+
+
 def test_gsmote_default_init():
     """Test the intialization with default parameters."""
     gsmote = GeometricSMOTE()
@@ -282,6 +407,945 @@ def test_gsmote_fit_resample_multiclass(
     assert len(set(Counter(y_resampled).values())) == 1
 
 
+@pytest.mark.parametrize(
+    "selection_strategy, format",
+    [
+        (selection_strategy, format)
+        for selection_strategy in SELECTION_STRATEGY
+        for format in ("csr", "csc")
+    ],
+)
+def test_gsmote_fit_resample_sparse(selection_strategy, format):
+    """Test sparse input returns the same samples as dense input."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=100, weights=[0.7, 0.3])
+    X[X < 0] = 0
+    X_sparse = sparse.csr_matrix(X).asformat(format)
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    )
+    X_res, y_res = gsmote.fit_resample(X, y)
+    X_res_sparse, y_res_sparse = gsmote.fit_resample(X_sparse, y)
+    assert sparse.issparse(X_res_sparse)
+    assert X_res_sparse.format == format
+    assert_allclose(X_res_sparse.toarray(), X_res)
+    assert_array_equal(y_res_sparse, y_res)
+
+
+@pytest.mark.parametrize(
+    "selection_strategy, issparse",
+    [
+        (selection_strategy, issparse)
+        for selection_strategy in SELECTION_STRATEGY
+        for issparse in (False, True)
+    ],
+)
+def test_gsmote_synthetic_only(selection_strategy, issparse):
+    """Test only the generated samples are returned, along with their provenance."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=100,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    X = sparse.csr_matrix(X) if issparse else X
+    X_res, y_res = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    ).fit_resample(X, y)
+    X_new, y_new, provenance = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        synthetic_only=True,
+    ).fit_resample(X, y)
+    assert sparse.issparse(X_new) == issparse
+    assert_allclose(
+        X_new.toarray() if issparse else X_new,
+        X_res[X.shape[0] :].toarray() if issparse else X_res[X.shape[0] :],
+    )
+    assert_array_equal(y_new, y_res[X.shape[0] :])
+
+    # Generated samples lie inside the hypersphere of their center and surface point
+    X = X.toarray() if issparse else X
+    X_new = X_new.toarray() if issparse else X_new
+    centers, surface_points = X[provenance[:, 0]], X[provenance[:, 1]]
+    assert_array_equal(y[provenance[:, 0]], y_new)
+    if selection_strategy == "minority":
+        assert_array_equal(y[provenance[:, 1]], y_new)
+    elif selection_strategy == "majority":
+        assert np.all(y[provenance[:, 1]] != y_new)
+    assert np.all(
+        norm(X_new - centers, axis=1) <= norm(surface_points - centers, axis=1) + 1e-8
+    )
+
+
+@pytest.mark.parametrize(
+    "selection_strategy, issparse",
+    [
+        (selection_strategy, issparse)
+        for selection_strategy in SELECTION_STRATEGY
+        for issparse in (False, True)
+    ],
+)
+def test_gsmote_iter_resample(selection_strategy, issparse):
+    """Test the chunks contain the samples generated by fit_resample."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=100,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    X = sparse.csr_matrix(X) if issparse else X
+    X_new, y_new, _ = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        synthetic_only=True,
+    ).fit_resample(X, y)
+    chunks = list(
+        GeometricSMOTE(
+            random_state=RND_SEED, selection_strategy=selection_strategy
+        ).iter_resample(X, y, chunk_size=7)
+    )
+    assert all(X_chunk.shape[0] <= 7 for X_chunk, _ in chunks)
+    assert all(sparse.issparse(X_chunk) == issparse for X_chunk, _ in chunks)
+    X_chunks = [X_chunk for X_chunk, _ in chunks]
+    X_chunks = sparse.vstack(X_chunks).toarray() if issparse else np.vstack(X_chunks)
+    assert_allclose(X_chunks, X_new.toarray() if issparse else X_new)
+    assert_array_equal(np.hstack([y_chunk for _, y_chunk in chunks]), y_new)
+
+
+@pytest.mark.parametrize("categorical_features", [None, [0]])
+def test_gsmote_fit_sample(categorical_features):
+    """Test sample draws from the data and neighbors stored by fit."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=100,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    if categorical_features is not None:
+        X[:, 0] = np.round(X[:, 0])
+    X_res, y_res, _ = GeometricSMOTE(
+        random_state=RND_SEED,
+        categorical_features=categorical_features,
+        synthetic_only=True,
+    ).fit_resample(X, y)
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED, categorical_features=categorical_features
+    ).fit(X, y)
+    X_new, y_new = gsmote.sample()
+    assert_allclose(X_new, X_res)
+    assert_array_equal(y_new, y_res)
+
+    X_new, y_new = gsmote.sample(random_state=0)
+    gsmote = pickle.loads(pickle.dumps(gsmote))
+    X_new_, y_new_ = gsmote.sample(random_state=0)
+    assert_allclose(X_new, X_new_)
+    assert_array_equal(y_new, y_new_)
+
+    _, y_new = gsmote.sample(20, random_state=0)
+    assert Counter(y_new) == {label: 20 for label in gsmote.sampling_strategy_}
+    _, y_new = gsmote.sample({2: 7, 1: 3}, random_state=0)
+    assert Counter(y_new) == {2: 7, 1: 3}
+    with pytest.raises(ValueError, match="unknown class labels"):
+        gsmote.sample({5: 10})
+
+
+@pytest.mark.parametrize(
+    "categorical_features, categorical_encoding",
+    [(None, "onehot"), ([0], "onehot"), ([0], "ordinal")],
+)
+@pytest.mark.parametrize("issparse", [False, True])
+@pytest.mark.parametrize("random_streams", [False, True])
+def test_gsmote_sample_grid(
+    categorical_features, categorical_encoding, issparse, random_streams
+):
+    """Test the samples of each geometry are the ones drawn by sample."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=100,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    X[:, 0] = np.round(X[:, 0])
+    X = sparse.csr_matrix(X) if issparse else X
+    factors = [(1.0, 0.0), (-0.5, 0.2), (0.3, 1.0)]
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        categorical_features=categorical_features,
+        categorical_encoding=categorical_encoding,
+        random_streams=random_streams,
+    ).fit(X, y)
+    samples = gsmote.sample_grid(factors, random_state=0)
+    assert len(samples) == len(factors)
+    for (truncation_factor, deformation_factor), (X_new, y_new) in zip(
+        factors, samples
+    ):
+        gsmote.set_params(
+            truncation_factor=truncation_factor, deformation_factor=deformation_factor
+        )
+        X_expected, y_expected = gsmote.sample(random_state=0)
+        assert_allclose(_toarray(X_new), _toarray(X_expected))
+        assert_array_equal(y_new, y_expected)
+
+    with pytest.raises(ValueError, match="factors should be a sequence"):
+        gsmote.sample_grid([1.0, 0.0])
+
+
+@pytest.mark.parametrize(
+    "categorical_features, categorical_encoding",
+    [(None, "onehot"), ([0], "onehot"), ([0], "ordinal")],
+)
+@pytest.mark.parametrize("issparse", [False, True])
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_plan(
+    categorical_features, categorical_encoding, issparse, selection_strategy
+):
+    """Test the samples of a plan do not depend on the samples generated along
+    with them."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=100,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    X[:, 0] = np.round(X[:, 0])
+    X_ = sparse.csr_matrix(X) if issparse else X
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        categorical_features=categorical_features,
+        categorical_encoding=categorical_encoding,
+        selection_strategy=selection_strategy,
+    ).fit(X_, y)
+    plan = gsmote.plan(random_state=0)
+    assert Counter(plan.y) == gsmote.sampling_strategy_
+    assert plan.nbytes < len(plan) * X.shape[1] * X.itemsize / 4
+
+    X_new, y_new = plan.materialize()
+    X_new = _toarray(X_new)
+    assert_array_equal(y_new, plan.y)
+    assert_allclose(_toarray(plan[::-1][0]), X_new[::-1])
+    assert_allclose(_toarray(plan[7][0]), X_new[7:8])
+    assert_allclose(
+        np.vstack([_toarray(X_batch) for X_batch, _ in plan.iter_batches(6)]), X_new
+    )
+    X_rebuilt, _ = SyntheticPlan(
+        gsmote, plan.y, plan.center_indices, plan.surface_indices, plan.seeds
+    ).materialize()
+    assert_allclose(_toarray(X_rebuilt), X_new)
+    assert_array_equal(gsmote.plan(random_state=0).seeds, plan.seeds)
+
+    # The samples lie in the geometric regions of their center and surface points
+    if categorical_features is None:
+        radii = norm(X[plan.surface_indices] - X[plan.center_indices], axis=1)
+        distances = norm(X_new - X[plan.center_indices], axis=1)
+        assert (distances <= radii + 1e-8).all()
+    else:
+        assert set(X_new[:, 0]) <= set(X[:, 0])
+    assert plan[:0][0].shape == (0, X.shape[1])
+
+
+@pytest.mark.parametrize(
+    "categorical_features, categorical_encoding",
+    [(None, "onehot"), ([0], "onehot"), ([0], "ordinal")],
+)
+@pytest.mark.parametrize("issparse", [False, True])
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_partial_fit(
+    categorical_features, categorical_encoding, issparse, selection_strategy
+):
+    """Test the buffer follows the sampling strategy and only the artificial
+    samples whose neighborhoods changed are generated again."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=200,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    X[:, 0] = np.round(X[:, 0])
+    X_ = sparse.csr_matrix(X) if issparse else X
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        categorical_features=categorical_features,
+        categorical_encoding=categorical_encoding,
+        selection_strategy=selection_strategy,
+    ).partial_fit(X_[:150], y[:150])
+    assert Counter(gsmote.y_buffer_) == gsmote.sampling_strategy_
+    X_buffer, plan = _toarray(gsmote.X_buffer_), gsmote.plan_
+
+    gsmote.partial_fit(X_[150:], y[150:])
+    assert Counter(gsmote.y_buffer_) == gsmote.sampling_strategy_
+    assert gsmote.sampling_strategy_ == GeometricSMOTE().fit(X, y).sampling_strategy_
+    assert_array_equal(gsmote._class_neighbors.y_, y)
+
+    # The unchanged samples are kept
+    kept = np.isin(plan.seeds, gsmote.plan_.seeds)
+    assert kept.any()
+    assert_allclose(
+        _toarray(gsmote.X_buffer_)[: kept.sum()],
+        X_buffer[kept],
+    )
+    X_new, y_new = gsmote.plan_.materialize()
+    assert_allclose(_toarray(X_new), _toarray(gsmote.X_buffer_))
+    assert_array_equal(y_new, gsmote.y_buffer_)
+
+    # A new fit discards the buffer
+    gsmote.fit(X_, y)
+    assert not hasattr(gsmote, "plan_")
+
+
+@pytest.mark.parametrize(
+    "categorical_encoding, metric",
+    [("onehot", "euclidean"), ("onehot", "manhattan"), ("ordinal", "euclidean")],
+)
+def test_gsmote_pairwise_distances(categorical_encoding, metric):
+    """Test the pairwise distances used to discard the neighborhoods changed by
+    partial_fit are consistent with the row-wise distances."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=50)
+    X[:, 0] = np.round(X[:, 0])
+    gsmote = GeometricSMOTE(
+        categorical_features=[0],
+        categorical_encoding=categorical_encoding,
+        metric=metric,
+    ).fit(X, y)
+    X_encoded = gsmote._class_neighbors.X_
+    distances = gsmote._pairwise_distances(X_encoded[:10], X_encoded[10:20])
+    assert distances.shape == (10, 10)
+    assert_allclose(
+        np.diag(distances),
+        gsmote._distances(X_encoded[:10], X_encoded[10:20]),
+        atol=1e-7,
+    )
+
+
+def test_gsmote_partial_fit_buffer_size():
+    """Test the buffer is scaled down to its size."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=200,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    gsmote = GeometricSMOTE(random_state=RND_SEED, buffer_size=40)
+    gsmote.partial_fit(X[:100], y[:100], sample_weight=np.ones(100))
+    gsmote.partial_fit(X[100:], y[100:])
+    n_samples = sum(gsmote.sampling_strategy_.values())
+    assert Counter(gsmote.y_buffer_) == {
+        label: n * 40 // n_samples for label, n in gsmote.sampling_strategy_.items()
+    }
+    assert gsmote._sample_weight.shape == (200,)
+
+
+@pytest.mark.parametrize("graph", [False, True])
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_precomputed(graph, selection_strategy):
+    """Test precomputed distances return the same samples as searching the
+    data."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=200,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    distances = (
+        kneighbors_graph(X, 100, mode="distance") if graph else pairwise_distances(X)
+    )
+    X_expected, y_expected = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    ).fit_resample(X, y)
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        metric="precomputed",
+    )
+    X_res, y_res = gsmote.fit_resample(X, y, distances=distances)
+    assert_allclose(X_res, X_expected)
+    assert_array_equal(y_res, y_expected)
+    X_new, _ = gsmote.fit(X, y, distances=distances).sample(random_state=RND_SEED)
+    assert_allclose(X_new, X_expected[X.shape[0] :])
+    with pytest.raises(ValueError, match="does not support metric='precomputed'"):
+        gsmote.partial_fit(X, y)
+
+
+def test_gsmote_precomputed_graph_neighbors():
+    """Test a graph of distances without enough neighbors of the same class
+    raises an error naming the class."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=200,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.2, 0.3, 0.5],
+    )
+    distances = kneighbors_graph(X, 10, mode="distance")
+    gsmote = GeometricSMOTE(random_state=RND_SEED, metric="precomputed")
+    with pytest.raises(ValueError, match="do not contain 6 samples of class 0"):
+        gsmote.fit_resample(X, y, distances=distances)
+
+
+def test_gsmote_custom_metric():
+    """Test a callable metric returns the same samples as the equivalent
+    metric name."""
+    X, y = make_classification(
+        random_state=RND_SEED, n_samples=100, weights=[0.3, 0.7], n_features=4
+    )
+    X_expected, _ = GeometricSMOTE(
+        random_state=RND_SEED, metric="manhattan"
+    ).fit_resample(X, y)
+    X_res, _ = GeometricSMOTE(
+        random_state=RND_SEED, metric=lambda a, b: np.abs(a - b).sum()
+    ).fit_resample(X, y)
+    assert_allclose(X_res, X_expected)
+
+
+@pytest.mark.parametrize(
+    "params, distances, err_msg",
+    [
+        (dict(metric="precomputed"), None, "distances are required"),
+        (dict(), np.zeros((30, 30)), "only used when metric='precomputed'"),
+        (dict(metric="precomputed"), np.zeros((30, 20)), "should be of shape"),
+        (dict(metric="minkowski"), None, "Unknown metric"),
+        (
+            dict(metric="manhattan", k_neighbors=NearestNeighbors(n_neighbors=3)),
+            None,
+            "k_neighbors must be an int",
+        ),
+        (
+            dict(
+                metric="manhattan",
+                categorical_features=[0],
+                categorical_encoding="ordinal",
+            ),
+            None,
+            "requires metric='euclidean'",
+        ),
+    ],
+)
+def test_gsmote_metric_error(params, distances, err_msg):
+    X, y = make_classification(
+        random_state=RND_SEED, n_samples=30, weights=[0.3, 0.7], n_features=4
+    )
+    X[:, 0] = np.round(X[:, 0])
+    with pytest.raises(ValueError, match=err_msg):
+        GeometricSMOTE(**params).fit_resample(X, y, distances=distances)
+
+
+def test_row_streams():
+    """Test the random numbers of each row only depend on its seed."""
+    seeds = check_random_state(RND_SEED).randint(2**63, size=20000, dtype=np.uint64)
+    streams = _RowStreams(seeds)
+    uniform_samples = streams.random((seeds.size, 2))
+    normal_samples = streams.normal(size=seeds.size)
+    mask = np.arange(seeds.size) % 3 == 0
+    streams = _RowStreams(seeds).take(mask)
+    assert_array_equal(streams.random((mask.sum(), 2)), uniform_samples[mask])
+    assert_array_equal(streams.normal(size=mask.sum()), normal_samples[mask])
+    assert ((uniform_samples > 0) & (uniform_samples < 1)).all()
+    assert abs(uniform_samples.mean() - 0.5) < 0.01
+    assert abs(normal_samples.mean()) < 0.03
+    assert abs(normal_samples.std() - 1) < 0.03
+    other_samples = _RowStreams(seeds, key=1).random((seeds.size, 2))
+    assert abs(np.corrcoef(uniform_samples[:, 0], other_samples[:, 0])[0, 1]) < 0.03
+
+
+@pytest.mark.parametrize("categorical_features", [None, [0]])
+def test_gsmote_cache(monkeypatch, categorical_features):
+    """Test clones sharing a cache reuse the encoding and nearest neighbors."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=100, weights=[0.2, 0.8])
+    X[:, 0] = np.round(X[:, 0])
+    cache = GeometricSMOTECache()
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED, categorical_features=categorical_features, cache=cache
+    )
+    X_res, y_res = gsmote.fit_resample(X, y)
+    assert cache.cache_info()[:2] == (0, 1)
+
+    # A cache hit does not search the nearest neighbors
+    def kneighbors(*args, **kwargs):
+        raise AssertionError("The nearest neighbors are searched.")
+
+    monkeypatch.setattr(NearestNeighbors, "kneighbors", kneighbors)
+    gsmote_clone = clone(gsmote).set_params(truncation_factor=0.0)
+    assert gsmote_clone.cache is cache
+    X_res_clone, _ = gsmote_clone.fit_resample(X, y)
+    assert cache.cache_info()[:2] == (1, 1)
+    monkeypatch.undo()
+
+    # The clones share the data, indexes and nearest neighbors, which are
+    # read-only
+    (state,) = [value for value, _ in cache._entries.values()]
+    class_neighbors = state["_class_neighbors"]
+    assert gsmote_clone._class_neighbors is not class_neighbors
+    assert gsmote_clone._class_neighbors.X_ is class_neighbors.X_
+    assert gsmote_clone._class_neighbors.estimator_neg_ is (
+        class_neighbors.estimator_neg_
+    )
+    label = min(Counter(y), key=Counter(y).get)
+    for cache_name in ("neighbors_pos_", "neighbors_neg_"):
+        neighbors = getattr(class_neighbors, cache_name)[label]
+        assert (neighbors >= 0).all()
+        assert not neighbors.flags.writeable
+        assert getattr(gsmote_clone._class_neighbors, cache_name)[label] is neighbors
+
+    # Clones sharing the cache resample concurrently
+    clones = [clone(gsmote).set_params(working_memory=1) for _ in range(4)]
+    results = Parallel(n_jobs=4, prefer="threads")(
+        delayed(gsmote.fit_resample)(X, y) for gsmote in clones
+    )
+    for X_res_thread, y_res_thread in results:
+        assert_array_equal(X_res_thread, X_res)
+        assert_array_equal(y_res_thread, y_res)
+    assert class_neighbors.working_memory is None
+    X_res_clone, y_res_clone = clone(gsmote).fit_resample(X, y)
+    assert_array_equal(X_res_clone, X_res)
+    assert_array_equal(y_res_clone, y_res)
+
+    # Different data or neighbors parameters are not reused
+    clone(gsmote).set_params(k_neighbors=3).fit_resample(X, y)
+    clone(gsmote).fit_resample(X[::-1], y[::-1])
+    assert cache.cache_info()[:2] == (6, 3)
+
+    # The least recently used entries are discarded
+    cache = GeometricSMOTECache(max_bytes=3 * X.nbytes)
+    for k_neighbors in (3, 4, 3):
+        GeometricSMOTE(k_neighbors=k_neighbors, cache=cache).fit_resample(X, y)
+    hits, misses, max_bytes, current_bytes = cache.cache_info()
+    assert (hits, misses, max_bytes) == (0, 3, 3 * X.nbytes)
+    assert 2 * X.nbytes < current_bytes < 3 * X.nbytes
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 3 * X.nbytes, 0)
+
+
+@pytest.mark.parametrize("categorical_features", [None, [0]])
+def test_gsmote_sample_out(tmp_path, categorical_features):
+    """Test the samples are written in a memory-mapped array or .npy file."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=100, weights=[0.2, 0.8])
+    if categorical_features is not None:
+        X[:, 0] = np.round(X[:, 0])
+    np.save(tmp_path / "X.npy", X)
+    X = np.load(tmp_path / "X.npy", mmap_mode="r")
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED, categorical_features=categorical_features
+    ).fit(X, y)
+    X_new, y_new = gsmote.sample(50, random_state=0)
+
+    out = np.lib.format.open_memmap(
+        tmp_path / "out.npy", mode="w+", dtype=X.dtype, shape=X_new.shape
+    )
+    X_out, y_out = gsmote.sample(50, random_state=0, out=out)
+    assert X_out is out
+    assert_allclose(out, X_new)
+    assert_array_equal(y_out, y_new)
+
+    gsmote.sample(50, random_state=0, out=tmp_path / "path.npy")
+    assert_allclose(np.load(tmp_path / "path.npy"), X_new)
+
+    with pytest.raises(ValueError, match="out should be an array of shape"):
+        gsmote.sample(50, out=np.empty((10, X.shape[1])))
+    gsmote.fit(sparse.csr_matrix(X), y)
+    with pytest.raises(ValueError, match="only supported for dense data"):
+        gsmote.sample(50, out=out)
+
+
+@pytest.mark.parametrize("issparse", [False, True])
+def test_gsmote_categorical_chunks(issparse):
+    """Test the samples generated and decoded in chunks of bounded memory are
+    equal to the ones generated at once."""
+    X, y = make_classification(
+        random_state=RND_SEED, n_samples=200, n_features=6, weights=[0.2, 0.8]
+    )
+    X[:, 1], X[:, 4] = np.round(X[:, 1]), np.round(2 * X[:, 4])
+    X = sparse.csr_matrix(X) if issparse else X
+    params = dict(random_state=RND_SEED, categorical_features=[1, 4])
+    X_res, y_res = GeometricSMOTE(**params).fit_resample(X, y)
+    gsmote = GeometricSMOTE(working_memory=0.002, **params)
+    X_res_chunks, y_res_chunks = gsmote.fit_resample(X, y)
+    assert_allclose(_toarray(X_res_chunks), _toarray(X_res))
+    assert_array_equal(y_res_chunks, y_res)
+
+    if not issparse:
+        X_new, _ = gsmote.sample(50, random_state=0)
+        out = np.empty_like(X_new)
+        gsmote.sample(50, random_state=0, out=out)
+        assert_allclose(out, X_new)
+
+
+@pytest.mark.parametrize(
+    "selection_strategy, categorical_encoding",
+    [
+        (selection_strategy, categorical_encoding)
+        for selection_strategy in SELECTION_STRATEGY
+        for categorical_encoding in (None, "onehot", "ordinal")
+    ],
+)
+def test_gsmote_float32(selection_strategy, categorical_encoding):
+    """Test float32 data are processed in float32, within float32 precision of the
+    samples generated from float64 data."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=100, weights=[0.7, 0.3])
+    params = dict(random_state=RND_SEED, selection_strategy=selection_strategy)
+    if categorical_encoding is not None:
+        X[:, -1] = X[:, -1] > 0
+        params.update(
+            categorical_features=[X.shape[1] - 1],
+            categorical_encoding=categorical_encoding,
+        )
+    X_res, y_res = GeometricSMOTE(**params).fit_resample(X, y)
+    gsmote = GeometricSMOTE(**params)
+    X_res_32, y_res_32 = gsmote.fit_resample(X.astype(np.float32), y)
+    assert X_res_32.dtype == np.float32
+    assert gsmote._class_neighbors.X_.dtype == np.float32
+    assert_allclose(X_res_32, X_res, rtol=1e-5, atol=1e-5)
+    assert_array_equal(y_res_32, y_res)
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [
+        [1.0, 1.0, 1.0, 1.0],
+        [0.0, 1.0, 0.0, 3.0],
+        [1000.0] + [1.0] * 50,
+        check_random_state(RND_SEED).exponential(size=500),
+    ],
+)
+def test_alias_table(weights):
+    """Test the alias table represents the distribution of the weights."""
+    weights = np.asarray(weights)
+    prob, alias = _alias_table(weights)
+    assert ((prob >= 0) & (prob <= 1)).all()
+    probabilities = (
+        prob + np.bincount(alias, weights=1 - prob, minlength=weights.size)
+    ) / weights.size
+    assert_allclose(probabilities, weights / weights.sum())
+
+
+def test_weighted_sampler():
+    """Test the weighted sampler draws the same indices as RandomState.choice and
+    follows the weights with a Generator."""
+    weights = check_random_state(RND_SEED).exponential(size=50)
+    sampler = _WeightedSampler(50, 3, weights)
+    p = np.repeat(weights, 3) / (weights.sum() * 3)
+    assert_array_equal(
+        sampler.sample(100, check_random_state(RND_SEED)),
+        check_random_state(RND_SEED).choice(range(150), size=100, p=p),
+    )
+    indices = sampler.sample(200000, np.random.default_rng(RND_SEED))
+    assert_allclose(np.bincount(indices, minlength=150) / indices.size, p, atol=3e-3)
+
+
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_lazy_neighbors(selection_strategy):
+    """Test only the neighbors of the drawn centers are searched, when fewer
+    samples than the class size are generated."""
+    X, y = make_classification(
+        random_state=RND_SEED, n_samples=200, weights=[0.45, 0.55]
+    )
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        sampling_strategy={0: np.sum(y == 0) + 5},
+    )
+    X_res, _ = gsmote.fit_resample(X, y)
+    class_neighbors = gsmote._class_neighbors
+    neighbors = (
+        class_neighbors.neighbors_neg_
+        if selection_strategy == "majority"
+        else class_neighbors.neighbors_pos_
+    )
+    assert 0 < np.sum(neighbors[0][:, 0] >= 0) <= 5
+
+    # The samples are the ones generated after a full search
+    gsmote.fit(X, y)._class_neighbors.query([0])
+    X_full, _ = gsmote.sample(random_state=RND_SEED)
+    assert_array_equal(X_res[X.shape[0] :], X_full)
+
+
+class _RecordingNeighbors(NearestNeighbors):
+    """Records the number of queries and the working memory of each search."""
+
+    queries = []
+
+    def kneighbors(self, X=None, n_neighbors=None, return_distance=True):
+        self.queries.append((X.shape[0], get_config()["working_memory"]))
+        return super().kneighbors(X, n_neighbors, return_distance)
+
+
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_working_memory(selection_strategy):
+    """Test the nearest neighbors are searched in blocks that fit in the working
+    memory, without changing the generated samples."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=200, weights=[0.7])
+    X_res, y_res = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    ).fit_resample(X, y)
+    _RecordingNeighbors.queries = []
+    X_res_blocks, y_res_blocks = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        k_neighbors=_RecordingNeighbors(n_neighbors=6),
+        working_memory=0.01,
+    ).fit_resample(X, y)
+    assert_allclose(X_res_blocks, X_res)
+    assert_array_equal(y_res_blocks, y_res)
+    if selection_strategy != "majority":
+        assert len(_RecordingNeighbors.queries) > 1
+        assert all(
+            n_queries <= 0.01 * 2**20 // (8 * (X.shape[1] + 32))
+            and working_memory == 0.01
+            for n_queries, working_memory in _RecordingNeighbors.queries
+        )
+
+
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_n_jobs(selection_strategy):
+    """Test the generated samples do not depend on the number of jobs."""
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=200,
+        n_classes=4,
+        n_informative=4,
+        weights=[0.1, 0.2, 0.3, 0.4],
+    )
+    X_res, y_res = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    ).fit_resample(X, y)
+    X_res_parallel, y_res_parallel = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy, n_jobs=2
+    ).fit_resample(X, y)
+    assert_array_equal(X_res_parallel, X_res)
+    assert_array_equal(y_res_parallel, y_res)
+
+
+@pytest.mark.parametrize("categorical_features", [None, [0]])
+@pytest.mark.parametrize("issparse", [False, True])
+def test_gsmote_random_streams(monkeypatch, categorical_features, issparse):
+    """Test random streams give the same samples for any number of jobs and
+    chunks."""
+    monkeypatch.setattr(gsmote_module, "STREAM_BLOCK_SIZE", 16)
+    X, y = make_classification(
+        random_state=RND_SEED,
+        n_samples=200,
+        n_classes=3,
+        n_informative=3,
+        weights=[0.1, 0.3, 0.6],
+    )
+    X[:, 0] = np.round(X[:, 0])
+    X = sparse.csr_matrix(X) if issparse else X
+    params = dict(
+        random_state=RND_SEED,
+        categorical_features=categorical_features,
+        random_streams=True,
+    )
+    X_res, y_res, provenance = GeometricSMOTE(
+        synthetic_only=True, **params
+    ).fit_resample(X, y)
+    X_res_parallel, y_res_parallel, provenance_parallel = GeometricSMOTE(
+        synthetic_only=True, n_jobs=2, **params
+    ).fit_resample(X, y)
+    chunks = list(GeometricSMOTE(**params).iter_resample(X, y, chunk_size=5))
+    X_chunks = [X_chunk for X_chunk, _ in chunks]
+    X_chunks = sparse.vstack(X_chunks) if issparse else np.vstack(X_chunks)
+
+    if issparse:
+        X_res, X_res_parallel, X_chunks = (
+            X_res.toarray(),
+            X_res_parallel.toarray(),
+            X_chunks.toarray(),
+        )
+    assert_array_equal(X_res_parallel, X_res)
+    assert_array_equal(y_res_parallel, y_res)
+    assert_array_equal(provenance_parallel, provenance)
+    assert_array_equal(X_chunks, X_res)
+    assert_array_equal(np.hstack([y_chunk for _, y_chunk in chunks]), y_res)
+
+    X_legacy, _, _ = GeometricSMOTE(
+        random_state=RND_SEED,
+        categorical_features=categorical_features,
+        synthetic_only=True,
+    ).fit_resample(X, y)
+    assert not np.allclose(_toarray(X_legacy), X_res)
+
+
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_approximate_neighbors(selection_strategy):
+    """Test approximate neighbors with a single leaf match the exact search."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=100, weights=[0.7, 0.3])
+    X_res, y_res = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    ).fit_resample(X, y)
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        k_neighbors=RandomProjectionNeighbors(n_neighbors=6, leaf_size=100),
+    )
+    X_res_approximate, y_res_approximate = gsmote.fit_resample(X, y)
+    assert_allclose(X_res_approximate, X_res)
+    assert_array_equal(y_res_approximate, y_res)
+    X_res_sparse, _ = clone(gsmote).fit_resample(sparse.csr_matrix(X), y)
+    assert_allclose(X_res_sparse.toarray(), X_res)
+    if selection_strategy != "minority":
+        assert isinstance(gsmote.nn_neg_, RandomProjectionNeighbors)
+        assert gsmote.nn_neg_.n_neighbors == 1
+
+
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_brute_force_neighbors(selection_strategy):
+    """Test the blocked brute force search matches the default search."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=100, weights=[0.7, 0.3])
+    X_res, y_res = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    ).fit_resample(X, y)
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        k_neighbors=BruteForceNeighbors(n_neighbors=6),
+    )
+    X_res_brute, y_res_brute = gsmote.fit_resample(X, y)
+    assert_allclose(X_res_brute, X_res)
+    assert_array_equal(y_res_brute, y_res)
+    if selection_strategy != "minority":
+        assert isinstance(gsmote.nn_neg_, BruteForceNeighbors)
+        assert gsmote.nn_neg_.n_neighbors == 1
+
+
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_cluster_neighbors(selection_strategy):
+    """Test the cluster-local search probing all the clusters matches the
+    default search."""
+    X, y = make_classification(random_state=RND_SEED, n_samples=100, weights=[0.7, 0.3])
+    X_res, y_res = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    ).fit_resample(X, y)
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        k_neighbors=ClusterNeighbors(
+            n_neighbors=6, n_clusters=4, n_probe=4, random_state=RND_SEED
+        ),
+    )
+    X_res_cluster, y_res_cluster = gsmote.fit_resample(X, y)
+    assert_allclose(X_res_cluster, X_res)
+    assert_array_equal(y_res_cluster, y_res)
+    if selection_strategy != "minority":
+        assert isinstance(gsmote.nn_neg_, ClusterNeighbors)
+        assert gsmote.nn_neg_.n_neighbors == 1
+
+
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmote_estimate_cost(selection_strategy):
+    """Test the estimated cost matches the samples generated and the distinct
+    center points queried."""
+    X, y = make_classification(
+        random_state=RND_SEED, n_samples=1000, weights=[0.8, 0.2], n_features=10
+    )
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED, selection_strategy=selection_strategy
+    )
+    cost = gsmote.estimate_cost(X, y)
+    assert not hasattr(gsmote, "sampling_strategy_")
+    gsmote.fit_resample(X, y)
+    assert cost.n_samples_new == sum(gsmote.sampling_strategy_.values())
+    class_neighbors = gsmote._class_neighbors
+    n_queries = sum(
+        class_neighbors.is_cached(
+            label, np.arange(len(indices)), pos=pos, neg=not pos
+        ).sum()
+        for label, indices in class_neighbors.class_indices_.items()
+        if label in gsmote.sampling_strategy_
+        for pos in (True, False)
+        if selection_strategy != ("majority" if pos else "minority")
+    )
+    assert cost.n_queries == pytest.approx(n_queries, rel=0.1)
+    assert cost.peak_bytes > X.nbytes
+    assert cost.time > 0
+
+    X_large, y_large = np.vstack([X] * 4), np.hstack([y] * 4)
+    cost_large = gsmote.estimate_cost(X_large, y_large)
+    assert cost_large.n_samples_new == 4 * cost.n_samples_new
+    assert cost_large.peak_bytes > cost.peak_bytes
+
+
+def test_gsmote_autotune():
+    """Test the auto-tuning respects the memory and thread limits."""
+    X, y = make_classification(
+        random_state=RND_SEED, n_samples=2000, weights=[0.8, 0.2], n_features=50
+    )
+    gsmote = GeometricSMOTE(random_state=RND_SEED).autotune(X, y, max_jobs=2)
+    assert gsmote.n_jobs in (1, 2)
+    assert gsmote.k_neighbors == 5
+    assert gsmote.working_memory is None
+
+    fixed_bytes = gsmote._estimate_cost(gsmote._cost_inputs(X, y), 5, 0, 1).peak_bytes
+    max_memory = fixed_bytes + 2 * 2**20
+    gsmote = GeometricSMOTE(random_state=RND_SEED, working_memory=1024).autotune(
+        X, y, max_memory=max_memory, max_jobs=1
+    )
+    assert gsmote.n_jobs == 1
+    assert gsmote.working_memory == 2
+    assert gsmote.estimate_cost(X, y).peak_bytes <= max_memory
+    gsmote.fit_resample(X, y)
+
+    # A float budget that is not a whole number of MiB above the fixed memory
+    max_memory = float(fixed_bytes + 1.5 * 2**20)
+    gsmote = GeometricSMOTE(random_state=RND_SEED, working_memory=1024).autotune(
+        X, y, max_memory=max_memory, max_jobs=2
+    )
+    assert isinstance(gsmote.working_memory, int)
+    assert gsmote.working_memory == 1
+    assert gsmote.estimate_cost(X, y).peak_bytes <= max_memory
+
+    gsmote = GeometricSMOTE(random_state=RND_SEED).autotune(X, y, approximate=True)
+    assert gsmote.estimate_cost(X, y).time <= (
+        GeometricSMOTE(random_state=RND_SEED, n_jobs=gsmote.n_jobs)
+        .estimate_cost(X, y)
+        .time
+    )
+
+    with pytest.raises(ValueError, match="above max_memory"):
+        GeometricSMOTE().autotune(X, y, max_memory=X.nbytes)
+
+
+@pytest.mark.parametrize("blas_threads", [1, 8])
+def test_gsmote_autotune_threads(monkeypatch, blas_threads):
+    """Test the estimated speedup of the threads is limited by the classes, the
+    CPUs left by the BLAS and the serial parts of the resampling."""
+    monkeypatch.setattr(gsmote_module, "cpu_count", lambda: 8)
+    monkeypatch.setattr(
+        gsmote_module,
+        "threadpool_info",
+        lambda: [{"user_api": "blas", "num_threads": blas_threads}],
+    )
+    X, y = make_classification(
+        random_state=RND_SEED, n_samples=2000, weights=[0.8, 0.2], n_features=50
+    )
+    inputs = GeometricSMOTE()._cost_inputs(X, y)
+    assert inputs["class_counts"][1] <= inputs["sampling_strategy"][1]
+    for selection_strategy, n_indexes in (("minority", 1), ("combined", 2)):
+        gsmote = GeometricSMOTE(selection_strategy=selection_strategy)
+        times = [
+            gsmote._estimate_cost(inputs, 5, None, n_jobs).time for n_jobs in (1, 2, 8)
+        ]
+        if blas_threads == 8 or n_indexes == 1:
+            assert times[0] == times[1] == times[2]
+        else:
+            assert times[0] > times[1] == times[2]
+            assert times[1] > times[0] * gsmote_module.SERIAL_FRACTION
+        assert gsmote.autotune(X, y, max_jobs=8).n_jobs == (
+            1 if blas_threads == 8 else n_indexes
+        )
+
+        # The samples of a class smaller than its samples to generate are all
+        # queried
+        assert gsmote.estimate_cost(X, y).n_queries == n_indexes * (
+            inputs["class_counts"][1]
+        )
+
+
 def test_categorical_error():
     X, y, _ = data_heterogeneous_unordered()
     categorical_features = [0, 10]
@@ -291,18 +1355,26 @@ def test_categorical_error():
 
 
 @pytest.mark.parametrize(
-    "data",
+    "data, categorical_encoding",
     [
-        data_heterogeneous_ordered(),
-        data_heterogeneous_unordered(),
-        data_heterogeneous_masked(),
-        data_sparse("csr"),
-        data_sparse("csc"),
+        (data, categorical_encoding)
+        for data in [
+            data_heterogeneous_ordered(),
+            data_heterogeneous_unordered(),
+            data_heterogeneous_masked(),
+            data_sparse("csr"),
+            data_sparse("csc"),
+        ]
+        for categorical_encoding in ("onehot", "ordinal")
     ],
 )
-def test_gsmotenc(data):
+def test_gsmotenc(data, categorical_encoding):
     X, y, categorical_features = data
-    gsmote = GeometricSMOTE(random_state=0, categorical_features=categorical_features)
+    gsmote = GeometricSMOTE(
+        random_state=0,
+        categorical_features=categorical_features,
+        categorical_encoding=categorical_encoding,
+    )
     X_resampled, y_resampled = gsmote.fit_resample(X, y)
 
     assert X_resampled.dtype == X.dtype
@@ -319,6 +1391,42 @@ def test_gsmotenc(data):
             assert X[:, cat_idx].dtype == X_resampled[:, cat_idx].dtype
 
 
+@pytest.mark.parametrize("selection_strategy", SELECTION_STRATEGY)
+def test_gsmotenc_ordinal_high_cardinality(selection_strategy):
+    """Test the ordinal encoding keeps the original number of features."""
+    rng = np.random.RandomState(RND_SEED)
+    X = np.hstack([rng.randn(200, 2), rng.randint(1000, size=(200, 2))])
+    y = np.array([0] * 40 + [1] * 160)
+    gsmote = GeometricSMOTE(
+        random_state=RND_SEED,
+        selection_strategy=selection_strategy,
+        categorical_features=[2, 3],
+        categorical_encoding="ordinal",
+    )
+    X_res, y_res = gsmote.fit_resample(X, y)
+    assert Counter(y_res) == {0: 160, 1: 160}
+    assert not hasattr(gsmote, "ohe_")
+    assert len(gsmote.ordinal_encoder_.categories_) == 2
+    for cat_idx in (2, 3):
+        assert set(X_res[:, cat_idx]).issubset(X[:, cat_idx])
+
+
+def test_gsmotenc_invalid_categorical_encoding():
+    X, y, categorical_features = data_heterogeneous_unordered()
+    gsmote = GeometricSMOTE(
+        categorical_features=categorical_features, categorical_encoding="binary"
+    )
+    with pytest.raises(ValueError, match="Unknown categorical_encoding"):
+        gsmote.fit_resample(X, y)
+    gsmote = GeometricSMOTE(
+        categorical_features=categorical_features,
+        categorical_encoding="ordinal",
+        k_neighbors=NearestNeighbors(n_neighbors=3),
+    )
+    with pytest.raises(ValueError, match="k_neighbors must be an int"):
+        gsmote.fit_resample(X, y)
+
+
 # part of the common test which apply to GSMOTE-NC even if it is not default
 # constructible
 def test_smotenc_check_target_type():
@@ -0,0 +1,340 @@
+"""
+Test the neighbors module.
+"""
+
+import pytest
+import numpy as np
+from scipy import sparse
+from sklearn import config_context
+from sklearn.metrics import pairwise_distances
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.utils._testing import assert_allclose, assert_array_equal
+
+from .._neighbors import (
+    BruteForceNeighbors,
+    ClusterNeighbors,
+    RandomProjectionNeighbors,
+    _MixedNeighbors,
+    _ClassNeighbors,
+)
+
+RND_SEED = 0
+
+
+@pytest.mark.parametrize("issparse", [False, True])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_brute_force_neighbors(issparse, dtype):
+    """Test the blocked search matches the exact search."""
+    X = np.random.RandomState(RND_SEED).randn(300, 8)
+    X_ = sparse.csr_matrix(X) if issparse else X
+    distances, indices = NearestNeighbors(n_neighbors=5).fit(X).kneighbors(X)
+    nn = BruteForceNeighbors(n_neighbors=5, dtype=dtype).fit(X_)
+    with config_context(working_memory=0.01):
+        brute_distances, brute_indices = nn.kneighbors(X_)
+    assert_allclose(
+        brute_distances, distances, atol=1e-2 if dtype is np.float32 else 1e-6
+    )
+    assert_array_equal(brute_indices, indices)
+    assert_array_equal(nn.kneighbors(X_[:3], return_distance=False), indices[:3])
+
+
+def test_brute_force_neighbors_too_many_neighbors():
+    X = np.random.RandomState(RND_SEED).randn(5, 2)
+    nn = BruteForceNeighbors(n_neighbors=6).fit(X)
+    with pytest.raises(ValueError, match="Expected n_neighbors <= n_samples_fit"):
+        nn.kneighbors(X)
+
+
+@pytest.mark.parametrize("issparse", [False, True])
+def test_mixed_neighbors_onehot_equivalence(issparse):
+    """Test the mixed distance is equal to the distance in the one-hot space."""
+    rng = np.random.RandomState(RND_SEED)
+    X_continuous = rng.randn(100, 3)
+    codes = rng.randint(20, size=(100, 2)).astype(float)
+    median_std = 0.7
+    X_ohe = OneHotEncoder(sparse_output=False).fit_transform(codes) * median_std / 2
+    X_mixed = np.hstack([X_continuous, codes])
+    X_mixed = sparse.csr_matrix(X_mixed) if issparse else X_mixed
+
+    distances, indices = (
+        NearestNeighbors(n_neighbors=4)
+        .fit(np.hstack([X_continuous, X_ohe]))
+        .kneighbors(np.hstack([X_continuous, X_ohe]))
+    )
+    nn = _MixedNeighbors(
+        n_neighbors=4, n_continuous=3, categorical_penalty=median_std**2 / 2
+    ).fit(X_mixed)
+    mixed_distances, mixed_indices = nn.kneighbors(X_mixed)
+    assert_allclose(mixed_distances, distances, atol=1e-6)
+    assert_array_equal(mixed_indices, indices)
+    assert_array_equal(nn.kneighbors(X_mixed, return_distance=False), indices)
+
+
+def test_mixed_neighbors_too_many_neighbors():
+    X = np.random.RandomState(RND_SEED).randn(5, 2)
+    nn = _MixedNeighbors(n_neighbors=6).fit(X)
+    with pytest.raises(ValueError, match="Expected n_neighbors <= n_samples_fit"):
+        nn.kneighbors(X)
+
+
+@pytest.mark.parametrize("issparse", [False, True])
+def test_class_neighbors(issparse):
+    """Test the class filtered queries match estimators fitted per query."""
+    rng = np.random.RandomState(RND_SEED)
+    X = rng.randn(120, 4)
+    y = np.repeat([0, 1, 2, 3], [10, 20, 30, 60])
+    X_ = sparse.csr_matrix(X) if issparse else X
+    class_neighbors = _ClassNeighbors(
+        nn_pos=NearestNeighbors(n_neighbors=4), nn_neg=NearestNeighbors(n_neighbors=1)
+    ).fit(X_, y)
+    for label in (0, 1, 2):
+        X_pos, X_neg = X[y == label], X[y != label]
+        neigh_ind = NearestNeighbors(n_neighbors=4).fit(X_pos).kneighbors(X_pos)[1]
+        assert_array_equal(
+            class_neighbors.kneighbors_pos(label),
+            np.flatnonzero(y == label)[neigh_ind[:, 1:]],
+        )
+        neigh_ind = NearestNeighbors(n_neighbors=1).fit(X_neg).kneighbors(X_pos)[1]
+        assert_array_equal(
+            class_neighbors.kneighbors_neg(label), np.flatnonzero(y != label)[neigh_ind]
+        )
+
+    # Each index is built once
+    assert sorted(class_neighbors.estimators_pos_) == [0, 1, 2]
+    assert class_neighbors.estimator_neg_.n_samples_fit_ == X.shape[0]
+
+    # Parallel queries return the same neighbors
+    parallel_class_neighbors = _ClassNeighbors(
+        nn_pos=NearestNeighbors(n_neighbors=4), nn_neg=NearestNeighbors(n_neighbors=1)
+    ).fit(X_, y)
+    parallel_class_neighbors.query([0, 1, 2], n_jobs=2)
+    assert sorted(parallel_class_neighbors.neighbors_pos_) == [0, 1, 2]
+    assert sorted(parallel_class_neighbors.neighbors_neg_) == [0, 1, 2]
+    for label in (0, 1, 2):
+        assert_array_equal(
+            parallel_class_neighbors.kneighbors_pos(label),
+            class_neighbors.kneighbors_pos(label),
+        )
+        assert_array_equal(
+            parallel_class_neighbors.kneighbors_neg(label),
+            class_neighbors.kneighbors_neg(label),
+        )
+
+    # Only the queried rows are searched
+    lazy_class_neighbors = _ClassNeighbors(
+        nn_pos=NearestNeighbors(n_neighbors=4), nn_neg=NearestNeighbors(n_neighbors=1)
+    ).fit(X_, y)
+    rows = np.array([5, 1, 5, 7])
+    assert_array_equal(
+        lazy_class_neighbors.kneighbors_pos(3, rows),
+        class_neighbors.kneighbors_pos(3)[rows],
+    )
+    assert_array_equal(
+        lazy_class_neighbors.kneighbors_neg(3, rows),
+        class_neighbors.kneighbors_neg(3)[rows],
+    )
+    for neighbors in (
+        lazy_class_neighbors.neighbors_pos_,
+        lazy_class_neighbors.neighbors_neg_,
+    ):
+        assert_array_equal(np.flatnonzero(neighbors[3][:, 0] >= 0), [1, 5, 7])
+
+
+@pytest.mark.parametrize("graph", [False, True])
+def test_class_neighbors_precomputed(graph):
+    """Test the precomputed distances sliced per class match searching the
+    data."""
+    rng = np.random.RandomState(RND_SEED)
+    X = rng.randn(120, 4)
+    y = np.repeat([0, 1, 2, 3], [10, 20, 30, 60])
+    distances = pairwise_distances(X)
+    if graph:
+        distances[distances > np.percentile(distances, 90)] = 0
+        distances = sparse.csr_matrix(distances)
+    class_neighbors = _ClassNeighbors(
+        nn_pos=NearestNeighbors(n_neighbors=4), nn_neg=NearestNeighbors(n_neighbors=1)
+    ).fit(X, y)
+    precomputed_class_neighbors = _ClassNeighbors(
+        nn_pos=NearestNeighbors(n_neighbors=4, metric="precomputed"),
+        nn_neg=NearestNeighbors(n_neighbors=1, metric="precomputed"),
+    ).fit(X, y, distances=distances)
+    for label in (0, 1, 2, 3):
+        assert_array_equal(
+            precomputed_class_neighbors.kneighbors_pos(label),
+            class_neighbors.kneighbors_pos(label),
+        )
+        assert_array_equal(
+            precomputed_class_neighbors.kneighbors_neg(label),
+            class_neighbors.kneighbors_neg(label),
+        )
+
+
+@pytest.mark.parametrize("issparse", [False, True])
+def test_class_neighbors_partial_fit(issparse):
+    """Test appending samples matches fitting on all the samples, and only
+    discards the cached neighbors changed by the new samples."""
+    rng = np.random.RandomState(RND_SEED)
+    X = rng.randn(130, 4)
+    y = np.hstack([np.repeat([0, 1, 2, 3], [10, 20, 30, 60]), rng.randint(4, size=10)])
+    X_ = sparse.csr_matrix(X) if issparse else X
+    params = dict(
+        nn_pos=NearestNeighbors(n_neighbors=4), nn_neg=NearestNeighbors(n_neighbors=1)
+    )
+    class_neighbors = _ClassNeighbors(**params).fit(X_, y)
+    partial_class_neighbors = _ClassNeighbors(**params).fit(X_[:120], y[:120])
+    partial_class_neighbors.query([0, 1, 2, 3])
+    neighbors_pos = partial_class_neighbors.neighbors_pos_
+    partial_class_neighbors.partial_fit(X_[120:], y[120:])
+
+    # The previous cache is not modified
+    assert (neighbors_pos[3] >= 0).all()
+    assert 0 < partial_class_neighbors.is_cached(3, np.arange(60)).sum() < 60
+    for label in (0, 1, 2, 3):
+        n_samples = (y[:120] == label).sum()
+        rows = np.flatnonzero(
+            partial_class_neighbors.is_cached(label, np.arange(n_samples), neg=False)
+        )
+        changed = (class_neighbors.kneighbors_pos(label)[:n_samples] >= 120).any(1)
+        assert not changed[rows].any()
+        assert_array_equal(
+            partial_class_neighbors.kneighbors_pos(label),
+            class_neighbors.kneighbors_pos(label),
+        )
+        assert_array_equal(
+            partial_class_neighbors.kneighbors_neg(label),
+            class_neighbors.kneighbors_neg(label),
+        )
+
+
+def test_class_neighbors_copy():
+    """Test copies share the cached neighbors until they complete them."""
+    rng = np.random.RandomState(RND_SEED)
+    X, y = rng.randn(60, 4), np.repeat([0, 1], [20, 40])
+    class_neighbors = _ClassNeighbors(
+        nn_pos=NearestNeighbors(n_neighbors=4), nn_neg=NearestNeighbors(n_neighbors=1)
+    ).fit(X, y)
+    class_neighbors.kneighbors_pos(0)
+    class_neighbors.kneighbors_pos(1, rows=np.arange(5))
+    class_neighbors_copy = class_neighbors.copy()
+    neighbors_pos = class_neighbors.neighbors_pos_
+    assert not any(neighbors.flags.writeable for neighbors in neighbors_pos.values())
+
+    # The complete results are shared, the others are copied when completed
+    class_neighbors_copy.kneighbors_pos(0)
+    class_neighbors_copy.kneighbors_pos(1)
+    assert class_neighbors_copy.neighbors_pos_[0] is neighbors_pos[0]
+    assert class_neighbors_copy.neighbors_pos_[1] is not neighbors_pos[1]
+    assert (neighbors_pos[1][5:] < 0).all()
+    assert_array_equal(
+        class_neighbors_copy.kneighbors_pos(1), class_neighbors.kneighbors_pos(1)
+    )
+
+
+def test_random_projection_neighbors_recall():
+    """Test the approximate search finds most of the exact nearest neighbors."""
+    rng = np.random.RandomState(RND_SEED)
+    X = rng.randn(2000, 3) @ rng.randn(3, 20)
+    exact_ind = NearestNeighbors(n_neighbors=5).fit(X).kneighbors(X)[1]
+    nn = RandomProjectionNeighbors(n_neighbors=5, n_trees=10, random_state=RND_SEED)
+    neigh_dist, neigh_ind = nn.fit(X).kneighbors(X)
+    recall = np.mean([np.isin(a, b).mean() for a, b in zip(neigh_ind, exact_ind)])
+    assert recall > 0.9
+    assert_array_equal(neigh_ind[:, 0], np.arange(X.shape[0]))
+    assert_allclose(
+        neigh_dist, np.linalg.norm(X[neigh_ind] - X[:, None], axis=2), atol=1e-6
+    )
+    assert np.all(np.diff(neigh_dist, axis=1) >= 0)
+
+
+@pytest.mark.parametrize("issparse", [False, True])
+@pytest.mark.parametrize("n_trees, leaf_size", [(1, 2), (1, 100)])
+def test_random_projection_neighbors_exact(n_trees, leaf_size, issparse):
+    """Test queries with too few candidates or a single leaf are exact."""
+    X = np.random.RandomState(RND_SEED).randn(60, 4)
+    distances, indices = NearestNeighbors(n_neighbors=10).fit(X).kneighbors(X)
+    X_ = sparse.csr_matrix(X) if issparse else X
+    nn = RandomProjectionNeighbors(
+        n_trees=n_trees, leaf_size=leaf_size, random_state=RND_SEED
+    ).fit(X_)
+    approximate_distances, approximate_indices = nn.kneighbors(X_, n_neighbors=10)
+    assert_allclose(approximate_distances, distances, atol=1e-6)
+    assert_array_equal(approximate_indices, indices)
+
+
+def test_random_projection_neighbors_working_memory():
+    """Test the queries processed in blocks return the same neighbors."""
+    X = np.random.RandomState(RND_SEED).randn(500, 10)
+    nn = RandomProjectionNeighbors(n_neighbors=5, random_state=RND_SEED).fit(X)
+    neigh_dist, neigh_ind = nn.kneighbors(X)
+    with config_context(working_memory=0.01):
+        neigh_dist_blocks, neigh_ind_blocks = nn.kneighbors(X)
+    assert_allclose(neigh_dist_blocks, neigh_dist, atol=1e-6)
+    assert_array_equal(neigh_ind_blocks, neigh_ind)
+
+
+def test_random_projection_neighbors_too_many_neighbors():
+    X = np.random.RandomState(RND_SEED).randn(5, 2)
+    nn = RandomProjectionNeighbors(n_neighbors=6).fit(X)
+    with pytest.raises(ValueError, match="Expected n_neighbors <= n_samples_fit"):
+        nn.kneighbors(X)
+
+
+def test_cluster_neighbors_recall():
+    """Test the cluster-local search finds most of the exact nearest neighbors."""
+    rng = np.random.RandomState(RND_SEED)
+    X = rng.randn(2000, 3) @ rng.randn(3, 20)
+    exact_ind = NearestNeighbors(n_neighbors=5).fit(X).kneighbors(X)[1]
+    nn = ClusterNeighbors(n_neighbors=5, random_state=RND_SEED)
+    neigh_dist, neigh_ind = nn.fit(X).kneighbors(X)
+    recall = np.mean([np.isin(a, b).mean() for a, b in zip(neigh_ind, exact_ind)])
+    assert recall > 0.9
+    assert_array_equal(neigh_ind[:, 0], np.arange(X.shape[0]))
+    assert_allclose(
+        neigh_dist, np.linalg.norm(X[neigh_ind] - X[:, None], axis=2), atol=1e-5
+    )
+    assert np.all(np.diff(neigh_dist, axis=1) >= 0)
+
+
+@pytest.mark.parametrize("issparse", [False, True])
+@pytest.mark.parametrize("n_clusters, n_probe", [(5, 5), (30, 1)])
+def test_cluster_neighbors_exact(issparse, n_clusters, n_probe):
+    """Test probing all the clusters, or too few candidates, is exact."""
+    X = np.random.RandomState(RND_SEED).randn(60, 4)
+    X_ = sparse.csr_matrix(X) if issparse else X
+    distances, indices = NearestNeighbors(n_neighbors=10).fit(X).kneighbors(X)
+    nn = ClusterNeighbors(
+        n_clusters=n_clusters, n_probe=n_probe, random_state=RND_SEED
+    ).fit(X_)
+    with config_context(working_memory=0.001):
+        cluster_distances, cluster_indices = nn.kneighbors(X_, n_neighbors=10)
+    assert_allclose(cluster_distances, distances, atol=1e-5)
+    assert_array_equal(cluster_indices, indices)
+
+    # The exhaustive search is only fitted for the queries with too few candidates
+    assert (nn._exhaustive is None) == (n_clusters == n_probe)
+
+
+def test_cluster_neighbors_dtype():
+    """Test the clusters are searched in the floating point type of the data."""
+    X = np.random.RandomState(RND_SEED).randn(200, 4)
+    indices = NearestNeighbors(n_neighbors=3).fit(X).kneighbors(X)[1]
+    nn = ClusterNeighbors(n_neighbors=3, n_probe=30, random_state=RND_SEED).fit(
+        X.astype(np.float32)
+    )
+    assert {
+        estimator._fit_split[0].dtype
+        for estimator in nn._estimators
+        if estimator is not None
+    } == {np.dtype(np.float32)}
+    assert_array_equal(
+        nn.kneighbors(X.astype(np.float32), return_distance=False)[:, 0],
+        indices[:, 0],
+    )
+
+
+def test_cluster_neighbors_too_many_neighbors():
+    X = np.random.RandomState(RND_SEED).randn(5, 2)
+    nn = ClusterNeighbors(n_neighbors=6).fit(X)
+    with pytest.raises(ValueError, match="Expected n_neighbors <= n_samples_fit"):
+        nn.kneighbors(X)
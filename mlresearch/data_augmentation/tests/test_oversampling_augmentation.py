@@ -11,6 +11,11 @@ from imblearn.over_sampling import (
     SVMSMOTE,
 )
 
+from .._neighbors import (
+    BruteForceNeighbors,
+    ClusterNeighbors,
+    RandomProjectionNeighbors,
+)
 from .._oversampling_augmentation import (
     _modify_nn,
     _clone_modify,
@@ -34,6 +39,9 @@ def test_modify_nn_object():
     assert _modify_nn(NearestNeighbors(n_neighbors=5), 3).n_neighbors == 2
     assert _modify_nn(NearestNeighbors(n_neighbors=3), 3).n_neighbors == 2
     assert _modify_nn(NearestNeighbors(n_neighbors=2), 5).n_neighbors == 2
+    assert _modify_nn(BruteForceNeighbors(n_neighbors=5), 3).n_neighbors == 2
+    assert _modify_nn(RandomProjectionNeighbors(n_neighbors=5), 3).n_neighbors == 2
+    assert _modify_nn(ClusterNeighbors(n_neighbors=5), 3).n_neighbors == 2
 
 
 def test_modify_nn_int():
@@ -35,7 +35,7 @@ def is_sampler(estimator):
     is_sampler : bool
         True if estimator is a sampler, otherwise False.
     """
-    if estimator._estimator_type == "sampler":
+    if getattr(estimator, "_estimator_type", None) == "sampler":
         return True
     return False
 